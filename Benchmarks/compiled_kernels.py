@@ -0,0 +1,167 @@
+"""
+compiled_kernels.py
+
+Parity check and speedup report for the compiled kernel backend
+(Components/routing/kernels.py, Simulation/kernels.py) against the pure-Python implementation.
+
+For every schedule the same seeded simulation is run once per backend;
+per-source DAGs / ECMP counts and the final metric results must match
+exactly. Default is fat-tree k=32 (8192 hosts):
+
+    python -m Benchmarks.compiled_kernels
+    python -m Benchmarks.compiled_kernels --hosts 128 --epochs 3 --allow-interpreted
+
+--allow-interpreted runs the kernels as plain Python when Numba is not
+installed, which checks parity but says nothing about speed.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Dict, List
+
+from Benchmarks.kernels import BENCH_SEED, _build_fixture, _quiet, _reseed
+from Components.routing import kernels, weights
+from Components.routing.configurations import policy_configuration
+from Components.routing.multipath import ShortestPathEngine
+from Components.workloads.congestion import carry_over
+from Components.workloads.workload import AR1Workload
+from Simulation.metrics.metric import AllMetrics
+from Simulation.run_simulation import run_simulation
+
+SCHEDULES = ["conga_configuration", "eigrp_ecmp_configuration"]
+
+
+def _use(backend: str, allow_interpreted: bool) -> str:
+    kernels.set_backend(backend, allow_interpreted=allow_interpreted)
+    return kernels.backend()
+
+
+def check_dags(ctx, host_list, n_sources: int, allow_interpreted: bool) -> Dict:
+    """compute_dag / compute_counts must return identical dicts on both backends."""
+    sources = random.Random(BENCH_SEED).sample([h.id for h in host_list], n_sources)
+    out = {}
+
+    for name in ("hop_weight_builder", "eigrp_weight_builder"):
+        builder = getattr(weights, name)
+        timings = {}
+        results = {}
+
+        for backend in ("python", "numba"):
+            _use(backend, allow_interpreted)
+            engine = ShortestPathEngine(ctx, builder)
+            t0 = time.perf_counter()
+            results[backend] = [engine.compute_counts(src) for src in sources]
+            timings[backend] = (time.perf_counter() - t0) / len(sources)
+
+        mismatched = sum(
+            1 for a, b in zip(results["python"], results["numba"])
+            if a != b or list(a[1]) != list(b[1])
+        )
+        out[name] = {
+            "sources": len(sources),
+            "mismatched": mismatched,
+            "python_s": timings["python"],
+            "compiled_s": timings["numba"],
+            "speedup": timings["python"] / timings["numba"] if timings["numba"] else None,
+        }
+
+    return out
+
+
+def run_schedule(schedule: str, host_list, topology, args, backend: str) -> Dict:
+    _use(backend, args.allow_interpreted)
+    _reseed()
+    workload = AR1Workload(host_list, flows_per_epoch=args.flows, rate=args.rate, alpha=0.9)
+
+    t0 = time.perf_counter()
+    with _quiet():
+        results = run_simulation(
+            topology=topology,
+            metrics=[AllMetrics()],
+            congestion=carry_over(),
+            policy_names=policy_configuration[schedule],
+            workload=workload,
+            epochs=args.epochs,
+        )
+    return {"seconds": time.perf_counter() - t0, "results": results}
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+
+    p.add_argument("--hosts", type=int, default=8192)
+    p.add_argument("--flows", type=int, default=3000)
+    p.add_argument("--rate", type=float, default=15)
+    p.add_argument("--epochs", type=int, default=5)
+    p.add_argument("--sources", type=int, default=8)
+    p.add_argument("--schedule", choices=policy_configuration.keys(), action="append")
+    p.add_argument("--allow-interpreted", action="store_true")
+    p.add_argument("--output", type=str, default=None)
+
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if not kernels.NUMBA_AVAILABLE and not args.allow_interpreted:
+        print("numba is not installed: compiled backend unavailable "
+              "(pass --allow-interpreted to check parity only)")
+        return 1
+
+    host_list, topology, ctx = _build_fixture(args.hosts)
+
+    report: Dict = {
+        "hosts": args.hosts,
+        "flows": args.flows,
+        "epochs": args.epochs,
+        "compiled_backend": _use("numba", args.allow_interpreted),
+        "dags": check_dags(ctx, host_list, args.sources, args.allow_interpreted),
+        "schedules": {},
+    }
+
+    failed: List[str] = []
+
+    for name, entry in report["dags"].items():
+        print(f"compute_counts/{name:22s} python={entry['python_s']:.4f}s "
+              f"compiled={entry['compiled_s']:.4f}s speedup={entry['speedup']:.2f}x "
+              f"mismatched={entry['mismatched']}")
+        if entry["mismatched"]:
+            failed.append(f"dags/{name}")
+
+    for schedule in args.schedule or SCHEDULES:
+        print(f"[parity] {schedule}", file=sys.stderr)
+        python = run_schedule(schedule, host_list, topology, args, "python")
+        compiled = run_schedule(schedule, host_list, topology, args, "numba")
+
+        same = python["results"] == compiled["results"]
+        speedup = python["seconds"] / compiled["seconds"]
+        report["schedules"][schedule] = {
+            "python_s": python["seconds"],
+            "compiled_s": compiled["seconds"],
+            "speedup": speedup,
+            "identical": same,
+        }
+        print(f"{schedule:28s} python={python['seconds']:.2f}s "
+              f"compiled={compiled['seconds']:.2f}s speedup={speedup:.2f}x identical={same}")
+        if not same:
+            failed.append(schedule)
+
+    kernels.set_backend("python")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if failed:
+        print(f"PARITY FAILED: {', '.join(failed)}")
+        return 1
+    print("parity OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
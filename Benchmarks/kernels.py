@@ -0,0 +1,336 @@
+"""
+kernels.py
+
+Microbenchmarks for the simulator's hot kernels.
+
+Every kernel is timed at a fixed scale with fixed seeds so that two
+runs on different commits can be compared directly:
+
+    python -m Benchmarks.kernels --scale small --output bench_small.json
+    python -m Benchmarks.kernels --scale small --compare bench_small.json
+
+Scales follow the fat-tree sizing used by the sweeps:
+    small  :  128 hosts (k=8)
+    medium : 1024 hosts (k=16)
+    large  : 8192 hosts (k=32)
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+import global_randoms
+from Components.host import generate_hosts
+from Components.routing import weights
+from Components.routing.configurations import POLICY_BUILDERS
+from Components.routing.multipath import ShortestPathEngine
+from Components.topology.configuration import topology_configuration
+from Components.workloads.configuration import workload_configuration
+from Components.workloads.congestion import bind, carry_over
+from Components.workloads.workload import AR1Workload
+from Simulation.metrics.metric import AllMetrics
+from Simulation.run_epoch import build_epoch_context, run_epoch
+
+SCALES = {
+    "small": {"hosts": 128, "flows": [300, 1000, 3000], "sources": 32},
+    "medium": {"hosts": 1024, "flows": [1000, 3000, 10000], "sources": 16},
+    "large": {"hosts": 8192, "flows": [1000, 3000, 10000], "sources": 8},
+}
+
+BENCH_SEED = 1234
+
+# ---------------------------------------
+# Timing helpers
+# ---------------------------------------
+
+def _quiet():
+    """Swallow the progress prints of topology builders and run_epoch."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def _time(fn: Callable[[], None], repeats: int, setup: Callable[[], None] = None) -> List[float]:
+    """
+    Run fn() `repeats` times and return wall-clock seconds per run.
+
+    setup() runs before every repetition and is not timed.
+    """
+    times = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        with _quiet():
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+    return times
+
+
+def _summary(kernel: str, scale: str, params: Dict, times: List[float], per: int = 1) -> Dict:
+    return {
+        "kernel": kernel,
+        "scale": scale,
+        "params": params,
+        "times": times,
+        "min": min(times) / per,
+        "median": statistics.median(times) / per,
+        "mean": statistics.fmean(times) / per,
+        "per": per,
+    }
+
+
+def _reseed():
+    global_randoms.reset_randoms()
+
+
+def _build_fixture(hosts: int):
+    """Fat-tree topology, context and hosts shared by most kernels."""
+    _reseed()
+    host_list = generate_hosts(hosts)
+    with _quiet():
+        topology = topology_configuration["fat_tree"](host_list)
+    for _, _, data in topology.edges(data=True):
+        data.setdefault("congestion", 0.0)
+        data.setdefault("stale_congestion", 0.0)
+    return host_list, topology, build_epoch_context(topology)
+
+
+def _flows(host_list, n_flows: int):
+    _reseed()
+    return AR1Workload(host_list, flows_per_epoch=n_flows, rate=15, alpha=0.9).generate()
+
+
+def _epoch_result(ctx, host_list, n_flows: int):
+    _reseed()
+    policy = POLICY_BUILDERS["rip_ecmp"](ctx)
+    policy.epoch_tick()
+    flows = _flows(host_list, n_flows)
+    with _quiet():
+        return run_epoch(flows=flows, routing_schedule=[policy], ctx=ctx)
+
+# ---------------------------------------
+# Kernels
+# ---------------------------------------
+
+def bench_compute_dag(scale, cfg, fixture, repeats):
+    host_list, _, ctx = fixture
+    sources = random.Random(BENCH_SEED).sample([h.id for h in host_list], cfg["sources"])
+    out = []
+
+    for name in ("hop_weight_builder", "ospf_weight_builder", "eigrp_weight_builder"):
+        engine = ShortestPathEngine(ctx, getattr(weights, name))
+
+        def run():
+            for src in sources:
+                engine.compute_dag(src)
+
+        times = _time(run, repeats)
+        out.append(_summary(
+            "compute_dag", scale, {"weights": name, "sources": len(sources)},
+            times, per=len(sources),
+        ))
+    return out
+
+
+def bench_policies(scale, cfg, fixture, repeats):
+    host_list, _, ctx = fixture
+    n_flows = cfg["flows"][0]
+    flows = _flows(host_list, n_flows)
+    out = []
+
+    for name, builder in POLICY_BUILDERS.items():
+        state = {}
+
+        def setup():
+            _reseed()
+            state["policy"] = builder(ctx)
+            state["policy"].epoch_tick()
+
+        def route():
+            policy = state["policy"]
+            for flow in flows:
+                policy(flow.src, flow.dst)
+
+        cold = _time(route, repeats, setup=setup)
+        warm = _time(route, repeats)
+        out.append(_summary("policy_cold", scale, {"policy": name, "flows": n_flows}, cold, per=n_flows))
+        out.append(_summary("policy_warm", scale, {"policy": name, "flows": n_flows}, warm, per=n_flows))
+    return out
+
+
+def bench_run_epoch(scale, cfg, fixture, repeats):
+    host_list, _, ctx = fixture
+    out = []
+
+    for n_flows in cfg["flows"]:
+        flows = _flows(host_list, n_flows)
+        state = {}
+
+        def setup():
+            _reseed()
+            state["schedule"] = [POLICY_BUILDERS[name](ctx) for name in ("stale_eigrp_ecmp", "eigrp_ecmp")]
+            for policy in state["schedule"]:
+                policy.epoch_tick()
+
+        def run():
+            run_epoch(flows=flows, routing_schedule=state["schedule"], ctx=ctx)
+
+        times = _time(run, repeats, setup=setup)
+        out.append(_summary("run_epoch", scale, {"flows": n_flows, "policy": "eigrp_ecmp_configuration"}, times))
+    return out
+
+
+def bench_workloads(scale, cfg, fixture, repeats):
+    host_list, _, _ = fixture
+    n_flows = cfg["flows"][-1]
+    out = []
+
+    for name, workload_cls in workload_configuration.items():
+        _reseed()
+        workload = workload_cls(host_list, flows_per_epoch=n_flows, rate=15, alpha=0.9)
+        times = _time(workload.generate, repeats)
+        out.append(_summary("workload_generate", scale, {"workload": name, "flows": n_flows}, times))
+    return out
+
+
+def bench_topologies(scale, cfg, fixture, repeats):
+    out = []
+
+    for name, builder in topology_configuration.items():
+        host_list = generate_hosts(cfg["hosts"])
+        times = _time(lambda: builder(host_list), repeats, setup=_reseed)
+        out.append(_summary("topology_build", scale, {"topology": name, "hosts": cfg["hosts"]}, times))
+    return out
+
+
+def bench_carry_over(scale, cfg, fixture, repeats):
+    host_list, topology, ctx = fixture
+    epoch_result = _epoch_result(ctx, host_list, cfg["flows"][-1])
+    # as run_simulation steps it: ctx arrays updated
+    congestion = bind(carry_over(), ctx)
+
+    times = _time(lambda: congestion(topology, epoch_result), repeats)
+    return [_summary("carry_over", scale, {"edges": len(ctx.edge_list)}, times)]
+
+
+def bench_metrics(scale, cfg, fixture, repeats):
+    host_list, _, ctx = fixture
+    epoch_result = _epoch_result(ctx, host_list, cfg["flows"][-1])
+    metrics = AllMetrics()
+
+    times = _time(lambda: metrics.process(epoch_result), repeats, setup=metrics.reset)
+    return [_summary("all_metrics_process", scale, {"flows": cfg["flows"][-1]}, times)]
+
+
+KERNELS = {
+    "compute_dag": bench_compute_dag,
+    "policies": bench_policies,
+    "run_epoch": bench_run_epoch,
+    "workloads": bench_workloads,
+    "topologies": bench_topologies,
+    "carry_over": bench_carry_over,
+    "metrics": bench_metrics,
+}
+
+# ---------------------------------------
+# Reporting
+# ---------------------------------------
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _key(entry: Dict) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(entry["params"].items()))
+    return f"{entry['scale']}/{entry['kernel']}[{params}]"
+
+
+def compare(current: Dict, baseline: Dict) -> None:
+    """Print median ratios (current / baseline) for kernels present in both."""
+    old = {_key(e): e for e in baseline["results"]}
+
+    print(f"{'kernel':70s} {'base':>12s} {'now':>12s} {'ratio':>7s}")
+    for entry in current["results"]:
+        key = _key(entry)
+        if key not in old:
+            continue
+        base = old[key]["median"]
+        now = entry["median"]
+        ratio = now / base if base else float("inf")
+        print(f"{key:70s} {base:12.6f} {now:12.6f} {ratio:7.2f}")
+
+
+def run_benchmarks(scales: List[str], kernels: List[str], repeats: int) -> Dict:
+    results = []
+
+    for scale in scales:
+        cfg = SCALES[scale]
+        fixture = _build_fixture(cfg["hosts"])
+
+        for name in kernels:
+            print(f"[bench] {scale}/{name}", file=sys.stderr)
+            results.extend(KERNELS[name](scale, cfg, fixture, repeats))
+
+    return {
+        "meta": {
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeats": repeats,
+            "seed": global_randoms.seed,
+        },
+        "results": results,
+    }
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+
+    p.add_argument("--scale", choices=SCALES.keys(), action="append")
+    p.add_argument("--kernel", choices=KERNELS.keys(), action="append")
+    p.add_argument("--repeats", type=int, default=3)
+    p.add_argument("--output", type=str, default=None)
+    p.add_argument("--compare", type=str, default=None)
+
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    report = run_benchmarks(
+        scales=args.scale or ["small"],
+        kernels=args.kernel or list(KERNELS),
+        repeats=args.repeats,
+    )
+
+    for entry in report["results"]:
+        print(f"{_key(entry):70s} median={entry['median']:.6f}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+scaling.py
+
+End-to-end scaling matrix: host counts x topologies x schedules.
+
+Every point runs in its own Python process (so peak RSS belongs to that
+point alone) and records:
+
+    build_s    topology build (experiment.build_topology)
+    cold_s     first epoch, including context and policy construction
+    epoch_s    median seconds per epoch over the remaining epochs
+    peak_rss   peak resident set size of the point's process
+    cache      estimated route-cache bytes at the end of the run
+
+A table is printed per point, then a log-log fit per (topology,
+schedule): value ~ hosts ** exponent. Exponents above --superlinear are
+flagged, e.g. per-source Dijkstra or the jellyfish stub pairing.
+A point that fails or runs past --timeout ends its (topology, schedule)
+series; larger host counts are skipped.
+
+    python -m Benchmarks.scaling
+    python -m Benchmarks.scaling --hosts 128 512 2048 --topology fat_tree --schedule conga_configuration --output scaling.json
+"""
+
+import argparse
+from argparse import Namespace
+import json
+import math
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from Benchmarks.kernels import _quiet, _reseed
+from Components.host import generate_hosts
+from Components.routing.configurations import policy_configuration
+from Components.topology.configuration import topology_configuration
+from Components.workloads.configuration import workload_configuration
+from Components.workloads.congestion import carry_over
+from Simulation.experiment import build_topology
+from Simulation.metrics.metric import AllMetrics
+from Simulation.run_simulation import run_simulation
+from Simulation.telemetry import rss_bytes
+
+HOSTS = [128, 512, 2048, 8192, 32768, 65536]
+SCHEDULES = ["rip_ecmp_configuration", "ospf_ecmp_configuration", "eigrp_drill_configuration", "conga_configuration"]
+
+# fitted per (topology, schedule) against host count
+FITTED = ["build_s", "cold_s", "epoch_s", "peak_rss", "cache_bytes"]
+
+MIB = 1024 * 1024
+
+
+# ---------------------------------------
+# One point (child process)
+# ---------------------------------------
+
+def _peak_rss() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _Clock:
+    """Timestamps each epoch as it reaches the metrics; contributes no results."""
+
+    def __init__(self) -> None:
+        self.stamps: List[float] = []
+
+    def process(self, epoch) -> None:
+        self.stamps.append(time.perf_counter())
+
+    def result(self) -> Dict[str, float]:
+        return {}
+
+    def reset(self) -> None:
+        self.stamps.clear()
+
+
+def run_point(point: Dict) -> Dict:
+    """Build, run and measure one (topology, schedule, hosts) point in this process."""
+    base_rss = rss_bytes()
+
+    _reseed()
+    host_list = generate_hosts(point["hosts"])
+    t0 = time.perf_counter()
+    with _quiet():
+        topology = build_topology(Namespace(topology=point["topology"]), host_list)
+    build_s = time.perf_counter() - t0
+
+    flows = point["flows"] or int(point["flows_per_host"] * point["hosts"])
+    workload = workload_configuration[point["workload"]](
+        host_list, flows_per_epoch=flows, rate=point["rate"], alpha=0.9,
+    )
+
+    clock = _Clock()
+    report: Dict = {}
+    t0 = time.perf_counter()
+    with _quiet():
+        run_simulation(
+            topology=topology,
+            metrics=[clock, AllMetrics()],
+            congestion=carry_over(),
+            policy_names=policy_configuration[point["schedule"]],
+            workload=workload,
+            epochs=point["epochs"],
+            report=report,
+        )
+
+    stamps = [t0] + clock.stamps
+    per_epoch = np.diff(stamps)
+    caches = report.get("route_caches", [])
+
+    return {
+        "nodes": topology.number_of_nodes(),
+        "edges": topology.number_of_edges(),
+        "flows": flows,
+        "build_s": build_s,
+        "cold_s": float(per_epoch[0]) if len(per_epoch) else None,
+        "epoch_s": float(np.median(per_epoch[1:])) if len(per_epoch) > 1 else None,
+        "epoch_times": per_epoch.tolist(),
+        "base_rss": base_rss,
+        "peak_rss": _peak_rss(),
+        "cache_bytes": sum(c["bytes"] for c in caches),
+        "cache_entries": sum(c["entries"] for c in caches),
+    }
+
+
+# ---------------------------------------
+# Driver
+# ---------------------------------------
+
+def measure(point: Dict, timeout: float) -> Dict:
+    """Run one point in a fresh interpreter; status "ok", "timeout" or "error"."""
+    cmd = [sys.executable, "-m", "Benchmarks.scaling", "--point", json.dumps(point)]
+    t0 = time.perf_counter()
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {**point, "status": "timeout", "wall_s": time.perf_counter() - t0}
+
+    wall_s = time.perf_counter() - t0
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        error = (proc.stderr.strip().splitlines() or ["exit status %d" % proc.returncode])[-1]
+        return {**point, "status": "error", "error": error, "wall_s": wall_s}
+
+    return {**point, **json.loads(lines[-1]), "status": "ok", "wall_s": wall_s}
+
+
+def fit_exponents(points: List[Dict]) -> Dict[str, Dict[str, Optional[float]]]:
+    """Per (topology, schedule) slope of log(value) over log(hosts), FITTED fields only."""
+    series: Dict[str, List[Dict]] = {}
+    for p in points:
+        if p["status"] == "ok":
+            series.setdefault(f"{p['topology']}/{p['schedule']}", []).append(p)
+
+    out = {}
+    for key, ps in series.items():
+        out[key] = {}
+        for field in FITTED:
+            xs, ys = [], []
+            for p in ps:
+                value = p.get(field)
+                if field == "peak_rss" and value is not None and p.get("base_rss") is not None:
+                    # interpreter and imports are the same at every size
+                    value -= p["base_rss"]
+                if value is not None and value > 0:
+                    xs.append(math.log(p["hosts"]))
+                    ys.append(math.log(value))
+            out[key][field] = float(np.polyfit(xs, ys, 1)[0]) if len(set(xs)) >= 2 else None
+    return out
+
+
+def _fmt(value, scale: float = 1.0, digits: int = 3) -> str:
+    return "-" if value is None else f"{value / scale:.{digits}f}"
+
+
+def print_table(points: List[Dict]) -> None:
+    print(f"{'topology':20s} {'schedule':26s} {'hosts':>6s} {'nodes':>7s} {'edges':>8s} "
+          f"{'build_s':>9s} {'cold_s':>9s} {'epoch_s':>9s} {'rss_MiB':>9s} {'cache_MiB':>9s}  status")
+    for p in points:
+        print(f"{p['topology']:20s} {p['schedule']:26s} {p['hosts']:6d} "
+              f"{p.get('nodes', '-'):>7} {p.get('edges', '-'):>8} "
+              f"{_fmt(p.get('build_s')):>9s} {_fmt(p.get('cold_s')):>9s} {_fmt(p.get('epoch_s')):>9s} "
+              f"{_fmt(p.get('peak_rss'), MIB, 1):>9s} {_fmt(p.get('cache_bytes'), MIB, 1):>9s}  "
+              f"{p['status']}{': ' + p['error'] if p.get('error') else ''}")
+
+
+def print_exponents(exponents: Dict, superlinear: float) -> None:
+    print()
+    print(f"{'series':48s} " + " ".join(f"{f:>12s}" for f in FITTED))
+    for key, fits in exponents.items():
+        cells = []
+        for field in FITTED:
+            e = fits[field]
+            flag = "*" if e is not None and e > superlinear else " "
+            cells.append(f"{_fmt(e, digits=2):>11s}{flag}")
+        print(f"{key:48s} " + " ".join(cells))
+    print(f"(* exponent above {superlinear}; peak_rss is fitted net of the interpreter's startup RSS)")
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+
+    p.add_argument("--hosts", type=int, nargs="+", default=HOSTS)
+    p.add_argument("--topology", choices=topology_configuration.keys(), action="append",
+                   help="default: every topology_configuration entry")
+    p.add_argument("--schedule", choices=policy_configuration.keys(), action="append")
+    p.add_argument("--workload", choices=[w for w in workload_configuration if w != "trace_replay"],
+                   default="random_workload")
+    p.add_argument("--flows", type=int, default=3000,
+                   help="flows per epoch at every size (0: use --flows-per-host)")
+    p.add_argument("--flows-per-host", type=float, default=1.0)
+    p.add_argument("--rate", type=float, default=15)
+    p.add_argument("--epochs", type=int, default=5,
+                   help="epochs per point; the first is the cold one")
+    p.add_argument("--timeout", type=float, default=1800,
+                   help="seconds per point before it is killed")
+    p.add_argument("--superlinear", type=float, default=1.15,
+                   help="flag fitted exponents above this")
+    p.add_argument("--output", type=str, default=None)
+    p.add_argument("--point", type=str, default=None, help=argparse.SUPPRESS)
+
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.point is not None:
+        print(json.dumps(run_point(json.loads(args.point))))
+        return 0
+
+    points = []
+    for topology in args.topology or list(topology_configuration):
+        for schedule in args.schedule or SCHEDULES:
+            stopped = None
+            for hosts in sorted(args.hosts):
+                point = {
+                    "topology": topology, "schedule": schedule, "hosts": hosts,
+                    "workload": args.workload, "flows": args.flows, "flows_per_host": args.flows_per_host,
+                    "rate": args.rate, "epochs": args.epochs,
+                }
+                if stopped is not None:
+                    points.append({**point, "status": "skipped", "error": f"after {stopped}"})
+                    continue
+
+                print(f"[scaling] {topology} / {schedule} / {hosts} hosts", file=sys.stderr)
+                result = measure(point, args.timeout)
+                points.append(result)
+                if result["status"] != "ok":
+                    stopped = f"{result['status']} at {hosts} hosts"
+
+    exponents = fit_exponents(points)
+    print_table(points)
+    print_exponents(exponents, args.superlinear)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"settings": vars(args), "points": points, "exponents": exponents}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
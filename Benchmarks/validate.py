@@ -0,0 +1,420 @@
+"""
+validate.py
+
+Differential validation of accelerated backends against the reference
+code paths (per-source Python Dijkstra in multipath.py, Python
+run_epoch, metrics fed from the per-epoch arrays).
+
+A backend is a set of process-wide settings on top of the reference
+ones (BACKENDS below). For every (topology, workload, schedule) of a
+small matrix, the same seeded run is made on the reference and on each
+backend, and compared:
+
+    dags  per weight builder, sampled sources on a congested context:
+          predecessor sets and ECMP counts of every node the backend
+          returns (targeted searches may return fewer nodes, but never
+          miss a destination)
+    runs  per-epoch edge loads and drops, and every AllMetrics output,
+          within --rtol / --atol
+
+Backends marked "ties" may pick other equal-cost paths (or recompute a
+DAG at newer weights, see search.py), so their run-level divergence is
+reported but does not fail the check; their DAG checks must still pass.
+
+    python -m Benchmarks.validate
+    python -m Benchmarks.validate --backend bfs --backend alt --topology jellyfish --output validate.json
+"""
+
+import argparse
+import dataclasses
+import itertools
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from Benchmarks.kernels import BENCH_SEED, _quiet, _reseed
+from Components.host import generate_hosts
+from Components.routing import bfs, dag_store, kernels, search, weights
+from Components.routing.configurations import policy_configuration
+from Components.routing.multipath import make_engine
+from Components.topology.configuration import topology_configuration
+from Components.workloads.congestion import carry_over
+from Components.workloads.configuration import workload_configuration
+from Simulation.metrics.metric import AllMetrics
+from Simulation.run_epoch import build_epoch_context
+from Simulation.run_simulation import run_simulation
+
+# reference settings; a backend overrides some of them
+REFERENCE = {
+    "kernels": "python",
+    "search": "full",
+    "bfs_batch": 0,
+    "dag_store": False,
+    "metric_input": "arrays",
+}
+
+# runs: "exact" (must match) or "ties" (equal-cost choices may differ)
+BACKENDS = {
+    "numba": {"settings": {"kernels": "numba"}, "runs": "exact"},
+    "bfs": {"settings": {"bfs_batch": 64}, "runs": "exact"},
+    "targeted": {"settings": {"search": "targeted"}, "runs": "ties"},
+    "alt": {"settings": {"search": "alt"}, "runs": "ties"},
+    "dag_store": {"settings": {"dag_store": True}, "runs": "exact"},
+    "dict_metrics": {"settings": {"metric_input": "dicts"}, "runs": "exact"},
+}
+
+TOPOLOGIES = ["fat_tree", "leaf_spine", "jellyfish"]
+WORKLOADS = ["random_workload", "incast"]
+SCHEDULES = ["rip_ecmp_configuration", "ospf_ecmp_configuration", "conga_configuration", "eigrp_drill_configuration"]
+
+DAG_BUILDERS = ["hop_weight_builder", "ospf_weight_builder", "eigrp_weight_builder"]
+
+
+# ---------------------------------------
+# Settings
+# ---------------------------------------
+
+def _apply(settings: Dict, store_dir: Optional[str], allow_interpreted: bool) -> None:
+    kernels.set_backend(settings["kernels"], allow_interpreted=allow_interpreted)
+    search.configure(settings["search"])
+    bfs.configure(settings["bfs_batch"])
+    dag_store.configure(store_dir if settings["dag_store"] else None)
+
+
+def _restore_defaults() -> None:
+    kernels.set_backend("python")
+    search.configure()
+    bfs.configure()
+    dag_store.configure(None)
+
+
+def _available(name: str, allow_interpreted: bool) -> bool:
+    if BACKENDS[name]["settings"].get("kernels") == "numba":
+        return kernels.NUMBA_AVAILABLE or allow_interpreted
+    return True
+
+
+class _DictView:
+    """Feeds a metric EpochResults without the array fields (dict fallback path)."""
+
+    def __init__(self, metric) -> None:
+        self.metric = metric
+
+    def attach(self, ctx) -> None:
+        self.metric.attach(ctx)
+
+    def process(self, epoch) -> None:
+        self.metric.process(dataclasses.replace(
+            epoch,
+            edge_load_array=None, edge_dropped_array=None, edge_capacity_array=None,
+            active_edges=None, switch_load_array=None, switch_capacity_array=None,
+            active_switches=None,
+        ))
+
+    def result(self) -> Dict[str, float]:
+        return self.metric.result()
+
+    def reset(self) -> None:
+        self.metric.reset()
+
+
+class _Capture:
+    """Keeps per-epoch edge loads / drops; contributes no results."""
+
+    def __init__(self) -> None:
+        self.epochs = []
+
+    def process(self, epoch) -> None:
+        self.epochs.append((
+            np.array(epoch.edge_load_array, dtype=np.float64),
+            np.array(epoch.edge_dropped_array, dtype=np.float64),
+            epoch.num_flows(),
+        ))
+
+    def result(self) -> Dict[str, float]:
+        return {}
+
+    def reset(self) -> None:
+        self.epochs.clear()
+
+
+# ---------------------------------------
+# Fixtures
+# ---------------------------------------
+
+def _topology(name: str, hosts: int):
+    _reseed()
+    host_list = generate_hosts(hosts)
+    with _quiet():
+        topology = topology_configuration[name](host_list)
+    for _, _, data in topology.edges(data=True):
+        data.setdefault("congestion", 0.0)
+        data.setdefault("stale_congestion", 0.0)
+    return host_list, topology
+
+
+def _congested_context(topology):
+    """Context with seeded congestion, so dynamic weights are not all equal."""
+    ctx = build_epoch_context(topology)
+    rng = np.random.default_rng(BENCH_SEED)
+    ctx.congestion[:] = rng.uniform(0.0, 0.5, len(ctx.capacity)) * ctx.capacity
+    ctx.stale_congestion[:] = rng.uniform(0.0, 0.5, len(ctx.capacity)) * ctx.capacity
+    return ctx
+
+
+# ---------------------------------------
+# DAG comparison
+# ---------------------------------------
+
+def compare_dag(ref, alt, targets) -> Dict[str, int]:
+    """
+    Differences between a reference (preds, count) and a backend's.
+
+    The backend may hold fewer nodes (targeted search); every node it
+    holds must have the reference predecessor set and count, and every
+    reachable target must be there.
+    """
+    ref_preds, ref_count = ref
+    preds, count = alt
+    out = {"nodes": len(preds), "extra": 0, "pred_sets": 0, "counts": 0, "missing": 0}
+
+    for node, ps in preds.items():
+        if node not in ref_preds:
+            out["extra"] += 1
+            continue
+        if set(ps) != set(ref_preds[node]):
+            out["pred_sets"] += 1
+        if count.get(node, 0) != ref_count.get(node, 0):
+            out["counts"] += 1
+
+    out["missing"] = sum(1 for t in targets if t in ref_count and t not in count)
+    return out
+
+
+def check_dags(topology, host_list, backend: str, store_dir: str, args) -> Dict:
+    """Per weight builder: summed differences over sampled sources and timings."""
+    rng = random.Random(BENCH_SEED)
+    ids = [h.id for h in host_list]
+    sources = rng.sample(ids, min(args.sources, len(ids)))
+    pairs = [(s, d) for s in sources for d in rng.sample(ids, min(args.sources, len(ids))) if d != s]
+    targets = {s: [d for src, d in pairs if src == s] for s in sources}
+
+    settings = {**REFERENCE, **BACKENDS[backend]["settings"]}
+    out = {}
+
+    for name in DAG_BUILDERS:
+        builder = getattr(weights, name)
+
+        _apply(REFERENCE, store_dir, args.allow_interpreted)
+        ctx = _congested_context(topology)
+        engine = make_engine(ctx, builder)
+        engine.prepare(pairs)
+        t0 = time.perf_counter()
+        ref = {s: engine.compute_counts(s) for s in sources}
+        ref_s = time.perf_counter() - t0
+
+        _apply(settings, store_dir, args.allow_interpreted)
+        if settings["dag_store"]:
+            # fill the store, then time reads by a fresh engine
+            warm = make_engine(ctx, builder)
+            for s in sources:
+                warm.compute_counts(s)
+            dag_store.flush_all()
+            dag_store.configure(store_dir)
+        engine = make_engine(ctx, builder)
+        engine.prepare(pairs)
+        t0 = time.perf_counter()
+        alt = {s: engine.compute_counts(s) for s in sources}
+        alt_s = time.perf_counter() - t0
+
+        diff = {"nodes": 0, "extra": 0, "pred_sets": 0, "counts": 0, "missing": 0}
+        for s in sources:
+            for key, value in compare_dag(ref[s], alt[s], targets[s]).items():
+                diff[key] += value
+
+        out[name] = {
+            **diff,
+            "sources": len(sources),
+            "reference_s": ref_s,
+            "backend_s": alt_s,
+            "speedup": ref_s / alt_s if alt_s else None,
+            "ok": not (diff["extra"] or diff["pred_sets"] or diff["counts"] or diff["missing"]),
+        }
+
+    return out
+
+
+# ---------------------------------------
+# Run comparison
+# ---------------------------------------
+
+def _run(topology_name, workload_name, schedule, settings, store_dir, args) -> Dict:
+    host_list, topology = _topology(topology_name, args.hosts)
+    workload = workload_configuration[workload_name](
+        host_list, flows_per_epoch=args.flows, rate=args.rate, alpha=0.9,
+    )
+    _apply(settings, store_dir, args.allow_interpreted)
+
+    capture = _Capture()
+    metrics = AllMetrics()
+    if settings["metric_input"] == "dicts":
+        metrics = _DictView(metrics)
+
+    t0 = time.perf_counter()
+    with _quiet():
+        results = run_simulation(
+            topology=topology,
+            metrics=[metrics, capture],
+            congestion=carry_over(),
+            policy_names=policy_configuration[schedule],
+            workload=workload,
+            epochs=args.epochs,
+        )
+    return {"seconds": time.perf_counter() - t0, "results": results, "epochs": capture.epochs}
+
+
+def _close(a: float, b: float, args) -> bool:
+    return abs(a - b) <= args.atol + args.rtol * abs(a)
+
+
+def compare_runs(ref: Dict, alt: Dict, args) -> List[str]:
+    """Human-readable divergences between two runs (empty if none)."""
+    out = []
+
+    for epoch, (r, a) in enumerate(zip(ref["epochs"], alt["epochs"])):
+        for label, x, y in (("edge_load", r[0], a[0]), ("edge_dropped", r[1], a[1])):
+            bad = ~np.isclose(y, x, rtol=args.rtol, atol=args.atol)
+            if bad.any():
+                worst = int(np.argmax(np.abs(y - x)))
+                out.append(f"epoch {epoch} {label}: {int(bad.sum())} edges differ "
+                           f"(max at edge {worst}: {x[worst]:.6g} vs {y[worst]:.6g})")
+        if r[2] != a[2]:
+            out.append(f"epoch {epoch} flows: {r[2]} vs {a[2]}")
+    if len(ref["epochs"]) != len(alt["epochs"]):
+        out.append(f"epochs: {len(ref['epochs'])} vs {len(alt['epochs'])}")
+
+    keys = ref["results"].keys() | alt["results"].keys()
+    for key in sorted(keys):
+        x, y = ref["results"].get(key), alt["results"].get(key)
+        if x is None or y is None:
+            out.append(f"{key}: missing ({x} vs {y})")
+        elif not _close(float(x), float(y), args):
+            out.append(f"{key}: {x:.6g} vs {y:.6g}")
+
+    return out
+
+
+# ---------------------------------------
+# Driver
+# ---------------------------------------
+
+def parse_args():
+    p = argparse.ArgumentParser()
+
+    p.add_argument("--topology", choices=topology_configuration.keys(), action="append")
+    p.add_argument("--workload", choices=[w for w in workload_configuration if w != "trace_replay"], action="append")
+    p.add_argument("--schedule", choices=policy_configuration.keys(), action="append")
+    p.add_argument("--backend", choices=BACKENDS.keys(), action="append",
+                   help="default: every backend available here")
+    p.add_argument("--hosts", type=int, default=32)
+    p.add_argument("--flows", type=int, default=100)
+    p.add_argument("--rate", type=float, default=15)
+    p.add_argument("--epochs", type=int, default=3)
+    p.add_argument("--sources", type=int, default=8,
+                   help="sampled sources (and destinations per source) for the DAG checks")
+    p.add_argument("--rtol", type=float, default=1e-9)
+    p.add_argument("--atol", type=float, default=1e-9)
+    p.add_argument("--allow-interpreted", action="store_true",
+                   help="run the numba backend's kernels as plain Python if Numba is missing")
+    p.add_argument("--output", type=str, default=None)
+
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    backends = args.backend or [b for b in BACKENDS if _available(b, args.allow_interpreted)]
+    for b in backends:
+        if not _available(b, args.allow_interpreted):
+            print(f"backend {b}: numba is not installed (pass --allow-interpreted to check parity only)")
+            return 1
+
+    topologies = args.topology or TOPOLOGIES
+    configs = list(itertools.product(topologies, args.workload or WORKLOADS, args.schedule or SCHEDULES))
+
+    store_root = tempfile.mkdtemp(prefix="validate_dags_")
+    report: Dict = {"settings": vars(args), "backends": backends, "dags": {}, "runs": {}}
+    failed: List[str] = []
+
+    try:
+        # DAG checks, once per topology
+        for topology_name in topologies:
+            host_list, topology = _topology(topology_name, args.hosts)
+            for b in backends:
+                print(f"[dags] {topology_name} / {b}", file=sys.stderr)
+                store_dir = tempfile.mkdtemp(dir=store_root)
+                entries = check_dags(topology, host_list, b, store_dir, args)
+                report["dags"][f"{topology_name}/{b}"] = entries
+                for name, e in entries.items():
+                    status = "ok" if e["ok"] else "DIVERGED"
+                    speedup = f"{e['speedup']:.2f}x" if e["speedup"] else "-"
+                    print(f"dags {topology_name:12s} {b:12s} {name:22s} speedup={speedup:>8s} "
+                          f"nodes={e['nodes']} pred_sets={e['pred_sets']} counts={e['counts']} "
+                          f"missing={e['missing']} extra={e['extra']} {status}")
+                    if not e["ok"]:
+                        failed.append(f"dags/{topology_name}/{b}/{name}")
+
+        # run checks, per configuration
+        for topology_name, workload_name, schedule in configs:
+            label = f"{topology_name}/{workload_name}/{schedule}"
+            print(f"[runs] {label}", file=sys.stderr)
+            ref = _run(topology_name, workload_name, schedule, REFERENCE, None, args)
+            entry = {"reference_s": ref["seconds"], "backends": {}}
+
+            for b in backends:
+                settings = {**REFERENCE, **BACKENDS[b]["settings"]}
+                store_dir = tempfile.mkdtemp(dir=store_root)
+                if settings["dag_store"]:
+                    # first run fills the store, the compared run reads it
+                    _run(topology_name, workload_name, schedule, settings, store_dir, args)
+                alt = _run(topology_name, workload_name, schedule, settings, store_dir, args)
+
+                diffs = compare_runs(ref, alt, args)
+                speedup = ref["seconds"] / alt["seconds"] if alt["seconds"] else None
+                tolerated = BACKENDS[b]["runs"] == "ties"
+                status = "ok" if not diffs else ("diverged (ties allowed)" if tolerated else "DIVERGED")
+                entry["backends"][b] = {
+                    "backend_s": alt["seconds"], "speedup": speedup, "status": status, "divergences": diffs,
+                }
+
+                print(f"runs {label:60s} {b:12s} speedup={speedup:.2f}x {status}")
+                for line in diffs[:args.epochs + 3]:
+                    print(f"    {line}")
+                if diffs and not tolerated:
+                    failed.append(f"runs/{label}/{b}")
+
+            report["runs"][label] = entry
+    finally:
+        _restore_defaults()
+        shutil.rmtree(store_root, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+    if failed:
+        print(f"VALIDATION FAILED: {', '.join(failed)}")
+        return 1
+    print("validation OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
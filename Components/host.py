@@ -4,17 +4,255 @@ host.py
 Defines the Host abstraction used throughout the simulator.
 
 A Host represents an endpoint (server / machine) in the datacenter.
-It is intentionally lightweight and contains only metadata.
+Host attributes live in a columnar HostTable shared by every host of a
+run; a Host is a thin view (table, row) onto it, so group assignment
+and affinity ordering are array operations over all hosts at once.
 """
 
-from dataclasses import dataclass, field
-from typing import Set
+from collections.abc import MutableSet
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# "<column>:<int>" tags held as int columns (-1 = unset) rather than bits
+COLUMNS = ("job", "rack", "role")
+
+_WORD = 64
+
+
+def _split_tag(tag: str) -> Tuple[Optional[str], Optional[int]]:
+    """("job", 3) for "job:3"; (None, None) for tags without an int value."""
+    prefix, sep, value = tag.rpartition(":")
+    if sep and prefix and value.lstrip("-").isdigit():
+        return prefix, int(value)
+    return None, None
+
+
+class HostTable:
+    """
+    Columnar attributes of a set of hosts.
+
+    Parameters
+    ----------
+    ids : sequence of int
+        Host ids, one row per host.
+
+    Attributes
+    ----------
+    ids : np.ndarray
+        (n,) int64 host id of each row.
+    columns : dict[str, np.ndarray]
+        (n,) int32 per-host value of "<name>:<int>" tags (job / group id,
+        rack, role, ...), -1 where unset. Created on first use.
+    bits : np.ndarray
+        (n, words) uint64 membership of the remaining (plain) tags, one
+        bit per tag as assigned in `registry`.
+    registry : dict[str, int]
+        Plain tag -> bit index.
+    """
+
+    def __init__(self, ids: Sequence[int]) -> None:
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.columns: Dict[str, np.ndarray] = {}
+        for name in COLUMNS:
+            self.column(name)
+        self.registry: Dict[str, int] = {}
+        self.bits = np.zeros((len(self.ids), 1), dtype=np.uint64)
+        self._hosts = [Host(int(i), table=self, row=row) for row, i in enumerate(self.ids.tolist())]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def hosts(self) -> List["Host"]:
+        """One Host view per row, in row order."""
+        return self._hosts
+
+    @staticmethod
+    def of(hosts: Sequence["Host"]) -> Tuple["HostTable", np.ndarray]:
+        """The table shared by `hosts` and their rows, in list order."""
+        if not hosts:
+            return HostTable([]), np.zeros(0, dtype=np.int64)
+        table = hosts[0].table
+        if any(h.table is not table for h in hosts):
+            raise ValueError("Hosts belong to different host tables")
+        return table, np.fromiter((h.row for h in hosts), dtype=np.int64, count=len(hosts))
+
+    # ---------------------------------------
+    # Columns
+    # ---------------------------------------
+
+    def column(self, name: str) -> np.ndarray:
+        """Int column `name` (created unset on first use)."""
+        col = self.columns.get(name)
+        if col is None:
+            col = self.columns[name] = np.full(len(self.ids), -1, dtype=np.int32)
+        return col
+
+    def clear_column(self, name: str, rows: Optional[np.ndarray] = None) -> None:
+        col = self.column(name)
+        if rows is None:
+            col[:] = -1
+        else:
+            col[rows] = -1
+
+    def assign_chunks(self, name: str, rows: np.ndarray, size: int, count: int) -> None:
+        """Give rows[g*size:(g+1)*size] value g in column `name`, for g < count."""
+        n = min(len(rows), size * count)
+        self.column(name)[rows[:n]] = np.arange(n, dtype=np.int32) // size
+
+    # ---------------------------------------
+    # Plain tags (bitmask)
+    # ---------------------------------------
+
+    def tag_bit(self, tag: str) -> int:
+        """Bit index of `tag`, registering it (and growing `bits`) if new."""
+        bit = self.registry.get(tag)
+        if bit is None:
+            bit = self.registry[tag] = len(self.registry)
+            if bit // _WORD >= self.bits.shape[1]:
+                self.bits = np.concatenate(
+                    (self.bits, np.zeros((len(self.ids), 1), dtype=np.uint64)), axis=1
+                )
+        return bit
+
+    def has_bit(self, tag: str) -> np.ndarray:
+        """(n,) bool: rows carrying plain tag `tag`."""
+        bit = self.registry.get(tag)
+        if bit is None:
+            return np.zeros(len(self.ids), dtype=bool)
+        word, mask = divmod(bit, _WORD)
+        return (self.bits[:, word] & np.uint64(1 << mask)) != 0
+
+    def _set_bit(self, row: int, tag: str, on: bool) -> None:
+        word, mask = divmod(self.tag_bit(tag), _WORD)
+        if on:
+            self.bits[row, word] |= np.uint64(1 << mask)
+        else:
+            self.bits[row, word] &= ~np.uint64(1 << mask)
+
+    # ---------------------------------------
+    # Tags (string view used by Host)
+    # ---------------------------------------
+
+    def add_tag(self, row: int, tag: str) -> None:
+        """
+        Give row `tag`. A row holds one value per column: adding
+        "job:4" to a row tagged "job:3" raises ValueError (remove the
+        old tag first).
+        """
+        name, value = _split_tag(tag)
+        if name is not None:
+            col = self.column(name)
+            if 0 <= col[row] != value:
+                raise ValueError(f"Host already has {name}:{int(col[row])}; remove it before adding {tag}")
+            col[row] = value
+        else:
+            self._set_bit(row, tag, True)
+
+    def remove_tag(self, row: int, tag: str) -> None:
+        name, value = _split_tag(tag)
+        if name is not None:
+            col = self.columns.get(name)
+            if col is not None and col[row] == value:
+                col[row] = -1
+        elif tag in self.registry:
+            self._set_bit(row, tag, False)
+
+    def has_tag(self, row: int, tag: str) -> bool:
+        name, value = _split_tag(tag)
+        if name is not None:
+            col = self.columns.get(name)
+            return col is not None and int(col[row]) == value
+        bit = self.registry.get(tag)
+        if bit is None:
+            return False
+        word, mask = divmod(bit, _WORD)
+        return bool(self.bits[row, word] & np.uint64(1 << mask))
+
+    def tags(self, row: int) -> FrozenSet[str]:
+        tags = {f"{name}:{int(col[row])}" for name, col in self.columns.items() if col[row] >= 0}
+        tags.update(tag for tag in self.registry if self.has_tag(row, tag))
+        return frozenset(tags)
+
+    def _column_tags(self, prefix: str, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        """tag -> (len(rows),) bool for the "<name>:<int>" tags starting with prefix."""
+        out = {}
+        for name, col in self.columns.items():
+            head = f"{name}:"
+            if not (head.startswith(prefix) or prefix.startswith(head)):
+                continue
+            values = col[rows]
+            for v in np.unique(values[values >= 0]).tolist():
+                tag = f"{head}{v}"
+                if tag.startswith(prefix):
+                    out[tag] = values == v
+        return out
+
+    def clear_prefix(self, prefix: str, rows: Optional[np.ndarray] = None) -> None:
+        """Drop every tag starting with `prefix` from `rows` (default all)."""
+        if rows is None:
+            rows = np.arange(len(self.ids))
+        for tag, mask in self._column_tags(prefix, rows).items():
+            self.column(tag.rpartition(":")[0])[rows[mask]] = -1
+        for tag, bit in self.registry.items():
+            if tag.startswith(prefix):
+                word, mask = divmod(bit, _WORD)
+                self.bits[rows, word] &= ~np.uint64(1 << mask)
+
+    def prefix_groups(self, prefix: str, rows: np.ndarray) -> np.ndarray:
+        """
+        Rank of the `prefix` tag of each of `rows` when tags are sorted as
+        strings ("job:10" < "job:2"), or -1 for rows without one.
+        """
+        keys = self._column_tags(prefix, rows)
+        for tag in self.registry:
+            if tag.startswith(prefix):
+                keys.setdefault(tag, self.has_bit(tag)[rows])
+
+        rank = np.full(len(rows), -1, dtype=np.int64)
+        # the smallest tag wins for a host with several matching tags
+        for r, tag in reversed(list(enumerate(sorted(keys)))):
+            rank[keys[tag]] = r
+        return rank
+
+
+class HostTags(MutableSet):
+    """
+    Live set view of one host's tags: add / discard / `in` read and
+    write the HostTable row, so `host.tags.add("gpu")` works as it did
+    on a plain set. Iteration walks a snapshot, so a loop may remove
+    the tags it visits.
+    """
+
+    __slots__ = ("table", "row")
+
+    def __init__(self, table: HostTable, row: int) -> None:
+        self.table = table
+        self.row = row
+
+    def __contains__(self, tag) -> bool:
+        return isinstance(tag, str) and self.table.has_tag(self.row, tag)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.table.tags(self.row))
+
+    def __len__(self) -> int:
+        return len(self.table.tags(self.row))
+
+    def add(self, tag: str) -> None:
+        self.table.add_tag(self.row, tag)
+
+    def discard(self, tag: str) -> None:
+        self.table.remove_tag(self.row, tag)
+
+    def __repr__(self) -> str:
+        return f"HostTags({sorted(self)})"
 
 
-@dataclass(slots=True)
 class Host:
     """
-    Lightweight representation of a compute node.
+    Lightweight view of one compute node (one row of a HostTable).
 
     Parameters
     ----------
@@ -25,24 +263,60 @@ class Host:
         Examples:
             {"gpu"}
             {"storage"}
-            {"server"}
-            {"worker"}
+            {"job:3"}
+            {"rack:0"}
         routing/topology/workload modules may interpret these.
+        "<name>:<int>" tags are stored in int column <name> of the
+        table, others as bits. A host holds at most one value per
+        name: adding "job:4" while tagged "job:3" raises ValueError.
     """
 
-    id: int
-    tags: Set[str] = field(default_factory=set)
+    __slots__ = ("id", "table", "row")
+
+    def __init__(
+        self,
+        id: int,
+        tags: Iterable[str] = (),
+        table: Optional[HostTable] = None,
+        row: int = 0,
+    ) -> None:
+        self.id = id
+        if table is None:
+            # standalone host: a private one-row table
+            table = HostTable([id])
+        self.table = table
+        self.row = row
+        for tag in tags:
+            self.add_tag(tag)
+
+    @property
+    def tags(self) -> HostTags:
+        """Live set view of this host's tags (writes through to the table)."""
+        return HostTags(self.table, self.row)
+
+    @tags.setter
+    def tags(self, tags: Iterable[str]) -> None:
+        tags = list(tags)
+        view = self.tags
+        view.clear()
+        for tag in tags:
+            view.add(tag)
 
     # Convenience helpers
     def has_tag(self, tag: str) -> bool:
         """Return True if this host has the given tag."""
-        return tag in self.tags
+        return self.table.has_tag(self.row, tag)
     def add_tag(self, tag: str) -> None:
         """Attach a label to this host."""
-        self.tags.add(tag)
+        self.table.add_tag(self.row, tag)
     def remove_tag(self, tag: str) -> None:
         """Remove a label from this host."""
-        self.tags.discard(tag)
+        self.table.remove_tag(self.row, tag)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Host):
+            return NotImplemented
+        return self.id == other.id and self.table.tags(self.row) == other.table.tags(other.row)
 
     # Debugging / logging
     def __repr__(self) -> str:
@@ -56,8 +330,8 @@ def generate_hosts(n: int) -> list[Host]:
     """
     Create n hosts with unique deterministic IDs.
 
-    IDs are 0..n-1.
+    IDs are 0..n-1; all hosts share one HostTable (hosts[0].table).
 
     This function guarantees uniqueness.
     """
-    return [Host(id=i) for i in range(n)]
\ No newline at end of file
+    return HostTable(range(n)).hosts
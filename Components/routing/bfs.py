@@ -0,0 +1,170 @@
+"""
+bfs.py
+
+Level-synchronous BFS for a batch of sources at once (hop weights).
+
+With unit weights (rip, rip_ecmp, rip_drill, conga) the engine's
+Dijkstra is a BFS paying for a heap, one source at a time. batch_bfs
+expands the frontier of every source in a batch together: per level,
+the frontier's path counts are pushed over the CSR adjacency into the
+not yet visited nodes, which is the sparse (adjacency) x dense
+(sources x nodes) product C[l+1] = C[l] A restricted to new nodes,
+written as a gather over CSR positions plus a segmented sum in numpy.
+
+Nodes are settled in the order the engine's Dijkstra pops them: by
+level, then by (pop position of the first parent, adjacency position).
+This is the heap's (distance, push counter) order under unit weights.
+Each node's predecessors are listed in parent pop order. HopCountEngine
+(multipath.py) therefore returns exactly the DAGs, orders and ECMP
+counts of the per-source search.
+
+Batching is on by default; configure(batch_size=0) (main.py
+--bfs-batch 0) falls back to per-source searches.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# counts are int64; a batch whose counts could exceed this falls back
+_MAX_COUNT = 2 ** 62
+
+# cap on sources x nodes per batch (each state array is that many int64s)
+MAX_CELLS = 1 << 22
+
+# past a few dozen sources the per-level gathers outgrow the cache and
+# cost more than the per-level overhead they share
+_batch_size = 64
+
+
+def configure(batch_size: int = 64) -> None:
+    """Sources per BFS batch for unit-weight engines built after this call (0 = off)."""
+    global _batch_size
+    if batch_size < 0:
+        raise ValueError("BFS batch size must be >= 0")
+    _batch_size = batch_size
+
+
+def batch_size(num_nodes: int) -> int:
+    """Sources per batch on a graph of num_nodes nodes (0 = batching off)."""
+    if not _batch_size:
+        return 0
+    return max(1, min(_batch_size, MAX_CELLS // max(num_nodes, 1)))
+
+
+DagArrays = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+def batch_bfs(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    adj_eids: np.ndarray,
+    edge_up: np.ndarray,
+    sources: Sequence[int],
+) -> Optional[List[DagArrays]]:
+    """
+    Shortest-hop DAGs from every node index in `sources`.
+
+    Returns one (order, dist, count, npred, pred_idx) per source, in the
+    DagStore layout: reachable nodes in pop order, their hop distance
+    (float) and ECMP path count, number of predecessors, and the
+    predecessors row by row. None if some count could overflow int64.
+    """
+    n = len(indptr) - 1
+    s_count = len(sources)
+    deg = np.diff(indptr)
+    live = edge_up[adj_eids]
+
+    rows = np.arange(s_count)
+    src = np.asarray(sources, dtype=np.int64)
+
+    # (source, node) state, flat index source * n + node
+    level = np.full(s_count * n, -1, dtype=np.int64)
+    count = np.zeros(s_count * n, dtype=np.int64)
+    level[rows * n + src] = 0
+    count[rows * n + src] = 1
+    npred = np.zeros(s_count * n, dtype=np.int64)
+
+    # settled nodes and DAG edges (source, tail, head) per level, each
+    # level in (source, pop order)
+    nodes_s, nodes_v = [rows], [src]
+    edges_s, edges_u = [], []
+    limit = _MAX_COUNT // max(int(deg.max()) if n else 1, 1)
+
+    # the frontier is kept in (source, pop order), so gather order is
+    # (source, parent pop position, adjacency position): the discovery
+    # order of the next level
+    fs, fu = rows, src
+    depth = 0
+    while len(fs):
+        if int(count[fs * n + fu].max()) > limit:
+            return None
+
+        # gather: every live CSR position of every frontier node
+        lens = deg[fu]
+        owner = np.repeat(np.arange(len(fs)), lens)
+        pos = np.arange(int(lens.sum())) - np.repeat(np.cumsum(lens) - lens, lens) + np.repeat(indptr[fu], lens)
+        keep = live[pos]
+        owner, pos = owner[keep], pos[keep]
+        cs, cu, cv = fs[owner], fu[owner], indices[pos]
+
+        head = cs * n + cv
+        new = level[head] < 0
+        cs, cu, head = cs[new], cu[new], head[new]
+        if not len(cs):
+            break
+        depth += 1
+
+        # group by (source, node); stable, so parents stay in discovery order
+        o = np.argsort(head, kind="stable")
+        cs, cu, head = cs[o], cu[o], head[o]
+        first = np.ones(len(head), dtype=bool)
+        first[1:] = head[1:] != head[:-1]
+        starts = np.flatnonzero(first)
+        sizes = np.diff(np.append(starts, len(head)))
+
+        # segmented sum of parent counts per (source, node)
+        gcount = np.add.reduceat(count[cs * n + cu], starts)
+
+        # new nodes in discovery order (first parent's gather position)
+        g = np.argsort(o[starts], kind="stable")
+        gs, ghead = cs[starts[g]], head[starts[g]]
+        level[ghead] = depth
+        count[ghead] = gcount[g]
+        npred[ghead] = sizes[g]
+
+        # DAG edges grouped by head in discovery order
+        r = np.repeat(starts[g] - np.cumsum(sizes[g]) + sizes[g], sizes[g]) + np.arange(len(head))
+        edges_s.append(cs[r])
+        edges_u.append(cu[r])
+
+        fs, fu = gs, ghead - gs * n
+        nodes_s.append(fs)
+        nodes_v.append(fu)
+
+    # levels concatenated, then stably by source: pop order per source
+    ns, nv = np.concatenate(nodes_s), np.concatenate(nodes_v)
+    o = np.argsort(ns, kind="stable")
+    ns, nv = ns[o], nv[o]
+    node_bounds = np.searchsorted(ns, rows, side="left").tolist() + [len(ns)]
+
+    if edges_s:
+        es, eu = np.concatenate(edges_s), np.concatenate(edges_u)
+        o = np.argsort(es, kind="stable")
+        es, eu = es[o], eu[o]
+    else:
+        es = eu = np.zeros(0, dtype=np.int64)
+    edge_bounds = np.searchsorted(es, rows, side="left").tolist() + [len(es)]
+
+    out = []
+    for i in range(s_count):
+        order = nv[node_bounds[i]:node_bounds[i + 1]]
+        flat = i * n + order
+        out.append((
+            order,
+            level[flat].astype(np.float64),
+            count[flat],
+            npred[flat],
+            eu[edge_bounds[i]:edge_bounds[i + 1]],
+        ))
+    return out
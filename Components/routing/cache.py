@@ -0,0 +1,196 @@
+"""
+cache.py
+
+Memory-bounded route cache shared by every routing policy.
+
+Policies keep per-source DAGs (and, for DRILL/CONGA, per-pair paths)
+between calls. Unbounded dicts grow with the number of distinct sources,
+which is fine at 128 hosts but not at 8192 hosts with several policies
+in one schedule. RouteCache is a drop-in replacement with:
+
+    - optional entry and byte budgets
+    - LRU eviction
+    - per-cache stats (entries, estimated bytes, hits, misses, evictions)
+
+Budgets are per cache, i.e. per policy instance. Process-wide defaults
+are set once with configure() before policies are built.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional
+
+# Rough CPython sizes used for byte estimates (64-bit build)
+_DICT_ITEM_BYTES = 104      # key/value slot + hashed node key + float/int value
+_LIST_BYTES = 72            # empty list object
+_PTR_BYTES = 8              # list element pointer
+
+_default_max_entries: Optional[int] = None
+_default_max_bytes: Optional[int] = None
+
+
+def configure(max_entries: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+    """Set the budget used by caches created after this call (None = unbounded)."""
+    global _default_max_entries, _default_max_bytes
+    _default_max_entries = max_entries
+    _default_max_bytes = max_bytes
+
+
+# ---------------------------------------
+# Size estimates
+# ---------------------------------------
+
+def dag_bytes(preds: Dict, *maps: Dict) -> int:
+    """
+    Estimate the footprint of a predecessor dict plus any per-node maps
+    (ECMP counts, distances) that are stored alongside it.
+
+    Array-backed DAGs (dag_arrays.py) report their arrays' size; their
+    maps are views of the same arrays.
+    """
+    nbytes = getattr(preds, "nbytes", None)
+    if nbytes is not None:
+        return nbytes
+    size = len(preds) * (_DICT_ITEM_BYTES + _LIST_BYTES)
+    size += sum(map(len, preds.values())) * _PTR_BYTES
+    for m in maps:
+        size += len(m) * _DICT_ITEM_BYTES
+    return size
+
+
+def path_bytes(path) -> int:
+    """Estimate the footprint of a cached node path."""
+    return _LIST_BYTES + len(path) * _PTR_BYTES
+
+
+class RouteCache:
+    """
+    LRU mapping with optional entry / byte budget.
+
+    Parameters
+    ----------
+    name : str
+        Label reported in stats().
+    max_entries : int | None
+        Evict least-recently-used entries beyond this count.
+    max_bytes : int | None
+        Evict least-recently-used entries beyond this estimated size.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> None:
+        self.name = name
+        self.max_entries = _default_max_entries if max_entries is None else max_entries
+        self.max_bytes = _default_max_bytes if max_bytes is None else max_bytes
+
+        self._data = OrderedDict()
+        self._sizes = {}
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # ------------------------
+    # mapping API
+    # ------------------------
+
+    def get(self, key: Hashable):
+        """Return the cached value (refreshing recency) or None on a miss."""
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value, nbytes: int = 0) -> None:
+        """Insert value with its estimated size, evicting LRU entries if over budget."""
+        if key in self._data:
+            self.bytes -= self._sizes[key]
+        self._data[key] = value
+        self._data.move_to_end(key)
+        self._sizes[key] = nbytes
+        self.bytes += nbytes
+        self._evict(keep=key)
+
+    def pop(self, key: Hashable) -> None:
+        if key in self._data:
+            del self._data[key]
+            self.bytes -= self._sizes.pop(key)
+
+    def clear(self) -> None:
+        """Drop everything (routing weights changed); not counted as eviction."""
+        if self._data:
+            self.invalidations += 1
+        self._data.clear()
+        self._sizes.clear()
+        self.bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def keys(self):
+        return self._data.keys()
+
+    def items(self):
+        return self._data.items()
+
+    # ------------------------
+    # eviction
+    # ------------------------
+
+    def _over_budget(self) -> bool:
+        if self.max_entries is not None and len(self._data) > self.max_entries:
+            return True
+        if self.max_bytes is not None and self.bytes > self.max_bytes:
+            return True
+        return False
+
+    def _evict(self, keep: Hashable) -> None:
+        # Never evict the entry that was just inserted: the caller is
+        # about to use it, even if it alone exceeds the budget.
+        while self._over_budget() and len(self._data) > 1:
+            key = next(iter(self._data))
+            if key == keep:
+                break
+            del self._data[key]
+            self.bytes -= self._sizes.pop(key)
+            self.evictions += 1
+
+    # ------------------------
+    # reporting
+    # ------------------------
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def route_cache_stats(routing_schedule: List) -> List[Dict[str, float]]:
+    """Collect stats() of every RouteCache owned by the policies in a schedule."""
+    stats = []
+    for policy in routing_schedule:
+        caches = getattr(policy, "caches", None)
+        if caches is None:
+            cache = getattr(policy, "cache", None)
+            caches = [cache] if cache is not None else []
+        stats.extend(cache.stats() for cache in caches)
+    return stats
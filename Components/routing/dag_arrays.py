@@ -0,0 +1,250 @@
+"""
+dag_arrays.py
+
+Shortest-path DAGs kept in array form.
+
+The compiled Dijkstra (kernels.dijkstra_dag), batched BFS (bfs.py) and
+the on-disk DagStore all produce a source's DAG as index arrays.
+ArrayDag keeps those arrays and exposes the per-node mappings the
+policies read (preds, dist, ECMP count) and the settle order as
+read-only views, so no DAG is rebuilt into per-node dicts: building a
+DAG costs a few vectorised scatters instead of O(nodes) Python, and a
+node's first lookup is one node_index probe and an array slice
+(memoised for the next).
+
+The views compare equal to the dicts of the pure-Python Dijkstra and
+iterate in the same (nondecreasing distance) order. They are read-only;
+link repairs (multipath.link_change_handler) work on a dict copy.
+"""
+
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+
+class ArrayDag:
+    """
+    One source's shortest-path DAG in node-indexed arrays.
+
+    Parameters
+    ----------
+    node_list, node_index : list, dict
+        EpochContext node order.
+    src : node
+        Source node.
+    order : int array
+        Reachable node indices in nondecreasing distance.
+    dist : float64[n]
+        Distance per node index, inf if unreachable.
+    start, end : int[n]
+        Range of each node's predecessors in pred_idx.
+    pred_idx : int array
+        Predecessor node indices.
+    count : int64[n]
+        ECMP path count per node index, 0 if unreachable.
+    """
+
+    __slots__ = (
+        "node_list", "node_index", "src", "order", "dist", "start", "end", "pred_idx", "count",
+        "preds", "distances", "counts", "nodes",
+    )
+
+    def __init__(self, node_list, node_index, src, order, dist, start, end, pred_idx, count) -> None:
+        self.node_list = node_list
+        self.node_index = node_index
+        self.src = src
+        self.order = order
+        self.dist = dist
+        self.start = start
+        self.end = end
+        self.pred_idx = pred_idx
+        self.count = count
+
+        self.preds = DagPreds(self)
+        self.distances = DagDist(self)
+        self.counts = DagCounts(self)
+        self.nodes = DagOrder(self)
+
+    @classmethod
+    def from_csr(cls, node_list, node_index, src, dist, order, pred_ptr, pred_idx, count):
+        """From kernels.dijkstra_dag / ecmp_counts (predecessors in node-indexed CSR)."""
+        return cls(node_list, node_index, src, order, dist, pred_ptr[:-1], pred_ptr[1:], pred_idx, count)
+
+    @classmethod
+    def from_rows(cls, node_list, node_index, src, order, dist, count, npred, pred_idx):
+        """From the DagStore / batch_bfs layout (one row per reachable node)."""
+        n = len(node_list)
+        order = np.asarray(order, dtype=np.int64)
+        ends = np.cumsum(npred, dtype=np.int64)
+
+        start = np.zeros(n, dtype=np.int64)
+        end = np.zeros(n, dtype=np.int64)
+        start[order] = ends - npred
+        end[order] = ends
+
+        full_dist = np.full(n, np.inf)
+        full_dist[order] = dist
+        full_count = np.zeros(n, dtype=np.int64)
+        full_count[order] = count
+        return cls(node_list, node_index, src, order, full_dist, start, end, np.asarray(pred_idx), full_count)
+
+    def rows(self):
+        """(order, dist, count, npred, pred_idx) in the DagStore layout."""
+        order = self.order
+        start = self.start[order]
+        npred = self.end[order] - start
+
+        # gather each row's predecessor slice, rows in settle order
+        total = int(npred.sum())
+        offset = np.cumsum(npred) - npred
+        take = np.repeat(start - offset, npred) + np.arange(total)
+
+        return (
+            order.astype(np.int32),
+            self.dist[order],
+            self.count[order],
+            npred.astype(np.int32),
+            np.asarray(self.pred_idx)[take].astype(np.int32),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            a.nbytes for a in (self.order, self.dist, self.start, self.end, self.pred_idx, self.count)
+        )
+
+
+# ---------------------------------------
+# Views
+# ---------------------------------------
+
+_MISSING = object()
+
+
+class _NodeMap(Mapping):
+    """
+    Read-only node -> value mapping over an ArrayDag's rows.
+
+    Values are built from the arrays on first lookup and memoised, so a
+    DAG costs Python objects only for the nodes the policies touch.
+    """
+
+    __slots__ = ("_dag", "_memo")
+
+    def __init__(self, dag: ArrayDag) -> None:
+        self._dag = dag
+        self._memo = {}
+
+    def _has(self, i: int) -> bool:
+        return self._dag.dist[i] < np.inf
+
+    def _value(self, i: int):
+        raise NotImplementedError
+
+    def _rows(self) -> np.ndarray:
+        return self._dag.order
+
+    def _lookup(self, node):
+        i = self._dag.node_index.get(node)
+        if i is None or not self._has(i):
+            return _MISSING
+        value = self._memo[node] = self._value(i)
+        return value
+
+    def __getitem__(self, node):
+        value = self._memo.get(node, _MISSING)
+        if value is _MISSING:
+            value = self._lookup(node)
+            if value is _MISSING:
+                raise KeyError(node)
+        return value
+
+    def get(self, node, default=None):
+        value = self._memo.get(node, _MISSING)
+        if value is _MISSING:
+            value = self._lookup(node)
+            if value is _MISSING:
+                return default
+        return value
+
+    def __contains__(self, node) -> bool:
+        return node in self._memo or self._lookup(node) is not _MISSING
+
+    def __iter__(self):
+        nodes = self._dag.node_list
+        return (nodes[i] for i in self._rows().tolist())
+
+    def __len__(self) -> int:
+        return len(self._rows())
+
+    @property
+    def nbytes(self) -> int:
+        """Footprint of the whole DAG's arrays (every view shares them)."""
+        return self._dag.nbytes
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self)} nodes from {self._dag.src!r})"
+
+
+class DagPreds(_NodeMap):
+    """node -> predecessor list (settle order), for every reachable node; do not mutate the lists."""
+
+    __slots__ = ()
+
+    def _value(self, i):
+        dag = self._dag
+        nodes = dag.node_list
+        return [nodes[j] for j in dag.pred_idx[dag.start[i]:dag.end[i]].tolist()]
+
+
+class DagDist(_NodeMap):
+    """node -> distance from the source, for every reachable node."""
+
+    __slots__ = ()
+
+    def _value(self, i):
+        return float(self._dag.dist[i])
+
+
+class DagCounts(_NodeMap):
+    """node -> ECMP path count, for nodes with at least one path."""
+
+    __slots__ = ("_nonzero",)
+
+    def __init__(self, dag: ArrayDag) -> None:
+        super().__init__(dag)
+        self._nonzero = None
+
+    def _has(self, i):
+        return self._dag.count[i] > 0
+
+    def _value(self, i):
+        return int(self._dag.count[i])
+
+    def _rows(self):
+        if self._nonzero is None:
+            order = self._dag.order
+            self._nonzero = order[self._dag.count[order] > 0]
+        return self._nonzero
+
+
+class DagOrder(Sequence):
+    """Reachable nodes in nondecreasing distance."""
+
+    __slots__ = ("_dag",)
+
+    def __init__(self, dag: ArrayDag) -> None:
+        self._dag = dag
+
+    def __getitem__(self, i):
+        nodes = self._dag.node_list
+        if isinstance(i, slice):
+            return [nodes[j] for j in self._dag.order[i].tolist()]
+        return nodes[int(self._dag.order[i])]
+
+    def __len__(self) -> int:
+        return len(self._dag.order)
+
+    def __iter__(self):
+        nodes = self._dag.node_list
+        return (nodes[i] for i in self._dag.order.tolist())
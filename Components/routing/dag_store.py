@@ -0,0 +1,305 @@
+"""
+dag_store.py
+
+Persistent on-disk store of static-weight shortest-path DAGs.
+
+With hop (or latency) weights the per-source DAGs and ECMP counts of a
+topology never change, yet every run recomputes them on its first
+epoch. A DagStore keeps them on disk per (topology content hash, weight
+builder); ShortestPathEngine looks a source up before running Dijkstra
+and records the DAGs it computes. Later runs on the same topology load
+DAGs lazily, one source at a time, from memory-mapped arrays, as
+ArrayDag views (dag_arrays.py).
+
+Only builders marked `static = True` (weights.py) are stored, and the
+store is bypassed while any link is down. Enable with configure(dir)
+(main.py --dag-store DIR) before policies are built.
+
+On-disk layout, one directory per (topology, builder):
+
+    CURRENT                  name of the live generation
+    LOCK                     held (fcntl) by the process flushing
+    g_<pid>_<ns>/sources.npy (S,)    source node index
+                 node_off.npy (S+1,) row range of each source below
+                 order.npy    (R,)   reachable nodes, nondecreasing distance
+                 dist.npy     (R,)   distance of each row
+                 count.npy    (R,)   ECMP path count of each row
+                 npred.npy    (R,)   number of predecessors of each row
+                 pred_off.npy (S+1,) range of each source in pred_idx
+                 pred_idx.npy (P,)   predecessor node indices, row by row
+
+flush() writes a new generation and swaps CURRENT atomically, so
+concurrent readers never see a partial store. Writers are concurrent
+too (epoch-parallel workers, queue workers sharing --dag-store): a
+flush holds LOCK, re-reads CURRENT and writes that generation's sources
+plus its own new ones, then removes every generation but the new one.
+No writer's DAGs are lost, and generations left behind by crashed
+writers go with the next flush.
+"""
+
+import contextlib
+import fcntl
+import hashlib
+import os
+import shutil
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from Components.routing.dag_arrays import ArrayDag
+
+ARRAYS = ("sources", "node_off", "order", "dist", "count", "npred", "pred_off", "pred_idx")
+
+# counts are stored as int64; larger (Python int) counts are not stored
+_MAX_COUNT = 2 ** 62
+
+_directory: Optional[str] = None
+_stores: Dict[Tuple[str, str, str], "DagStore"] = {}
+
+
+def configure(directory: Optional[str] = None) -> None:
+    """Store static DAGs under `directory` for engines built after this call (None = off)."""
+    global _directory
+    flush_all()
+    _directory = directory
+    _stores.clear()
+
+
+def context_hash(ctx) -> str:
+    """
+    Digest of an EpochContext's graph: node and edge order (DAGs are
+    stored by node index), capacity and latency.
+    """
+    h = hashlib.sha1()
+    h.update(repr(ctx.node_list).encode())
+    h.update(b"\n--\n")
+    h.update(repr(ctx.edge_list).encode())
+    h.update(np.ascontiguousarray(ctx.capacity, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(ctx.latency, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+def open_store(ctx, weight_builder) -> Optional["DagStore"]:
+    """The shared store for (ctx's topology, weight_builder), or None if not applicable."""
+    if _directory is None or not getattr(weight_builder, "static", False):
+        return None
+
+    key = (_directory, context_hash(ctx), weight_builder.__name__)
+    store = _stores.get(key)
+    if store is None:
+        path = os.path.join(_directory, f"{key[1][:16]}_{key[2]}")
+        store = _stores[key] = DagStore(path, ctx.node_list, ctx.node_index)
+    return store
+
+
+def flush_all() -> None:
+    """Write every open store that has new DAGs."""
+    for store in _stores.values():
+        store.flush()
+
+
+def dag_store_stats() -> List[Dict]:
+    return [store.stats() for store in _stores.values()]
+
+
+def _counts(preds, src, order) -> Dict:
+    count = {src: 1}
+    for n in order:
+        if n == src:
+            continue
+        total = 0
+        for p in preds.get(n, ()):
+            total += count.get(p, 0)
+        if total > 0:
+            count[n] = total
+    return count
+
+
+class DagStore:
+    """
+    DAGs of one (topology, weight builder), loaded lazily from `path`.
+
+    Parameters
+    ----------
+    path : str
+        Store directory (created on first flush).
+    node_list, node_index : list, dict
+        EpochContext node order; stored DAGs refer to nodes by index.
+    """
+
+    def __init__(self, path: str, node_list: List, node_index: Dict) -> None:
+        self.path = path
+        self.node_list = node_list
+        self.node_index = node_index
+
+        self._arrays: Optional[Dict[str, np.ndarray]] = None
+        self._generation: Optional[str] = None
+        self._rows: Dict[int, int] = {}
+        self._new: Dict[int, Tuple] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    # ---------------------------------------
+    # Loading
+    # ---------------------------------------
+
+    def _load(self) -> None:
+        self._arrays = {}
+        self._rows = {}
+        try:
+            with open(os.path.join(self.path, "CURRENT")) as f:
+                name = f.read().strip()
+            gen = os.path.join(self.path, name)
+            arrays = {key: np.load(os.path.join(gen, f"{key}.npy"), mmap_mode="r") for key in ARRAYS}
+        except (OSError, ValueError):
+            # no store yet, or a generation removed under us: start empty
+            self._generation = None
+            return
+        self._arrays = arrays
+        self._generation = name
+        self._rows = {int(s): i for i, s in enumerate(arrays["sources"].tolist())}
+
+    def __len__(self) -> int:
+        if self._arrays is None:
+            self._load()
+        return len(self._rows) + sum(1 for s in self._new if s not in self._rows)
+
+    def get(self, src) -> Optional[ArrayDag]:
+        """The stored DAG of `src`, or None."""
+        if self._arrays is None:
+            self._load()
+
+        s = self.node_index[src]
+        new = self._new.get(s)
+        if new is not None:
+            self.hits += 1
+            return self._unpack(src, *new)
+
+        i = self._rows.get(s)
+        if i is None:
+            self.misses += 1
+            return None
+
+        a = self._arrays
+        lo, hi = int(a["node_off"][i]), int(a["node_off"][i + 1])
+        plo, phi = int(a["pred_off"][i]), int(a["pred_off"][i + 1])
+        self.hits += 1
+        return self._unpack(
+            src, a["order"][lo:hi], a["dist"][lo:hi], a["count"][lo:hi], a["npred"][lo:hi], a["pred_idx"][plo:phi]
+        )
+
+    def _unpack(self, src, order_idx, dist_arr, count_arr, npred, pred_idx):
+        return ArrayDag.from_rows(self.node_list, self.node_index, src, order_idx, dist_arr, count_arr, npred, pred_idx)
+
+    # ---------------------------------------
+    # Recording
+    # ---------------------------------------
+
+    def put(self, src, preds: Dict, dist: Dict, order: List, count: Optional[Dict] = None) -> None:
+        """Record a freshly computed DAG (count is derived if not given)."""
+        if count is None:
+            count = _counts(preds, src, order)
+        if count and max(count.values()) >= _MAX_COUNT:
+            return
+
+        index = self.node_index
+        self._new[index[src]] = (
+            np.fromiter((index[n] for n in order), dtype=np.int32, count=len(order)),
+            np.fromiter((dist[n] for n in order), dtype=np.float64, count=len(order)),
+            np.fromiter((count.get(n, 0) for n in order), dtype=np.int64, count=len(order)),
+            np.fromiter((len(preds.get(n, ())) for n in order), dtype=np.int32, count=len(order)),
+            np.fromiter((index[p] for n in order for p in preds.get(n, ())), dtype=np.int32),
+        )
+
+    def put_dag(self, dag: ArrayDag) -> None:
+        """Record a freshly computed array DAG."""
+        if len(dag.order) and int(dag.count.max()) >= _MAX_COUNT:
+            return
+        self._new[self.node_index[dag.src]] = dag.rows()
+
+    @contextlib.contextmanager
+    def _locked(self):
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, "LOCK"), "a") as f:
+            fcntl.lockf(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.lockf(f, fcntl.LOCK_UN)
+
+    def flush(self) -> None:
+        """Write current + new DAGs as a new generation and make it current."""
+        if not any(s not in self._rows for s in self._new):
+            self._new.clear()
+            return
+
+        with self._locked():
+            # other writers may have flushed since this store loaded
+            self._load()
+            new = {s: v for s, v in self._new.items() if s not in self._rows}
+            if new:
+                self._write(new)
+                self._load()
+            self._new.clear()
+
+    def _write(self, new: Dict[int, Tuple]) -> None:
+        # caller holds the lock; self._arrays is the current generation
+        parts = {name: [] for name in ("order", "dist", "count", "npred", "pred_idx")}
+        sources = []
+        a = self._arrays or {}
+        if a:
+            sources.append(np.asarray(a["sources"], dtype=np.int64))
+            for name in parts:
+                parts[name].append(np.asarray(a[name]))
+            node_off = [np.asarray(a["node_off"], dtype=np.int64)]
+            pred_off = [np.asarray(a["pred_off"], dtype=np.int64)]
+        else:
+            node_off = [np.zeros(1, dtype=np.int64)]
+            pred_off = [np.zeros(1, dtype=np.int64)]
+
+        rows, preds = int(node_off[0][-1]), int(pred_off[0][-1])
+        for s, (order, dist, count, npred, pred_idx) in new.items():
+            sources.append(np.array([s], dtype=np.int64))
+            for name, arr in zip(parts, (order, dist, count, npred, pred_idx)):
+                parts[name].append(arr)
+            rows += len(order)
+            preds += len(pred_idx)
+            node_off.append(np.array([rows], dtype=np.int64))
+            pred_off.append(np.array([preds], dtype=np.int64))
+
+        arrays = {name: np.concatenate(chunks) for name, chunks in parts.items()}
+        arrays["sources"] = np.concatenate(sources)
+        arrays["node_off"] = np.concatenate(node_off)
+        arrays["pred_off"] = np.concatenate(pred_off)
+
+        name = f"g_{os.getpid()}_{time.time_ns()}"
+        gen = os.path.join(self.path, name)
+        os.makedirs(gen)
+        for key, arr in arrays.items():
+            np.save(os.path.join(gen, f"{key}.npy"), arr)
+
+        tmp = os.path.join(self.path, f"CURRENT.{name}")
+        with open(tmp, "w") as f:
+            f.write(name)
+        os.replace(tmp, os.path.join(self.path, "CURRENT"))
+
+        # every superseded or orphaned generation; readers that still map one keep their pages
+        for entry in os.listdir(self.path):
+            if entry == name:
+                continue
+            if entry.startswith("g_"):
+                with contextlib.suppress(OSError):
+                    shutil.rmtree(os.path.join(self.path, entry))
+            elif entry.startswith("CURRENT."):
+                with contextlib.suppress(OSError):
+                    os.remove(os.path.join(self.path, entry))
+
+    def stats(self) -> Dict:
+        return {
+            "name": os.path.basename(self.path),
+            "sources": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
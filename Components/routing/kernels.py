@@ -0,0 +1,164 @@
+"""
+kernels.py
+
+Optional compiled kernels for the innermost simulator loops, and the
+backend switch shared by every kernel module.
+
+The routing kernels here operate on the CSR / int-array form of
+EpochContext (indptr, indices, adj_eids); the epoch kernels of
+run_epoch live in Simulation/kernels.py. Both are compiled with Numba's
+@njit when Numba is installed. They reproduce the pure-Python
+implementations step for step (same heap tie-breaking, same summation
+order), so a run gives identical results with either backend.
+
+Enable with set_backend("numba") (main.py --kernels numba). When Numba
+is missing the simulator falls back to the pure-Python code paths.
+"""
+
+import heapq
+import warnings
+
+import numpy as np
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    numba = None
+    NUMBA_AVAILABLE = False
+
+
+def njit(fn):
+    """numba.njit(cache=True) when available, identity otherwise."""
+    if NUMBA_AVAILABLE:
+        return numba.njit(cache=True)(fn)
+    return fn
+
+
+BACKENDS = ("python", "numba")
+
+_backend = "python"
+_interpreted = False
+
+
+def set_backend(name: str, allow_interpreted: bool = False) -> str:
+    """
+    Select "python" or "numba"; returns the backend actually in use.
+
+    allow_interpreted runs the array kernels as plain Python when Numba
+    is absent (slow, only useful for parity checks).
+    """
+    global _backend, _interpreted
+
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown kernel backend: {name}")
+
+    if name == "numba" and not NUMBA_AVAILABLE and not allow_interpreted:
+        warnings.warn("numba is not installed; falling back to pure-Python kernels")
+        name = "python"
+
+    _backend = name
+    _interpreted = name == "numba" and not NUMBA_AVAILABLE
+    return _backend
+
+
+def enabled() -> bool:
+    """True when the array kernels should be used."""
+    return _backend == "numba"
+
+
+def backend() -> str:
+    if _interpreted:
+        return "numba(interpreted)"
+    return _backend
+
+# ---------------------------------------
+# Routing kernels
+# ---------------------------------------
+
+@njit
+def dijkstra_dag(indptr, indices, adj_eids, weights, edge_up, src, eps):
+    """
+    Shortest-path DAG from node index src.
+
+    Returns
+    -------
+    dist : float64[n]      inf for unreachable nodes
+    order : int64[m]       settled nodes in nondecreasing distance
+    pred_ptr : int64[n+1]  CSR offsets of predecessor lists
+    pred_idx : int64[p]    predecessors, each list in settle order
+    """
+    n = len(indptr) - 1
+    dist = np.full(n, np.inf)
+    order = np.empty(n, dtype=np.int64)
+    n_order = 0
+
+    dist[src] = 0.0
+    heap = [(0.0, 0, src)]
+    counter = 1
+
+    while len(heap) > 0:
+        d, _, u = heapq.heappop(heap)
+
+        if d > dist[u] + eps:
+            continue
+
+        order[n_order] = u
+        n_order += 1
+
+        for k in range(indptr[u], indptr[u + 1]):
+            e = adj_eids[k]
+            if not edge_up[e]:
+                continue
+            v = indices[k]
+            nd = d + weights[e]
+            if nd < dist[v] - eps:
+                dist[v] = nd
+                heapq.heappush(heap, (nd, counter, v))
+                counter += 1
+
+    order = order[:n_order]
+
+    # predecessor lists in settle order of the predecessor
+    pred_ptr = np.zeros(n + 1, dtype=np.int64)
+    for i in range(n_order):
+        u = order[i]
+        for k in range(indptr[u], indptr[u + 1]):
+            e = adj_eids[k]
+            v = indices[k]
+            if edge_up[e] and v != src and abs(dist[u] + weights[e] - dist[v]) <= eps:
+                pred_ptr[v + 1] += 1
+
+    for v in range(n):
+        pred_ptr[v + 1] += pred_ptr[v]
+
+    pred_idx = np.empty(pred_ptr[n], dtype=np.int64)
+    fill = pred_ptr[:n].copy()
+    for i in range(n_order):
+        u = order[i]
+        for k in range(indptr[u], indptr[u + 1]):
+            e = adj_eids[k]
+            v = indices[k]
+            if edge_up[e] and v != src and abs(dist[u] + weights[e] - dist[v]) <= eps:
+                pred_idx[fill[v]] = u
+                fill[v] += 1
+
+    return dist, order, pred_ptr, pred_idx
+
+
+@njit
+def ecmp_counts(pred_ptr, pred_idx, order, src):
+    """Number of shortest paths from src to every node (0 if unreachable)."""
+    count = np.zeros(len(pred_ptr) - 1, dtype=np.int64)
+    count[src] = 1
+
+    for i in range(len(order)):
+        u = order[i]
+        if u == src:
+            continue
+        total = 0
+        for k in range(pred_ptr[u], pred_ptr[u + 1]):
+            total += count[pred_idx[k]]
+        count[u] = total
+
+    return count
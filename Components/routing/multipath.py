@@ -1,6 +1,13 @@
 import global_randoms
 import heapq
 import itertools
+import time
+
+import numpy as np
+
+from Components.routing import bfs, dag_store, kernels, search
+from Components.routing.cache import RouteCache, dag_bytes, path_bytes
+from Components.routing.dag_arrays import ArrayDag, DagPreds
 
 
 class ShortestPathEngine:
@@ -9,13 +16,36 @@ class ShortestPathEngine:
         self.ctx = ctx
         self.weight_fn = weight_builder(ctx)
         self.rel_threshold = rel_threshold
+        # weights fixed for a topology: DAGs do not depend on the epoch
+        self.static = getattr(weight_builder, "static", False)
 
         self.last_w = {}
         self.changed = False
         self.epoch_initialized = False
 
+        # per-edge weight vector for the compiled kernels, rebuilt each epoch
+        self._weights = None
+
+        # Dijkstra accounting (recovery cost / telemetry)
+        self.dag_calls = 0
+        self.dag_seconds = 0.0
+
+        # on-disk DAGs for static weights (None unless dag_store is configured)
+        self.store = dag_store.open_store(ctx, weight_builder)
+
+        # targeted search (search.py): destinations per source this epoch,
+        # sources whose latest DAG stops short, ALT landmarks
+        self.targets = {}
+        self.partial = set()
+        self._landmarks = None
+
+        # epoch-parallel segments: source -> (congestion, stale_congestion)
+        # its next DAG is computed under (see pin)
+        self.pins = {}
+
     def epoch_tick(self):
         changed = False
+        self._weights = None
 
         for eid in range(len(self.ctx.edge_list)):
             w = self.weight_fn(eid)
@@ -32,14 +62,131 @@ class ShortestPathEngine:
 
         self.changed = changed
         self.epoch_initialized = True
+        if changed:
+            self._landmarks = None
+
+    def pin(self, src, congestion, stale_congestion):
+        """
+        Compute src's next DAG under these congestion snapshots.
+
+        An epoch-parallel segment that starts between two cache clears
+        continues with DAGs the serial loop computed in earlier epochs;
+        pinning recreates them on first use. Only meaningful in full
+        search mode with unbounded route caches, where a cached DAG is
+        never recomputed before the next clear.
+        """
+        self.pins[src] = (congestion, stale_congestion)
+
+    def _pinned(self, compute, src, *args):
+        ctx = self.ctx
+        congestion, stale = self.pins.pop(src)
+        now = ctx.congestion.copy(), ctx.stale_congestion.copy()
+        ctx.congestion[:] = congestion
+        ctx.stale_congestion[:] = stale
+        self._weights = None
+        try:
+            return compute(src, *args)
+        finally:
+            ctx.congestion[:], ctx.stale_congestion[:] = now
+            self._weights = None
+
+    def prepare(self, pairs):
+        """Record this epoch's (src, dst) pairs for targeted searches (no-op in full mode)."""
+        if search.mode() == "full":
+            return
+        targets = {}
+        for src, dst in pairs:
+            targets.setdefault(src, set()).add(dst)
+        self.targets = targets
+
+    def _search_targets(self, src, dst):
+        # None: settle the whole graph
+        if search.mode() == "full":
+            return None
+        targets = self.targets.get(src)
+        if dst is not None and (targets is None or dst not in targets):
+            targets = self.targets[src] = (targets or set()) | {dst}
+        return targets
+
+    def _targeted(self, src, targets, eps):
+        t0 = time.perf_counter()
+        ctx = self.ctx
+
+        bound = slack = None
+        if search.mode() == "alt":
+            w = self._weight_vector()
+            if self._landmarks is None:
+                self._landmarks = search.Landmarks(ctx, w, search.landmark_count())
+            lm = self._landmarks
+            bound = lm.bounds([ctx.node_index[t] for t in targets], lm.scale(w))
+            slack = lm.tolerance
+
+        preds, dist, order, complete = search.targeted_dijkstra(
+            ctx.adj, ctx.edge_up, self.weight_fn, src, targets, eps,
+            bound=bound, index=ctx.node_index, slack=slack or 0.0,
+        )
+        if not complete:
+            self.partial.add(src)
+
+        self.dag_calls += 1
+        self.dag_seconds += time.perf_counter() - t0
+        return preds, dist, order, complete
 
     # -------------------------------------------------
     # Optimised Dijkstra
     # Returns order in nondecreasing distance
     # -------------------------------------------------
-    def compute_dag(self, src, eps=1e-12):
+    def compute_dag(self, src, eps=1e-12, dst=None):
+        """
+        Shortest-path DAG from src: (preds, dist, order).
+
+        Outside full search mode the DAG may stop once this epoch's
+        destinations of src (and dst, if given) are settled; src is then
+        in self.partial. DAGs from the compiled kernels or the store are
+        array-backed read-only views (dag_arrays.py).
+        """
+        if src in self.pins:
+            return self._pinned(self.compute_dag, src, eps, dst)
+        self.partial.discard(src)
+
+        dag = self._stored(src)
+        if dag is not None:
+            return dag.preds, dag.distances, dag.nodes
+
+        targets = self._search_targets(src, dst)
+        if targets is not None:
+            preds, dist, order, complete = self._targeted(src, targets, eps)
+            if complete:
+                self._remember(src, preds, dist, order)
+            return preds, dist, order
+
+        if kernels.enabled():
+            dag = self._compute_dag_compiled(src, eps)
+            return dag.preds, dag.distances, dag.nodes
+
+        preds, dist, order = self._dijkstra(src, eps)
+        self._remember(src, preds, dist, order)
+        return preds, dist, order
+
+    def _stored(self, src):
+        # stored DAGs assume every link is up
+        if self.store is None or not self.ctx.edge_up.all():
+            return None
+        return self.store.get(src)
+
+    def _remember(self, src, preds, dist, order, count=None):
+        if self.store is not None and self.ctx.edge_up.all():
+            self.store.put(src, preds, dist, order, count)
 
+    def _remember_dag(self, dag):
+        if self.store is not None and self.ctx.edge_up.all():
+            self.store.put_dag(dag)
+
+    def _dijkstra(self, src, eps):
+
+        t0 = time.perf_counter()
         counter = itertools.count()
+        up = self.ctx.edge_up
 
         dist = {src: 0.0}
         preds = {src: []}
@@ -56,6 +203,8 @@ class ShortestPathEngine:
             order.append(u)
 
             for v, eid in self.ctx.adj[u]:
+                if not up[eid]:
+                    continue
                 nd = d + self.weight_fn(eid)
                 old = dist.get(v)
 
@@ -67,8 +216,394 @@ class ShortestPathEngine:
                 elif abs(nd - old) <= eps:
                     preds[v].append(u)
 
+        self.dag_calls += 1
+        self.dag_seconds += time.perf_counter() - t0
         return preds, dist, order
 
+    def _weight_vector(self):
+        if self._weights is None:
+            n = len(self.ctx.edge_list)
+            self._weights = np.fromiter(
+                (self.weight_fn(eid) for eid in range(n)), dtype=np.float64, count=n
+            )
+        return self._weights
+
+    def _compute_dag_compiled(self, src, eps):
+        # DAG and ECMP counts stay in the kernels' arrays (ArrayDag views)
+        t0 = time.perf_counter()
+        ctx = self.ctx
+        s = ctx.node_index[src]
+        dist, order, pred_ptr, pred_idx = kernels.dijkstra_dag(
+            ctx.indptr, ctx.indices, ctx.adj_eids,
+            self._weight_vector(), ctx.edge_up, s, eps,
+        )
+        count = kernels.ecmp_counts(pred_ptr, pred_idx, order, s)
+        dag = ArrayDag.from_csr(ctx.node_list, ctx.node_index, src, dist, order, pred_ptr, pred_idx, count)
+        self.dag_calls += 1
+        self.dag_seconds += time.perf_counter() - t0
+        self._remember_dag(dag)
+        return dag
+
+    def compute_counts(self, src, dst=None):
+        """
+        Shortest-path DAG plus ECMP path counts from src.
+
+        Returns (preds, count); count holds only nodes with at least one
+        path, inserted in nondecreasing distance. As with compute_dag,
+        the DAG may be partial outside full search mode.
+        """
+        if src in self.pins:
+            return self._pinned(self.compute_counts, src, dst)
+        self.partial.discard(src)
+
+        dag = self._stored(src)
+        if dag is not None:
+            return dag.preds, dag.counts
+
+        targets = self._search_targets(src, dst)
+        if targets is not None:
+            preds, dist, order, complete = self._targeted(src, targets, 1e-12)
+            count = _recount(preds, src, order)
+            if complete:
+                self._remember(src, preds, dist, order, count)
+            return preds, count
+
+        if kernels.enabled():
+            dag = self._compute_dag_compiled(src, 1e-12)
+            return dag.preds, dag.counts
+
+        preds, dist, order = self._dijkstra(src, 1e-12)
+
+        count = {src: 1}
+        for n in order:
+            if n == src:
+                continue
+
+            total = 0
+            for p in preds.get(n, []):
+                total += count.get(p, 0)
+
+            if total > 0:
+                count[n] = total
+
+        self._remember(src, preds, dist, order, count)
+        return preds, count
+
+
+class HopCountEngine(ShortestPathEngine):
+    """
+    ShortestPathEngine for unit weights, computing DAGs in BFS batches.
+
+    On a miss, one bfs.batch_bfs computes the requested source together
+    with this epoch's other sources (from prepare) not computed since
+    the last link change; later requests of the epoch for those sources
+    are served from the batch. Results equal the per-source search.
+    """
+
+    def __init__(self, ctx, weight_builder, rel_threshold=0.05):
+        super().__init__(ctx, weight_builder, rel_threshold)
+
+        # this epoch's sources in first-flow order, DAG arrays computed
+        # but not handed out yet, sources computed under the current links
+        self.sources = {}
+        self._batch = {}
+        self._computed = set()
+        self._up = ctx.edge_up.copy()
+
+    def prepare(self, pairs):
+        pairs = list(pairs)
+        super().prepare(pairs)
+        self.sources = dict.fromkeys(src for src, _ in pairs)
+        self._batch.clear()
+
+    def _bfs_dag(self, src):
+        # ArrayDag, or None to use the per-source search
+        self.partial.discard(src)
+
+        dag = self._stored(src)
+        if dag is not None:
+            return dag
+
+        ctx = self.ctx
+        if not np.array_equal(self._up, ctx.edge_up):
+            self._batch.clear()
+            self._computed.clear()
+            self._up = ctx.edge_up.copy()
+
+        arrays = self._batch.pop(src, None)
+        if arrays is None:
+            size = bfs.batch_size(len(ctx.node_list))
+            if not size:
+                return None
+
+            batch = [src]
+            for s in self.sources:
+                if len(batch) == size:
+                    break
+                if s != src and s not in self._computed and s not in self._batch:
+                    batch.append(s)
+
+            t0 = time.perf_counter()
+            result = bfs.batch_bfs(
+                ctx.indptr, ctx.indices, ctx.adj_eids, ctx.edge_up,
+                [ctx.node_index[s] for s in batch],
+            )
+            if result is None:
+                return None
+            self.dag_calls += len(batch)
+            self.dag_seconds += time.perf_counter() - t0
+
+            self._batch.update(zip(batch[1:], result[1:]))
+            self._computed.update(batch)
+            arrays = result[0]
+
+        dag = ArrayDag.from_rows(ctx.node_list, ctx.node_index, src, *arrays)
+        self._remember_dag(dag)
+        return dag
+
+    def compute_dag(self, src, eps=1e-12, dst=None):
+        dag = self._bfs_dag(src)
+        if dag is None:
+            return super().compute_dag(src, eps, dst)
+        return dag.preds, dag.distances, dag.nodes
+
+    def compute_counts(self, src, dst=None):
+        dag = self._bfs_dag(src)
+        if dag is None:
+            return super().compute_counts(src, dst)
+        return dag.preds, dag.counts
+
+
+def make_engine(ctx, weight_builder, rel_threshold=0.05):
+    """HopCountEngine for unit weights (unless BFS batching is off), ShortestPathEngine otherwise."""
+    if getattr(weight_builder, "unit", False) and bfs.batch_size(len(ctx.node_list)):
+        return HopCountEngine(ctx, weight_builder, rel_threshold)
+    return ShortestPathEngine(ctx, weight_builder, rel_threshold)
+
+
+# =====================================================
+# Incremental repair after link up/down events
+# =====================================================
+
+def _recount(preds, src, order=None):
+    """
+    ECMP path counts over an existing predecessor DAG.
+
+    `order` may be any topological order of the DAG nodes (the insertion
+    order of a previous count dict is one); without it counts are
+    resolved by a memoised depth-first walk.
+    """
+    count = {src: 1}
+
+    if order is not None:
+        for n in order:
+            if n == src:
+                continue
+            total = 0
+            for p in preds.get(n, ()):
+                total += count.get(p, 0)
+            if total > 0:
+                count[n] = total
+        return count
+
+    for start in preds:
+        if start in count:
+            continue
+        stack = [start]
+        while stack:
+            n = stack[-1]
+            pending = [p for p in preds.get(n, ()) if p not in count]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            if n not in count:
+                count[n] = sum(count[p] for p in preds.get(n, ()))
+
+    return {n: c for n, c in count.items() if c > 0}
+
+
+def _distance_sorted(count, preds, src, weight_fn, edge_id):
+    """Reorder a topologically ordered count dict by distance from src."""
+    dist = {src: 0.0}
+    for n in count:
+        if n != src:
+            p = preds[n][0]
+            dist[n] = dist[p] + weight_fn(edge_id[(p, n)])
+    return dict(sorted(count.items(), key=lambda item: dist[item[0]]))
+
+
+def _chain_dist(preds, node, src, weight_fn, edge_id):
+    """Distance of node along its first-predecessor chain, None if unreachable."""
+    d = 0.0
+    while node != src:
+        ps = preds.get(node)
+        if not ps:
+            return None
+        p = ps[0]
+        d += weight_fn(edge_id[(p, node)])
+        node = p
+    return d
+
+
+def _repair_dag(preds, src, down_pairs, up_edges, weight_fn, ctx, eps=1e-9):
+    """
+    Patch one source's DAG in place.
+
+    Nodes left without any working link are detached from the DAG and
+    re-attached through their best neighbours when links come back.
+    Returns None if the DAG must be recomputed (a connected node lost all
+    its predecessors or a restored link creates a strictly shorter path),
+    0 if untouched, 1 if predecessors changed but the previous
+    distance order is still topological, 2 if nodes were re-attached.
+    """
+    adj = ctx.adj
+    up = ctx.edge_up
+    edge_id = ctx.edge_id
+    changed = 0
+
+    def dist(node):
+        return _chain_dist(preds, node, src, weight_fn, edge_id)
+
+    for a, b in down_pairs:
+        ps = preds.get(b)
+        if ps and a in ps:
+            ps = [p for p in ps if p != a]
+            if not ps:
+                if any(up[eid] for _, eid in adj[b]):
+                    return None
+                del preds[b]
+            else:
+                preds[b] = ps
+            changed = 1
+
+    batch = {eid for _, _, eid in up_edges}
+    pending = up_edges
+    while pending:
+        deferred = []
+
+        for u, v, eid in pending:
+            du = dist(u)
+            dv = dist(v)
+            if du is None and dv is None:
+                deferred.append((u, v, eid))
+                continue
+
+            if du is None or dv is None:
+                # attach the detached endpoint through its best working links
+                b = u if du is None else v
+                cands = []
+                for n, e in adj[b]:
+                    dn = dist(n) if up[e] else None
+                    if dn is not None:
+                        cands.append((dn + weight_fn(e), n))
+                    elif up[e] and e not in batch:
+                        # b borders a region cut off by an earlier failure
+                        return None
+                best = min(d for d, _ in cands)
+                preds[b] = [n for d, n in cands if abs(d - best) <= eps]
+                du = dist(u)
+                dv = dist(v)
+                changed = 2
+
+            w = weight_fn(eid)
+            for a, da, b, db in ((u, du, v, dv), (v, dv, u, du)):
+                nd = da + w
+                if nd < db - eps:
+                    return None
+                if abs(nd - db) <= eps and a not in preds[b]:
+                    preds[b].append(a)
+                    changed = max(changed, 1)
+
+        if len(deferred) == len(pending):
+            break
+        pending = deferred
+
+    return changed
+
+
+def link_change_handler(route_cache, engine):
+    """
+    Build policy.on_links_changed(down_eids, up_eids) for a route cache
+    holding per-source DAG entries (key src, value preds or (preds, count))
+    and optional per-pair path entries (key (src, dst), value node path).
+
+    DAGs that only lose or gain equal-cost branches are patched in place
+    and their ECMP counts recomputed; only sources whose distances change
+    are dropped and recomputed lazily. Returns (repaired, invalidated).
+    """
+    ctx = engine.ctx
+
+    def on_links_changed(down_eids, up_eids):
+        down_pairs = set()
+        for eid in down_eids:
+            u, v = ctx.edge_list[eid]
+            down_pairs.add((u, v))
+            down_pairs.add((v, u))
+        up_edges = [(*ctx.edge_list[eid], eid) for eid in up_eids]
+
+        repaired = 0
+        invalidated = set()
+
+        for key, value in list(route_cache.items()):
+            if isinstance(key, tuple):
+                continue
+
+            if key in engine.partial:
+                # a targeted DAG cannot tell unexplored nodes from detached ones
+                route_cache.pop(key)
+                invalidated.add(key)
+                continue
+
+            preds = value[0] if isinstance(value, tuple) else value
+            array_backed = isinstance(preds, DagPreds)
+            if array_backed:
+                # array DAGs are read-only: repair a dict copy, kept only if it changed
+                preds = {node: list(ps) for node, ps in preds.items()}
+            status = _repair_dag(preds, key, down_pairs, up_edges, engine.weight_fn, ctx)
+
+            if status is None:
+                route_cache.pop(key)
+                invalidated.add(key)
+            elif status:
+                repaired += 1
+                if isinstance(value, tuple):
+                    # count keys are kept in nondecreasing distance, which
+                    # stays a valid order unless nodes were re-attached
+                    count = value[1]
+                    if status == 1:
+                        fresh = _recount(preds, key, list(count))
+                    else:
+                        fresh = _distance_sorted(_recount(preds, key), preds, key, engine.weight_fn, ctx.edge_id)
+                    if array_backed:
+                        route_cache.put(key, (preds, fresh), dag_bytes(preds, fresh))
+                    else:
+                        count.clear()
+                        count.update(fresh)
+                elif array_backed:
+                    route_cache.put(key, preds, dag_bytes(preds))
+
+        for key, path in list(route_cache.items()):
+            if not isinstance(key, tuple):
+                continue
+            if key[0] in invalidated or (up_edges and key[0] not in route_cache):
+                route_cache.pop(key)
+            elif any(pair in down_pairs for pair in zip(path, path[1:])):
+                route_cache.pop(key)
+
+        return repaired, len(invalidated)
+
+    return on_links_changed
+
+
+def prepare_handler(engine):
+    """Build policy.prepare(flows): hand this epoch's (src, dst) pairs to the engine."""
+
+    def prepare(flows):
+        engine.prepare((flow.src, flow.dst) for flow in flows)
+
+    return prepare
+
 
 # =====================================================
 # NO MULTIPATH
@@ -77,10 +612,10 @@ class ShortestPathEngine:
 def no_multipath(weight_builder, rel_threshold=0.05):
 
     def build(ctx):
-        engine = ShortestPathEngine(ctx, weight_builder, rel_threshold)
+        engine = make_engine(ctx, weight_builder, rel_threshold)
 
         # Cache per source
-        route_cache = {}
+        route_cache = RouteCache(f"no_multipath:{weight_builder.__name__}")
 
         def policy(src, dst):
 
@@ -91,12 +626,11 @@ def no_multipath(weight_builder, rel_threshold=0.05):
                 route_cache.clear()
                 engine.changed = False
 
-            # Compute once per source
-            if src not in route_cache:
-                preds, dist, _ = engine.compute_dag(src)
-                route_cache[src] = preds
-
-            preds = route_cache[src]
+            # Compute once per source (again if a targeted DAG lacks dst)
+            preds = route_cache.get(src)
+            if preds is None or (dst not in preds and src in engine.partial):
+                preds, dist, _ = engine.compute_dag(src, dst=dst)
+                route_cache.put(src, preds, dag_bytes(preds))
 
             if dst not in preds:
                 return []
@@ -116,6 +650,9 @@ def no_multipath(weight_builder, rel_threshold=0.05):
 
         policy.epoch_tick = engine.epoch_tick
         policy.engine = engine
+        policy.cache = route_cache
+        policy.on_links_changed = link_change_handler(route_cache, engine)
+        policy.prepare = prepare_handler(engine)
         return policy
 
     return build
@@ -128,10 +665,10 @@ def no_multipath(weight_builder, rel_threshold=0.05):
 def ecmp(weight_builder, rel_threshold=0.05):
 
     def build(ctx):
-        engine = ShortestPathEngine(ctx, weight_builder, rel_threshold)
+        engine = make_engine(ctx, weight_builder, rel_threshold)
 
         # Cache per source only
-        route_cache = {}
+        route_cache = RouteCache(f"ecmp:{weight_builder.__name__}")
 
         def policy(src, dst):
 
@@ -142,28 +679,17 @@ def ecmp(weight_builder, rel_threshold=0.05):
                 route_cache.clear()
                 engine.changed = False
 
-            # Compute once per source
-            if src not in route_cache:
-
-                preds, dist, order = engine.compute_dag(src)
-
-                # Compute ECMP counts once
-                count = {src: 1}
+            # Compute once per source (again if a targeted DAG lacks dst)
+            entry = route_cache.get(src)
+            if entry is None or (dst not in entry[1] and src in engine.partial):
 
-                for n in order:
-                    if n == src:
-                        continue
+                # DAG + ECMP counts once
+                preds, count = engine.compute_counts(src, dst)
 
-                    total = 0
-                    for p in preds.get(n, []):
-                        total += count.get(p, 0)
+                entry = (preds, count)
+                route_cache.put(src, entry, dag_bytes(preds, count))
 
-                    if total > 0:
-                        count[n] = total
-
-                route_cache[src] = (preds, count)
-
-            preds, count = route_cache[src]
+            preds, count = entry
 
             if dst not in preds or count.get(dst, 0) == 0:
                 return []
@@ -194,6 +720,9 @@ def ecmp(weight_builder, rel_threshold=0.05):
 
         policy.epoch_tick = engine.epoch_tick
         policy.engine = engine
+        policy.cache = route_cache
+        policy.on_links_changed = link_change_handler(route_cache, engine)
+        policy.prepare = prepare_handler(engine)
         return policy
 
     return build
@@ -206,14 +735,14 @@ def ecmp(weight_builder, rel_threshold=0.05):
 def drill(weight_builder, rel_threshold=0.05):
 
     def build(ctx):
-        engine = ShortestPathEngine(ctx, weight_builder, rel_threshold)
+        engine = make_engine(ctx, weight_builder, rel_threshold)
 
-        route_cache = {}
+        # Holds both per-source DAGs (key src) and chosen paths (key (src, dst))
+        route_cache = RouteCache(f"drill:{weight_builder.__name__}")
 
         cap = ctx.capacity
         cong = ctx.congestion
         edge_id = ctx.edge_id
-        rng = global_randoms.multipath
 
         def path_cost(path):
             worst = 0.0
@@ -235,27 +764,20 @@ def drill(weight_builder, rel_threshold=0.05):
                 engine.changed = False
 
             key = (src, dst)
-            if key in route_cache:
-                return route_cache[key]
-
-            # Compute full DAG once per src per epoch
-            if src not in route_cache:
+            cached = route_cache.get(key)
+            if cached is not None:
+                return cached
 
-                preds, dist, order = engine.compute_dag(src)
+            # Compute full DAG once per src per epoch (again if a targeted DAG lacks dst)
+            entry = route_cache.get(src)
+            if entry is None or (dst not in entry[1] and src in engine.partial):
 
-                count = {src: 1}
-                for n in order:
-                    if n == src:
-                        continue
-                    total = 0
-                    for p in preds.get(n, []):
-                        total += count.get(p, 0)
-                    if total > 0:
-                        count[n] = total
+                preds, count = engine.compute_counts(src, dst)
 
-                route_cache[src] = (preds, count)
+                entry = (preds, count)
+                route_cache.put(src, entry, dag_bytes(preds, count))
 
-            preds, count = route_cache[src]
+            preds, count = entry
 
             if dst not in preds:
                 return []
@@ -266,7 +788,7 @@ def drill(weight_builder, rel_threshold=0.05):
                 while node != src:
                     ps = preds[node]
                     weights = [count.get(p, 0) for p in ps]
-                    node = rng.choices(ps, weights=weights)[0]
+                    node = global_randoms.multipath.choices(ps, weights=weights)[0]
                     path.append(node)
                 path.reverse()
                 return path
@@ -275,11 +797,16 @@ def drill(weight_builder, rel_threshold=0.05):
             p2 = sample()
 
             best = p1 if path_cost(p1) < path_cost(p2) else p2
-            route_cache[(src, dst)] = best
+            route_cache.put(key, best, path_bytes(best))
             return best
 
         policy.epoch_tick = engine.epoch_tick
         policy.engine = engine
+        policy.cache = route_cache
+        policy.on_links_changed = link_change_handler(route_cache, engine)
+        policy.prepare = prepare_handler(engine)
+        # chosen paths per (src, dst) outlive the epoch they were drawn in
+        policy.pair_state = True
         return policy
 
     return build
@@ -2,10 +2,12 @@ import time
 from typing import Callable
 
 import networkx as nx
+import numpy as np
 
 import global_randoms
 from Components.routing import weights, multipath
-from Components.routing.multipath import ShortestPathEngine
+from Components.routing.cache import RouteCache, dag_bytes, path_bytes
+from Components.routing.multipath import link_change_handler, make_engine
 from Components.routing.weights import hop_weight_builder
 from Components.topology.topology_types import Node, Path
 
@@ -28,31 +30,125 @@ ospf_drill = multipath.drill(weights.ospf_weight_builder)
 eigrp_drill = multipath.drill(weights.eigrp_weight_builder)
 stale_ospf_drill = multipath.drill(weights.stale_ospf_weight_builder)
 stale_eigrp_drill = multipath.drill(weights.stale_eigrp_weight_builder)
-def conga_policy(weight_builder, rel_threshold=0.05, k_samples=30):
+def conga_policy(weight_builder, rel_threshold=0.05, max_candidates=64):
+    """
+    CONGA-style leaf-to-leaf load balancing.
+
+    Every host pair under the same pair of leaves (ToR / edge switches)
+    shares the same fabric paths, so candidates are kept per (source
+    leaf, destination leaf): up to `max_candidates` distinct shortest
+    paths, stored as edge-id arrays and built once per topology (or
+    after a link change). Each epoch a leaf pair is scored once, lazily,
+    by summing ctx.congestion / ctx.capacity over every candidate, and
+    every host pair under it takes that epoch's cheapest candidate, so a
+    leaf pair moves off a path as soon as it is the most congested.
+    """
 
     def build(ctx):
 
-        engine = ShortestPathEngine(ctx, weight_builder, rel_threshold)
+        engine = make_engine(ctx, weight_builder, rel_threshold)
 
-        # Per-source cache
-        route_cache = {}
+        # Per-leaf DAGs (key leaf)
+        route_cache = RouteCache(f"conga:{weight_builder.__name__}")
+        # Candidate tables (key (src_leaf, dst_leaf)) -> (node paths, flat eids, offsets)
+        tables = RouteCache(f"conga_tables:{weight_builder.__name__}")
 
         uv2eid = ctx.edge_id
+        adj = ctx.adj
         cap = ctx.capacity
         cong = ctx.congestion
-        rng = global_randoms.multipath
+
+        # per-epoch state: edge utilisation and cheapest candidate per leaf pair
+        state = {"util": None}
+        scores = {}
+
+        up = ctx.edge_up
+
+        def leaf_of(host):
+            # hosts hang off a single leaf; None if that link is down
+            links = adj[host]
+            if len(links) != 1:
+                return host
+            leaf, eid = links[0]
+            return leaf if up[eid] else None
+
+        def edge_util():
+            if state["util"] is None:
+                util = np.ones(len(cap), dtype=np.float64)
+                mask = cap > 0
+                util[mask] = cong[mask] / cap[mask]
+                state["util"] = util
+            return state["util"]
 
         # --------------------------------------------
-        # Path congestion cost (sum utilization)
+        # Candidate table per leaf pair
         # --------------------------------------------
-        def path_cost(path):
-            total = 0.0
-            for u, v in zip(path[:-1], path[1:]):
-                eid = uv2eid[(u, v)]
-                denom = cap[eid]
-                util = cong[eid] / denom if denom > 0 else 1.0
-                total += util
-            return total
+        def enumerate_paths(preds, count, src, dst):
+            if count[dst] <= max_candidates:
+                paths = []
+                stack = [(dst, [dst])]
+                while stack:
+                    node, suffix = stack.pop()
+                    if node == src:
+                        paths.append(suffix[::-1])
+                        continue
+                    for p in preds[node]:
+                        if count.get(p, 0) > 0:
+                            stack.append((p, suffix + [p]))
+                return paths
+
+            # too many to list: sample distinct ECMP paths
+            rng = global_randoms.multipath
+            seen = {}
+            for _ in range(4 * max_candidates):
+                node = dst
+                path = [dst]
+                while node != src:
+                    ps = [p for p in preds[node] if count.get(p, 0) > 0]
+                    node = rng.choices(ps, weights=[count[p] for p in ps])[0]
+                    path.append(node)
+                path.reverse()
+                seen.setdefault(tuple(path), path)
+                if len(seen) == max_candidates:
+                    break
+            return list(seen.values())
+
+        def table(src_leaf, dst_leaf):
+            key = (src_leaf, dst_leaf)
+            entry = tables.get(key)
+            if entry is not None:
+                return entry
+
+            dag = route_cache.get(src_leaf)
+            if dag is None or (dst_leaf not in dag[1] and src_leaf in engine.partial):
+                dag = engine.compute_counts(src_leaf, dst_leaf)
+                route_cache.put(src_leaf, dag, dag_bytes(*dag))
+            preds, count = dag
+
+            paths = enumerate_paths(preds, count, src_leaf, dst_leaf) if dst_leaf in count else []
+            eids = [[uv2eid[(u, v)] for u, v in zip(path, path[1:])] for path in paths]
+            offsets = np.zeros(len(paths) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(e) for e in eids])
+            flat = np.fromiter((e for path in eids for e in path), dtype=np.int64, count=offsets[-1])
+
+            entry = (paths, flat, offsets)
+            tables.put(key, entry, flat.nbytes + offsets.nbytes + sum(path_bytes(p) for p in paths))
+            return entry
+
+        def best(src_leaf, dst_leaf):
+            key = (src_leaf, dst_leaf)
+            path = scores.get(key)
+            if path is None:
+                paths, flat, offsets = table(src_leaf, dst_leaf)
+                if not paths:
+                    path = scores[key] = []
+                    return path
+
+                # path cost = sum of utilisation over its edges
+                sums = np.concatenate(([0.0], np.cumsum(edge_util()[flat])))
+                cost = sums[offsets[1:]] - sums[offsets[:-1]]
+                path = scores[key] = paths[int(np.argmin(cost))]
+            return path
 
         # --------------------------------------------
         # Policy
@@ -64,87 +160,67 @@ def conga_policy(weight_builder, rel_threshold=0.05, k_samples=30):
 
             if engine.changed:
                 route_cache.clear()
+                tables.clear()
+                scores.clear()
                 engine.changed = False
 
-            # Compute DAG once per source per epoch
-            if src not in route_cache:
-
-                preds, dist, order = engine.compute_dag(src)
+            src_leaf = leaf_of(src)
+            dst_leaf = leaf_of(dst)
 
-                # Precompute ECMP counts once
-                count = {src: 1}
-                for n in order:
-                    if n == src:
-                        continue
-                    total = 0
-                    for p in preds.get(n, []):
-                        total += count.get(p, 0)
-                    if total > 0:
-                        count[n] = total
-
-                route_cache[src] = {
-                    "preds": preds,
-                    "count": count,
-                    "paths": {}
-                }
-
-            data = route_cache[src]
-            preds = data["preds"]
-            count = data["count"]
-            path_cache = data["paths"]
-
-            if dst in path_cache:
-                return path_cache[dst]
-
-            if dst not in preds or count.get(dst, 0) == 0:
-                path_cache[dst] = []
+            if src_leaf is None or dst_leaf is None:
                 return []
 
-            # --------------------------------------------
-            # Sample K ECMP paths
-            # --------------------------------------------
-            best_path = None
-            best_cost = float("inf")
-
-            for _ in range(k_samples):
-
-                node = dst
-                path = [dst]
-
-                while node != src:
-
-                    ps = preds[node]
-                    valid = []
-                    weights = []
-
-                    for p in ps:
-                        w = count.get(p, 0)
-                        if w > 0:
-                            valid.append(p)
-                            weights.append(w)
-
-                    if not valid:
-                        path = []
-                        break
+            if src_leaf == dst_leaf:
+                return [src, src_leaf, dst]
 
-                    node = rng.choices(valid, weights=weights)[0]
-                    path.append(node)
-
-                if not path:
-                    continue
-
-                path.reverse()
-                cost = path_cost(path)
-
-                if cost < best_cost:
-                    best_cost = cost
-                    best_path = path
-
-            path_cache[dst] = best_path
-            return best_path
+            path = best(src_leaf, dst_leaf)
+            if not path:
+                return []
 
-        policy.epoch_tick = engine.epoch_tick
+            head = [src] if src != src_leaf else []
+            tail = [dst] if dst != dst_leaf else []
+            return head + path + tail
+
+        def epoch_tick():
+            engine.epoch_tick()
+            state["util"] = None
+            scores.clear()
+
+        def prepare(flows):
+            # searches run leaf to leaf: the engine batches these sources
+            # and, in targeted mode, searches for these destinations
+            pairs = []
+            for flow in flows:
+                src_leaf, dst_leaf = leaf_of(flow.src), leaf_of(flow.dst)
+                if src_leaf is not None and dst_leaf is not None and src_leaf != dst_leaf:
+                    pairs.append((src_leaf, dst_leaf))
+            engine.prepare(pairs)
+
+        repair_dags = link_change_handler(route_cache, engine)
+
+        def on_links_changed(down_eids, up_eids):
+            repaired, invalidated = repair_dags(down_eids, up_eids)
+
+            # restored links may add candidates, failed ones remove some;
+            # leaf pairs on a rebuilt table are scored again
+            if up_eids:
+                tables.clear()
+            elif down_eids:
+                down = np.asarray(down_eids, dtype=np.int64)
+                for key, (_, flat, _) in list(tables.items()):
+                    if np.isin(flat, down).any():
+                        tables.pop(key)
+            scores.clear()
+            return repaired, invalidated
+
+        policy.epoch_tick = epoch_tick
         policy.engine = engine
+        policy.cache = route_cache
+        policy.caches = [route_cache, tables]
+        # large candidate tables are sampled from the epoch's multipath stream
+        policy.pair_state = True
+        policy.on_links_changed = on_links_changed
+        policy.prepare = prepare
 
         return policy
 
@@ -0,0 +1,255 @@
+"""
+search.py
+
+Targeted shortest-path search for ShortestPathEngine.
+
+By default the engine settles the whole graph from every source it is
+asked about, although a source usually has only a handful of
+destinations in an epoch. Policies with a `prepare(flows)` hook pass
+this epoch's destinations per source to their engine before routing
+(run_epoch calls it), and the engine can then stop early:
+
+    full      settle every node (default)
+    targeted  Dijkstra that stops once every destination of the source
+              and all of their equal-cost predecessors are settled
+    alt       targeted, ordered by A* with ALT lower bounds (landmarks
+              and the triangle inequality)
+
+A targeted DAG is exact for every node it holds, and for the targeted
+mode identical to the matching part of a full search. ALT reaches the
+same DAG, but equal-cost predecessors may be listed in a different
+order, so ECMP / first-predecessor tie-breaks can pick other paths.
+A DAG that stops short is not written to the DAG store, and policies
+recompute it when asked for a destination it does not hold. Because
+policies keep DAGs across epochs until weights move past rel_threshold,
+such a recompute uses the current weights; results with dynamic weights
+can therefore differ slightly from full searches.
+
+Landmark distances are computed over every link, failed or not, so
+their bounds stay admissible under failures. They are rebuilt when an
+engine sees a weight change above rel_threshold; in between, bounds are
+scaled by the smallest ratio of current to landmark-time edge weight,
+which keeps them admissible and consistent.
+
+Targeted searches run in Python, also with --kernels numba. Hop-count
+engines use batched BFS (bfs.py) instead while that is on. Select
+with configure(mode) (main.py --search) before policies route.
+"""
+
+import heapq
+import itertools
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+MODES = ("full", "targeted", "alt")
+
+_mode = "full"
+_landmarks = 8
+
+
+def configure(mode: str = "full", landmarks: int = 8) -> None:
+    """Search mode (MODES) and ALT landmark count for engines routing after this call."""
+    global _mode, _landmarks
+    if mode not in MODES:
+        raise ValueError(f"Unknown search mode: {mode} (choose from {MODES})")
+    if landmarks < 1:
+        raise ValueError("ALT needs at least one landmark")
+    _mode = mode
+    _landmarks = landmarks
+
+
+def mode() -> str:
+    return _mode
+
+
+def landmark_count() -> int:
+    return _landmarks
+
+
+# ---------------------------------------
+# Targeted Dijkstra / A*
+# ---------------------------------------
+
+def targeted_dijkstra(
+    adj: Dict,
+    up: np.ndarray,
+    weight_fn,
+    src: Hashable,
+    targets: Iterable[Hashable],
+    eps: float = 1e-12,
+    bound: Optional[List[float]] = None,
+    index: Optional[Dict] = None,
+    slack: float = 0.0,
+) -> Tuple[Dict, Dict, List, bool]:
+    """
+    Shortest-path DAG from src, settled only as far as `targets` need.
+
+    Without `bound` this is ShortestPathEngine's Dijkstra with an early
+    exit: once the last target is settled, nodes at the same distance
+    (up to eps) are still settled, so every equal-cost predecessor of a
+    settled node is recorded. With `bound` (per node index, via
+    `index`: a consistent lower bound on the distance to the nearest
+    target, inf if none is reachable) nodes are popped by distance +
+    bound, i.e. A*, and `slack` absorbs rounding in the bounds.
+
+    Returns (preds, dist, order, complete): dicts and order hold settled
+    nodes only, order in nondecreasing distance; complete is False if
+    any reachable node was left out.
+    """
+    counter = itertools.count()
+
+    remaining = set(targets)
+    remaining.discard(src)
+
+    dist = {src: 0.0}
+    preds = {src: []}
+    order = []
+
+    def key(node, d):
+        return d if bound is None else d + bound[index[node]]
+
+    # stop once the heap passes the key of the last target settled
+    radius = None if remaining else 0.0
+    pruned = False
+
+    heap = [(key(src, 0.0), next(counter), 0.0, src)]
+
+    while heap:
+        k, _, d, u = heap[0]
+
+        if radius is not None and k > radius + eps + slack:
+            break
+        heapq.heappop(heap)
+
+        if d > dist[u] + eps:
+            continue
+
+        order.append(u)
+
+        if u in remaining:
+            remaining.discard(u)
+            if not remaining:
+                radius = k
+
+        for v, eid in adj[u]:
+            if not up[eid]:
+                continue
+            nd = d + weight_fn(eid)
+            old = dist.get(v)
+
+            if old is None or nd < old - eps:
+                kv = key(v, nd)
+                if kv == np.inf:
+                    # no target is reachable through v
+                    pruned = True
+                    continue
+                dist[v] = nd
+                preds[v] = [u]
+                heapq.heappush(heap, (kv, next(counter), nd, v))
+
+            elif abs(nd - old) <= eps:
+                preds[v].append(u)
+
+    settled = set(order)
+    complete = not heap and not pruned
+    if len(settled) < len(dist):
+        complete = False
+        dist = {n: d for n, d in dist.items() if n in settled}
+        preds = {n: ps for n, ps in preds.items() if n in settled}
+
+    if bound is not None:
+        # A* pops by distance + bound; counts need distance order
+        order.sort(key=dist.__getitem__)
+
+    return preds, dist, order, complete
+
+
+# ---------------------------------------
+# ALT landmarks
+# ---------------------------------------
+
+def _distances(indptr: List[int], indices: List[int], eids: List[int], weights: List[float], source: int) -> np.ndarray:
+    """Distances from node index `source` over every link."""
+    dist = [np.inf] * (len(indptr) - 1)
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        for j in range(indptr[u], indptr[u + 1]):
+            v = indices[j]
+            nd = d + weights[eids[j]]
+            if nd < dist[v]:
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return np.asarray(dist, dtype=np.float64)
+
+
+class Landmarks:
+    """
+    Landmark distances of one weight version.
+
+    Landmarks are picked farthest-first (deterministically, starting
+    from the node farthest from node 0), each one at the largest
+    distance from those already chosen.
+
+    Parameters
+    ----------
+    ctx : EpochContext
+        Graph in CSR form (indptr, indices, adj_eids).
+    weights : np.ndarray
+        Per-edge weights (edge_list order) the distances are built from.
+    count : int
+        Number of landmarks.
+    """
+
+    def __init__(self, ctx, weights: np.ndarray, count: int) -> None:
+        self.weights = np.array(weights, dtype=np.float64)
+
+        indptr = ctx.indptr.tolist()
+        indices = ctx.indices.tolist()
+        eids = ctx.adj_eids.tolist()
+        w = self.weights.tolist()
+
+        n = len(indptr) - 1
+        rows = []
+        nodes = []
+        nearest = _distances(indptr, indices, eids, w, 0) if n else np.zeros(0)
+        for _ in range(min(count, n)):
+            reach = np.where(np.isfinite(nearest), nearest, -1.0)
+            node = int(np.argmax(reach))
+            if reach[node] <= 0.0 and nodes:
+                break
+            row = _distances(indptr, indices, eids, w, node)
+            nodes.append(node)
+            rows.append(row)
+            nearest = row if len(rows) == 1 else np.minimum(nearest, row)
+
+        self.nodes = nodes
+        self.dist = np.array(rows, dtype=np.float64).reshape(len(rows), n)
+
+        # rounding in the distance differences, taken off every bound
+        finite = self.dist[np.isfinite(self.dist)]
+        self.tolerance = 1e-9 * (1.0 + (float(finite.max()) if len(finite) else 0.0))
+
+    def scale(self, weights: np.ndarray) -> float:
+        """Smallest ratio of current to landmark-time weight (<= 1)."""
+        ratio = np.divide(weights, self.weights, out=np.ones_like(self.weights), where=self.weights > 0)
+        return min(1.0, float(ratio.min())) if len(ratio) else 1.0
+
+    def bounds(self, targets: List[int], scale: float = 1.0) -> List[float]:
+        """
+        Per node index lower bound on the distance to the nearest of
+        `targets` (node indices): min over targets of
+        max over landmarks of |d(l, t) - d(l, v)|, times `scale`.
+        """
+        h = np.full(self.dist.shape[1], np.inf)
+        with np.errstate(invalid="ignore"):
+            for t in targets:
+                # nan where both are unreachable from a landmark: no information
+                diff = np.abs(self.dist[:, t, None] - self.dist)
+                h = np.fmin(h, np.fmax.reduce(diff, axis=0, initial=0.0))
+        h = np.maximum(h * scale - self.tolerance, 0.0)
+        return h.tolist()
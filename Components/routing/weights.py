@@ -5,6 +5,13 @@ def latency_weight_builder(ctx):
     latency = ctx.latency
     return lambda eid: latency[eid]
 
+# weights that never change for a given topology (DAGs may be stored on disk)
+hop_weight_builder.static = True
+latency_weight_builder.static = True
+
+# every edge weighs 1: shortest paths by BFS (bfs.py)
+hop_weight_builder.unit = True
+
 def ospf_weight_builder(ctx):
     cap = ctx.capacity
     cong = ctx.congestion
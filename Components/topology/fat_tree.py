@@ -1,6 +1,6 @@
 import networkx as nx
 from typing import List
-from Components.topology.utils import add_link_alias, order_hosts_by_tag, order_hosts_by_rack
+from Components.topology.utils import add_link_alias, assign_racks, order_hosts_by_tag, order_hosts_by_rack
 from Components.host import Host
 
 def infer_k(num_hosts: int) -> int:
@@ -180,13 +180,17 @@ def build_fat_tree_informed(
     ordered_hosts = order_hosts_by_rack(hosts, affinity_prefix, hosts_per_rack)
 
     host_iter = iter(ordered_hosts)
+    racks = []
 
-    for edge in edge_switches:
+    for rack, edge in enumerate(edge_switches):
         for _ in range(half):
             try:
                 host = next(host_iter)
             except StopIteration:
                 break
             add_link(host.id, edge)
+            racks.append(rack)
+
+    assign_racks(ordered_hosts[:len(racks)], racks)
 
     return fat_tree
\ No newline at end of file
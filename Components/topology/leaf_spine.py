@@ -4,7 +4,7 @@ from typing import List
 import networkx as nx
 
 from Components.host import Host
-from Components.topology.utils import order_hosts_by_rack, order_hosts_by_tag
+from Components.topology.utils import assign_racks, order_hosts_by_rack, order_hosts_by_tag
 
 
 def build_leaf_spine(
@@ -151,4 +151,6 @@ def build_leaf_spine_informed(
             stale_congestion=0.0,
         )
 
+    assign_racks(ordered_hosts, [i // hosts_per_leaf for i in range(len(ordered_hosts))])
+
     return topology
@@ -1,9 +1,10 @@
-from collections import defaultdict
-from typing import List
+import hashlib
+from typing import List, Sequence
 
 import networkx as nx
+import numpy as np
 
-from Components.host import Host
+from Components.host import Host, HostTable
 
 
 def add_link_alias(topology: nx.Graph, capacity: float, latency: float):
@@ -46,33 +47,52 @@ def clear_congestions(topology) -> None:
             topology[u][v]["congestion"] = 0
             topology[u][v]["stale_congestion"] = 0
 
+def topology_hash(topology: nx.Graph, edge_attrs: Sequence[str] = ()) -> str:
+    """
+    Stable digest of the graph structure (node ids, type and layer, edges),
+    independent of insertion order. `edge_attrs` adds those edge
+    attributes (e.g. "capacity", "latency") to the digest.
+    """
+    h = hashlib.sha1()
+
+    nodes = sorted(
+        repr((node, data.get("type"), data.get("layer")))
+        for node, data in topology.nodes(data=True)
+    )
+    edges = sorted(
+        repr((*sorted((repr(u), repr(v))), *(data.get(a) for a in edge_attrs)))
+        for u, v, data in topology.edges(data=True)
+    )
+
+    for line in nodes:
+        h.update(line.encode())
+        h.update(b"\n")
+    h.update(b"--\n")
+    for line in edges:
+        h.update(line.encode())
+        h.update(b"\n")
+
+    return h.hexdigest()
+
 def order_hosts_by_tag(hosts: List[Host], prefix: str) -> List[Host]:
     """
     Pack hosts with same prefix tag together.
 
     Example:
         prefix="job:"
-    """
-
-    groups = defaultdict(list)
-    others = []
-
-    for h in hosts:
-        tag = next((t for t in h.tags if t.startswith(prefix)), None)
-        if tag:
-            groups[tag].append(h)
-        else:
-            others.append(h)
 
-    ordered = []
+    Groups come in tag string order, each in input order, followed by
+    the untagged hosts.
+    """
 
-    # keep deterministic order
-    for key in sorted(groups):
-        ordered.extend(groups[key])
+    table, rows = HostTable.of(hosts)
+    rank = table.prefix_groups(prefix, rows)
 
-    ordered.extend(others)
+    # untagged hosts last; stable sort keeps input order within a group
+    rank[rank < 0] = len(rows)
+    order = np.argsort(rank, kind="stable")
 
-    return ordered
+    return [hosts[i] for i in order.tolist()]
 
 def order_hosts_by_rack(
     hosts: List[Host],
@@ -84,30 +104,14 @@ def order_hosts_by_rack(
     1) same-tag hosts stay together
     2) no rack contains mixed tags unless unavoidable
 
-    This respects rack capacity while preserving affinity.
+    This respects rack capacity while preserving affinity: racks are
+    filled in this order, `hosts_per_rack` at a time, so a group only
+    shares a rack with the next one at its boundary.
     """
 
-    groups = defaultdict(list)
-    others = []
-
-    for h in hosts:
-        tag = next((t for t in h.tags if t.startswith(prefix)), None)
-        if tag:
-            groups[tag].append(h)
-        else:
-            others.append(h)
-
-    ordered = []
-
-    # deterministic order
-    for key in sorted(groups):
-        g = groups[key]
-
-        # ⭐ chunk by rack capacity
-        for i in range(0, len(g), hosts_per_rack):
-            ordered.extend(g[i:i + hosts_per_rack])
-
-    # pack leftovers
-    ordered.extend(others)
+    return order_hosts_by_tag(hosts, prefix)
 
-    return ordered
\ No newline at end of file
+def assign_racks(hosts: List[Host], racks: Sequence[int]) -> None:
+    """Record the rack (edge switch / leaf index) of each host in its host table."""
+    table, rows = HostTable.of(hosts)
+    table.column("rack")[rows] = np.asarray(racks, dtype=np.int32)
@@ -1,7 +1,16 @@
+from Components.workloads.congestion import carry_over, congestion_ar1, congestion_uniform
+from Components.workloads.trace import TraceReplayWorkload
 from Components.workloads.workload import AR1Workload, AR1StrictLocalGroupWorkload, AR1ScheduledGroupIncast
 
 workload_configuration = {
     "random_workload" : AR1Workload,
     "local_group_workload": AR1StrictLocalGroupWorkload,
-    "incast": AR1ScheduledGroupIncast
-}
\ No newline at end of file
+    "incast": AR1ScheduledGroupIncast,
+    "trace_replay": TraceReplayWorkload,
+}
+
+congestion_configuration = {
+    "carry_over": carry_over,
+    "uniform": congestion_uniform,
+    "ar1": congestion_ar1,
+}
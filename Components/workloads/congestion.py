@@ -4,9 +4,11 @@ from typing import Callable
 import global_randoms
 
 import networkx as nx
+import numpy as np
 
 from Components.topology.utils import get_capacity
 from Simulation.epoch_result import EpochResult
+from Simulation.metrics.sparse import edge_load_array
 
 CongestionType = Callable[[nx.Graph, EpochResult], None]
 
@@ -35,6 +37,8 @@ def congestion_uniform(
         for _, _, data in topology.edges(data=True):
             data["congestion"] = global_randoms.congestion.uniform(low, high)
 
+    # independent of epoch results: epochs may run in parallel
+    apply.open_loop = True
     return apply
 
 def congestion_ar1(
@@ -56,6 +60,7 @@ def congestion_ar1(
 
             data["congestion"] = alpha * stale + (1.0 - alpha) * noise
 
+    apply.open_loop = True
     return apply
 
 def carry_over(alpha: float = 0.9):
@@ -76,4 +81,51 @@ def carry_over(alpha: float = 0.9):
                 data["stale_congestion"] = stale
                 data["congestion"] = alpha * stale + (1 - alpha) * util
 
+    def attach(ctx) -> Callable[[nx.Graph, EpochResult], None]:
+        """
+        Same update on the ctx arrays directly, vectorized over edges.
+        Zero-load edges only decay (util is 0), so utilisation is
+        computed for the active edges alone. Topology edge attributes
+        are left untouched.
+        """
+        def step(topology: nx.Graph, epoch_result: EpochResult = None) -> None:
+            cong = ctx.congestion
+            if epoch_result is None:
+                cong[:] = 0.0
+                ctx.stale_congestion[:] = 0.0
+                return
+
+            ctx.stale_congestion[:] = cong
+            cong *= alpha
+
+            load = edge_load_array(epoch_result)
+            active = np.flatnonzero(load)
+            cap = ctx.capacity[active]
+            active, cap = active[cap > 0], cap[cap > 0]
+            cong[active] += (1 - alpha) * (load[active] / cap)
+
+        return step
+
+    apply.attach = attach
     return apply
+
+
+def bind(congestion: CongestionType, ctx) -> Callable[[nx.Graph, EpochResult], None]:
+    """
+    Per-epoch congestion step that leaves ctx.congestion and
+    ctx.stale_congestion up to date: the model's own ctx path if it has
+    one (`attach`), else the model followed by a copy from the topology.
+    """
+    attach = getattr(congestion, "attach", None)
+    if attach is not None:
+        return attach(ctx)
+
+    def step(topology: nx.Graph, epoch_result: EpochResult = None) -> None:
+        congestion(topology, epoch_result)
+
+        for eid, (u, v) in enumerate(ctx.edge_list):
+            data = topology[u][v]
+            ctx.congestion[eid] = data["congestion"]
+            ctx.stale_congestion[eid] = data["stale_congestion"]
+
+    return step
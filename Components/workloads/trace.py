@@ -0,0 +1,181 @@
+"""
+trace.py
+
+Binary flow traces: record any workload once, replay it for every policy.
+
+A trace is three files sharing a base path:
+
+    <path>.flows       fixed-width records (src int32, dst int32, rate float64)
+    <path>.index.npy   int64 offsets, epoch t spans records [index[t], index[t+1])
+    <path>.json        metadata (epochs, records, num_hosts, source,
+                       host_tags)
+
+Records are read through numpy.memmap, so traces larger than RAM replay
+with one zero-copy slice per epoch.
+
+Workloads tag hosts when they are built (e.g. "job:3"), and informed
+topologies place hosts by those tags. host_tags holds the tags as they
+were before the first epoch; the replay workload puts them back on its
+hosts, so a topology built after it places hosts as in the live run.
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from Components.host import Host
+from Components.workloads.flow import Flow
+
+TRACE_DTYPE = np.dtype([("src", "<i4"), ("dst", "<i4"), ("rate", "<f8")])
+
+
+def _paths(path: str):
+    return f"{path}.flows", f"{path}.index.npy", f"{path}.json"
+
+
+class TraceWriter:
+    """Append per-epoch flow lists to a trace on disk."""
+
+    def __init__(self, path: str, metadata: Optional[dict] = None) -> None:
+        self.path = path
+        self.metadata = metadata or {}
+        self._flows_path, self._index_path, self._meta_path = _paths(path)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(self._flows_path, "wb")
+        self._offsets = [0]
+        self._max_host = -1
+
+    def append(self, flows: List[Flow]) -> None:
+        records = np.empty(len(flows), dtype=TRACE_DTYPE)
+        for i, flow in enumerate(flows):
+            records[i] = (flow.src, flow.dst, flow.rate)
+
+        if len(records):
+            self._max_host = max(self._max_host, int(records["src"].max()), int(records["dst"].max()))
+
+        self._file.write(records.tobytes())
+        self._offsets.append(self._offsets[-1] + len(records))
+
+    def close(self) -> None:
+        self._file.close()
+        np.save(self._index_path, np.asarray(self._offsets, dtype=np.int64))
+
+        meta = {
+            "epochs": len(self._offsets) - 1,
+            "records": self._offsets[-1],
+            "num_hosts": self._max_host + 1,
+            **self.metadata,
+        }
+        with open(self._meta_path, "w") as f:
+            json.dump(meta, f, indent=2, default=str)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def host_tags(hosts: List[Host]) -> Dict[str, List[str]]:
+    """{host id: sorted tags} of the tagged hosts (JSON keys are strings)."""
+    out = {}
+    for host in hosts:
+        tags = host.tags
+        if tags:
+            out[str(host.id)] = sorted(tags)
+    return out
+
+
+def apply_host_tags(hosts: List[Host], tags: Dict[str, List[str]]) -> None:
+    """Give every host the tags host_tags() recorded for its id, and only those."""
+    for host in hosts:
+        for tag in host.tags:
+            host.remove_tag(tag)
+        for tag in tags.get(str(host.id), ()):
+            host.add_tag(tag)
+
+
+def record_trace(workload, epochs: int, path: str, metadata: Optional[dict] = None) -> None:
+    """Dump `epochs` consecutive generate() outputs of any workload to a trace."""
+    meta = {"source": type(workload).__name__, **(metadata or {})}
+    hosts = getattr(workload, "hosts", None)
+    if hosts is not None:
+        # as the workload left them for the topology, before any epoch
+        meta["host_tags"] = host_tags(hosts)
+    with TraceWriter(path, meta) as writer:
+        for _ in range(epochs):
+            writer.append(workload.generate())
+
+
+class TraceReplayWorkload:
+    """
+    Replay a recorded trace epoch by epoch.
+
+    The generator arguments (flows_per_epoch, rate, alpha) are accepted
+    for registry compatibility and ignored: the trace fixes the traffic.
+    When the run is longer than the trace it wraps around if `loop`.
+    Host tags recorded with the trace are applied to `hosts`.
+    """
+
+    def __init__(
+        self,
+        hosts: List[Host],
+        flows_per_epoch: int = 0,
+        rate: float = 1.0,
+        alpha: float = 0.9,
+        trace_path: Optional[str] = None,
+        loop: bool = True,
+    ) -> None:
+        if trace_path is None:
+            raise ValueError("TraceReplayWorkload needs trace_path (main.py --trace)")
+
+        flows_path, index_path, meta_path = _paths(trace_path)
+        with open(meta_path) as f:
+            self.meta = json.load(f)
+
+        if self.meta["num_hosts"] > len(hosts):
+            raise ValueError(
+                f"Trace references {self.meta['num_hosts']} hosts, topology has {len(hosts)}"
+            )
+
+        if "host_tags" in self.meta:
+            apply_host_tags(hosts, self.meta["host_tags"])
+
+        self.hosts = hosts
+        self.loop = loop
+        self.index = np.load(index_path)
+        self.records = (
+            np.memmap(flows_path, dtype=TRACE_DTYPE, mode="r")
+            if self.meta["records"] else np.empty(0, dtype=TRACE_DTYPE)
+        )
+        self._epoch = 0
+
+    @property
+    def epochs(self) -> int:
+        return len(self.index) - 1
+
+    def generate_arrays(self) -> np.ndarray:
+        """Zero-copy record slice of the next epoch."""
+        t = self._epoch
+        if t >= self.epochs:
+            if not self.loop or self.epochs == 0:
+                raise IndexError(f"Trace exhausted after {self.epochs} epochs")
+            t %= self.epochs
+
+        self._epoch += 1
+        return self.records[self.index[t]:self.index[t + 1]]
+
+    def generate(self) -> List[Flow]:
+        chunk = self.generate_arrays()
+        return [
+            Flow(src, dst, rate)
+            for src, dst, rate in zip(
+                chunk["src"].tolist(), chunk["dst"].tolist(), chunk["rate"].tolist()
+            )
+        ]
+
+    def reset(self):
+        self._epoch = 0
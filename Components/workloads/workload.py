@@ -1,5 +1,5 @@
 from typing import List, Protocol
-from Components.host import Host
+from Components.host import Host, HostTable
 from Components.workloads.flow import Flow
 import global_randoms
 
@@ -14,14 +14,32 @@ class Workload(Protocol):
     def generate(self) -> List[Flow]: ...
 
 def clear_prefixed_tags(hosts: List[Host], prefix: str):
-    for h in hosts:
-        to_remove = {t for t in h.tags if t.startswith(prefix)}
-        h.tags.difference_update(to_remove)
+    table, rows = HostTable.of(hosts)
+    table.clear_prefix(prefix, rows)
 
 
 def add_group_tag(host: Host, prefix: str, gid: int):
     host.add_tag(f"{prefix}:{gid}")
 
+
+def assign_groups(hosts: List[Host], prefix: str, rng, size: int, count: int) -> List[List[int]]:
+    """
+    Shuffle `hosts` with `rng` and tag consecutive chunks of `size` as
+    groups 0..count-1 ("<prefix>:<g>"); returns the host ids of each
+    group in shuffled order. Tags of the previous assignment are cleared.
+    """
+    table, rows = HostTable.of(hosts)
+    table.clear_prefix(f"{prefix}:", rows)
+
+    # shuffle positions: the same draws as shuffling the host list itself
+    order = list(range(len(rows)))
+    rng.shuffle(order)
+    shuffled = rows[order]
+
+    table.assign_chunks(prefix, shuffled, size, count)
+    ids = table.ids[shuffled].tolist()
+    return [ids[g * size:(g + 1) * size] for g in range(count)]
+
 class _AR1BaseWorkload:
     """
     Shared AR(1) temporal engine.
@@ -49,13 +67,21 @@ class _AR1BaseWorkload:
 
         self._prev_rates = [0.0] * flows_per_epoch
 
+        # setup draws use the component stream, epoch t draws stream("workload", t)
+        self._epoch = 0
+        self._rng = global_randoms.stream("workload")
+
+    def _begin_epoch(self) -> None:
+        self._rng = global_randoms.stream("workload", self._epoch)
+        self._epoch += 1
+
     # ------------------------
     # AR(1) core
     # ------------------------
 
     def _next_rate(self, i: int) -> float:
         prev = self._prev_rates[i]
-        noise = self.data_per_epoch * global_randoms.workload.random()
+        noise = self.data_per_epoch * self._rng.random()
 
         rate = self.alpha * prev + (1.0 - self.alpha) * noise
         self._prev_rates[i] = rate
@@ -68,11 +94,17 @@ class _AR1BaseWorkload:
     def _choose_endpoints(self) -> tuple[Host, Host]:
         raise NotImplementedError
 
+    def _drift(self) -> None:
+        """Per-epoch state change before flows are drawn."""
+
     # ------------------------
     # public API
     # ------------------------
 
     def generate(self) -> List[Flow]:
+        self._begin_epoch()
+        self._drift()
+
         flows: List[Flow] = []
 
         for i in range(self.flows_per_epoch):
@@ -85,6 +117,8 @@ class _AR1BaseWorkload:
 
     def reset(self):
         self._prev_rates = [0.0] * self.flows_per_epoch
+        self._epoch = 0
+        self._rng = global_randoms.stream("workload")
 
 class AR1Workload(_AR1BaseWorkload):
     """Pure random AR(1) workload."""
@@ -107,22 +141,23 @@ class AR1Workload(_AR1BaseWorkload):
         self._endpoints = []
 
         for _ in range(self.flows_per_epoch):
-            src, dst = global_randoms.workload.sample(self.hosts, 2)
+            src, dst = self._rng.sample(self.hosts, 2)
             self._endpoints.append((src.id, dst.id))
 
     # -----------------------------------------
 
     def generate(self) -> List[Flow]:
+        self._begin_epoch()
 
         flows: List[Flow] = []
 
         for i in range(self.flows_per_epoch):
 
             # Drift with probability alpha
-            if i < len(self._endpoints) and global_randoms.workload.random() < self.alpha:
+            if i < len(self._endpoints) and self._rng.random() < self.alpha:
                 src_id, dst_id = self._endpoints[i]
             else:
-                src, dst = global_randoms.workload.sample(self.hosts, 2)
+                src, dst = self._rng.sample(self.hosts, 2)
                 src_id, dst_id = src.id, dst.id
 
                 if i < len(self._endpoints):
@@ -154,7 +189,7 @@ class AR1HotspotWorkload(_AR1BaseWorkload):
         self._choose_hotspots()
 
     def _choose_hotspots(self):
-        self.hotspots = global_randoms.workload.sample(
+        self.hotspots = self._rng.sample(
             self.hosts, self.hotspot_count
         )
 
@@ -164,15 +199,15 @@ class AR1HotspotWorkload(_AR1BaseWorkload):
 
     def _choose_endpoints(self):
 
-        if global_randoms.workload.random() < self.hotspot_ratio:
-            src = global_randoms.workload.choice(self.hosts)
+        if self._rng.random() < self.hotspot_ratio:
+            src = self._rng.choice(self.hosts)
 
             dst_candidates = [h for h in self.hotspots if h != src]
             if dst_candidates:
-                dst = global_randoms.workload.choice(dst_candidates)
+                dst = self._rng.choice(dst_candidates)
                 return src, dst
 
-        return global_randoms.workload.sample(self.hosts, 2)
+        return self._rng.sample(self.hosts, 2)
 
 class AR1UnscheduledIncast(_AR1BaseWorkload):
     def __init__(
@@ -183,16 +218,13 @@ class AR1UnscheduledIncast(_AR1BaseWorkload):
             alpha: float = 0.9,
     ):
         super().__init__(hosts, flows_per_epoch, rate, alpha)
-        self._receiver = global_randoms.workload.choice(self.hosts)
+        self._receiver = self._rng.choice(self.hosts)
         self._choose_endpoints()
 
-    def generate(self) -> List[Flow]:
-
+    def _drift(self) -> None:
         # endpoint drift
-        if global_randoms.workload.random() > self.alpha:
-            self._receiver = global_randoms.workload.choice(self.hosts)
-
-        return super().generate()
+        if self._rng.random() > self.alpha:
+            self._receiver = self._rng.choice(self.hosts)
 
 class AR1ScheduledGroupIncast(_AR1BaseWorkload):
 
@@ -208,9 +240,10 @@ class AR1ScheduledGroupIncast(_AR1BaseWorkload):
         self.cross_ratio = cross_ratio
 
         self.groups = max(1, len(hosts) // group_size)
+        self._host_ids = [h.id for h in self.hosts]
         self._assign_groups()
 
-        self._active_group = global_randoms.workload.randrange(self.groups)
+        self._active_group = self._rng.randrange(self.groups)
         self._incast_dst = None
 
         self._endpoints = []
@@ -220,8 +253,7 @@ class AR1ScheduledGroupIncast(_AR1BaseWorkload):
         self._endpoints = []
 
         for _ in range(self.flows_per_epoch):
-            src, dst = self._draw_new_pair()
-            self._endpoints.append((src.id, dst.id))
+            self._endpoints.append(self._draw_new_pair())
 
     def _draw_new_pair(self):
         group = self._groups[self._active_group]
@@ -231,37 +263,27 @@ class AR1ScheduledGroupIncast(_AR1BaseWorkload):
 
         # choose incast destination once
         if self._incast_dst is None or \
-                global_randoms.workload.random() > self.alpha:
-            self._incast_dst = global_randoms.workload.choice(group)
+                self._rng.random() > self.alpha:
+            self._incast_dst = self._rng.choice(group)
 
         # choose source
-        if global_randoms.workload.random() < self.cross_ratio:
-            src = global_randoms.workload.choice(self.hosts)
+        if self._rng.random() < self.cross_ratio:
+            src = self._rng.choice(self._host_ids)
         else:
-            src = global_randoms.workload.choice(group)
+            src = self._rng.choice(group)
 
         return src, self._incast_dst
     def _assign_groups(self):
-        clear_prefixed_tags(self.hosts, f"{self.JOB_PREFIX}:")
-
-        shuffled = self.hosts[:]
-        global_randoms.workload.shuffle(shuffled)
-
-        chunk = len(shuffled) // self.groups
-        self._groups = []
-
-        for g in range(self.groups):
-            group_hosts = shuffled[g * chunk:(g + 1) * chunk]
-            self._groups.append(group_hosts)
-
-            for h in group_hosts:
-                add_group_tag(h, self.JOB_PREFIX, g)
+        chunk = len(self.hosts) // self.groups
+        # group members as host ids, in shuffled order
+        self._groups = assign_groups(self.hosts, self.JOB_PREFIX, self._rng, chunk, self.groups)
 
     def generate(self):
+        self._begin_epoch()
 
         # group drift
-        if global_randoms.workload.random() > self.alpha:
-            self._active_group = global_randoms.workload.randrange(self.groups)
+        if self._rng.random() > self.alpha:
+            self._active_group = self._rng.randrange(self.groups)
             self._incast_dst = None  # reset incast target
 
         flows = []
@@ -269,16 +291,15 @@ class AR1ScheduledGroupIncast(_AR1BaseWorkload):
         for i in range(self.flows_per_epoch):
 
             if i < len(self._endpoints) and \
-                    global_randoms.workload.random() < self.alpha:
+                    self._rng.random() < self.alpha:
 
                 src_id, dst_id = self._endpoints[i]
 
             else:
-                src, dst = self._draw_new_pair()
-                if src is None or dst is None:
+                src_id, dst_id = self._draw_new_pair()
+                if src_id is None or dst_id is None:
                     continue
 
-                src_id, dst_id = src.id, dst.id
                 self._endpoints[i] = (src_id, dst_id)
 
             rate = self._next_rate(i)
@@ -322,40 +343,24 @@ class AR1StrictLocalGroupWorkload(_AR1BaseWorkload):
         self._endpoints = []
 
         for _ in range(self.flows_per_epoch):
-            g = global_randoms.workload.randrange(self.groups)
+            g = self._rng.randrange(self.groups)
             group = self._group_hosts(g)
 
             if len(group) < 2:
                 continue
 
             while True:
-                src = global_randoms.workload.choice(group)
-                dst = global_randoms.workload.choice(group)
+                src = self._rng.choice(group)
+                dst = self._rng.choice(group)
                 if src != dst:
                     break
 
-            self._endpoints.append((src.id, dst.id))
+            self._endpoints.append((src, dst))
 
     def _assign_groups(self):
-        clear_prefixed_tags(self.hosts, f"{self.JOB_PREFIX}:")
-
-        shuffled = self.hosts[:]
-        global_randoms.workload.shuffle(shuffled)
-
-        self._groups = []
-
-        for g in range(self.groups):
-            start = g * self.group_size
-            end = start + self.group_size
-            group_hosts = shuffled[start:end]
-
-            if not group_hosts:
-                continue
-
-            self._groups.append(group_hosts)
-
-            for h in group_hosts:
-                add_group_tag(h, self.JOB_PREFIX, g)
+        # group members as host ids, in shuffled order
+        groups = assign_groups(self.hosts, self.JOB_PREFIX, self._rng, self.group_size, self.groups)
+        self._groups = [g for g in groups if g]
 
     # ------------------------
 
@@ -365,29 +370,28 @@ class AR1StrictLocalGroupWorkload(_AR1BaseWorkload):
     # ------------------------
 
     def generate(self) -> List[Flow]:
+        self._begin_epoch()
 
         flows: List[Flow] = []
 
         for i in range(self.flows_per_epoch):
 
             # Drift: with probability alpha keep previous endpoints
-            if i < len(self._endpoints) and global_randoms.workload.random() < self.alpha:
+            if i < len(self._endpoints) and self._rng.random() < self.alpha:
                 src_id, dst_id = self._endpoints[i]
             else:
-                g = global_randoms.workload.randrange(self.groups)
+                g = self._rng.randrange(self.groups)
                 group = self._group_hosts(g)
 
                 if len(group) < 2:
                     continue
 
                 while True:
-                    src = global_randoms.workload.choice(group)
-                    dst = global_randoms.workload.choice(group)
-                    if src != dst:
+                    src_id = self._rng.choice(group)
+                    dst_id = self._rng.choice(group)
+                    if src_id != dst_id:
                         break
 
-                src_id, dst_id = src.id, dst.id
-
                 # store new endpoints
                 if i < len(self._endpoints):
                     self._endpoints[i] = (src_id, dst_id)
@@ -0,0 +1,126 @@
+"""
+edge_history.py
+
+Ring buffer of recent per-edge load and utilisation.
+
+The last `window` epochs are kept in one contiguous (2, window, E)
+array (row 0 load, row 1 load / capacity) in reduced precision, so a
+k=32 fat-tree (~24k edges) costs ~3 MB for 16 epochs in float32.
+Appending an epoch overwrites the oldest row in place; reductions over
+the last n epochs (mean, max, EWMA, percentile) are vectorized over
+edges and computed in float64.
+
+float16 halves the memory again; it suits utilisation, but loads above
+65504 saturate to inf, so keep float32 when absolute loads matter.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+SERIES = ("load", "util")
+
+
+class EdgeHistory:
+    """
+    Last `window` epochs of per-edge load and utilisation.
+
+    Parameters
+    ----------
+    capacity : np.ndarray
+        Per-edge capacity in EpochContext.edge_list order.
+    window : int
+        Number of epochs kept.
+    dtype : numpy dtype
+        Storage type of the buffer (float32 or float16).
+    """
+
+    def __init__(self, capacity: np.ndarray, window: int = 16, dtype=np.float32) -> None:
+        if window < 1:
+            raise ValueError("History window must be at least 1")
+
+        capacity = np.asarray(capacity, dtype=np.float64)
+        self.window = window
+        self.num_edges = len(capacity)
+        self._inv_capacity = np.divide(
+            1.0, capacity, out=np.zeros_like(capacity), where=capacity > 0
+        )
+        self._data = np.zeros((len(SERIES), window, self.num_edges), dtype=dtype)
+        self.reset()
+
+    def reset(self) -> None:
+        self.epochs = 0
+        self._head = 0
+
+    def __len__(self) -> int:
+        """Epochs currently held (at most `window`)."""
+        return min(self.epochs, self.window)
+
+    # ---------------------------------------
+    # Append
+    # ---------------------------------------
+
+    def append(self, load: np.ndarray) -> None:
+        """Record one epoch of per-edge load (edge_list order)."""
+        row = self._head
+        self._data[0, row] = load
+        np.multiply(load, self._inv_capacity, out=self._data[1, row], casting="same_kind")
+
+        self._head = (row + 1) % self.window
+        self.epochs += 1
+
+    def utilisation(self, load: np.ndarray) -> np.ndarray:
+        """Per-edge utilisation of `load` as append() stores it, in float64."""
+        return (load * self._inv_capacity).astype(self._data.dtype).astype(np.float64)
+
+    # ---------------------------------------
+    # Views
+    # ---------------------------------------
+
+    def _series(self, series: str) -> np.ndarray:
+        try:
+            return self._data[SERIES.index(series)]
+        except ValueError:
+            raise ValueError(f"Unknown history series: {series} (choose from {SERIES})") from None
+
+    def _count(self, n: Optional[int]) -> int:
+        held = len(self)
+        if held == 0:
+            raise ValueError("Edge history is empty")
+        return held if n is None else max(1, min(n, held))
+
+    def last(self, series: str = "util", ago: int = 0) -> np.ndarray:
+        """Per-edge values `ago` epochs before the latest (a view into the buffer)."""
+        if ago >= len(self):
+            raise IndexError(f"History holds {len(self)} epochs, asked for {ago} ago")
+        return self._series(series)[(self._head - 1 - ago) % self.window]
+
+    def recent(self, series: str = "util", n: Optional[int] = None) -> np.ndarray:
+        """(n, E) values of the last n epochs (default all held), oldest first."""
+        n = self._count(n)
+        data = self._series(series)
+        start = (self._head - n) % self.window
+        if start + n <= self.window:
+            return data[start:start + n]
+        return np.concatenate((data[start:], data[:start + n - self.window]))
+
+    # ---------------------------------------
+    # Window reductions (float64, per edge)
+    # ---------------------------------------
+
+    def mean(self, series: str = "util", n: Optional[int] = None) -> np.ndarray:
+        return self.recent(series, n).mean(axis=0, dtype=np.float64)
+
+    def max(self, series: str = "util", n: Optional[int] = None) -> np.ndarray:
+        return self.recent(series, n).max(axis=0).astype(np.float64)
+
+    def percentile(self, q: float, series: str = "util", n: Optional[int] = None) -> np.ndarray:
+        return np.percentile(self.recent(series, n).astype(np.float64), q, axis=0)
+
+    def ewma(self, alpha: float, series: str = "util", n: Optional[int] = None) -> np.ndarray:
+        """Exponentially weighted mean, weight (1 - alpha)^age normalised over the window."""
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError("EWMA alpha must be in (0, 1]")
+        rows = self.recent(series, n)
+        weights = (1.0 - alpha) ** np.arange(len(rows) - 1, -1, -1, dtype=np.float64)
+        return weights @ rows.astype(np.float64) / weights.sum()
@@ -0,0 +1,267 @@
+"""
+epoch_parallel.py
+
+Epoch-parallel execution for open-loop congestion models.
+
+With congestion_uniform / congestion_ar1 the congestion of epoch t does
+not depend on routing results, so the driver can produce every epoch's
+congestion snapshot and flows up front. What still links epochs is
+routing state: policies keep DAGs (and DRILL / CONGA per-pair choices)
+until their engine sees a weight change above rel_threshold, then clear
+them. A segment run by a pool worker with freshly built policies matches
+the serial loop if, at its first epoch, every policy either
+
+    - has static weights and no pair state: its DAGs do not depend on
+      when they were computed, so any epoch is a cut;
+    - has dynamic weights and no pair state, in full search mode with
+      unbounded route caches: the driver ships, for each source cached
+      since the last clear, the congestion snapshot of the epoch its DAG
+      was computed in, and the worker's engine computes that source's
+      DAG under it on first use (ShortestPathEngine.pin); or
+    - clears its caches in that epoch.
+
+The driver ticks throwaway policies' engines to find cuts and splits the
+run into about one segment per worker: cuts closer to the previous one
+than that stay inside a segment, where the worker's own engines clear as
+the serial loop's do. Engines start from the probes' last weights (the
+change test compares against them, and epoch_tick stops updating them at
+the first changed edge). Results come back in epoch order and the
+metrics are fed in that order, so the outcome equals the serial loop.
+
+Requirements: keyed random streams (multipath draws of epoch t must not
+depend on earlier epochs), no failure injection, and policies with an
+`engine`. Schedules with DRILL or CONGA cut only where those policies
+clear, which with the default uniform / ar1 parameters (congestion of at
+most 1 on capacity-100 links) never happens; such runs are one segment.
+"""
+
+import multiprocessing as mp
+from collections import deque
+from typing import Dict, List, Optional
+
+import networkx as nx
+
+import global_randoms
+from Components.routing import dag_store, search
+from Components.routing.configurations import POLICY_BUILDERS
+from Components.workloads.congestion import CongestionType, bind
+from Components.workloads.workload import Workload
+from Simulation.metrics.metric import Metric
+from Simulation.metrics.sparse import edge_load_array
+from Simulation.recorder import EpochRecorder
+from Simulation.run_epoch import run_epoch
+from Simulation.steady_state import SteadyStateDetector
+from global_randoms import set_epoch
+
+# Inherited by forked workers: static topology arrays and the schedule
+_worker_state: Dict = {}
+
+
+def check_parallel(congestion: CongestionType, failures) -> None:
+    """Raise ValueError if the run cannot be split into epoch segments."""
+    if not getattr(congestion, "open_loop", False):
+        raise ValueError("Epoch-parallel runs need an open-loop congestion model (uniform, ar1)")
+    if failures is not None:
+        raise ValueError("Epoch-parallel runs do not support failure injection")
+    if global_randoms.mode != "keyed":
+        raise ValueError("Epoch-parallel runs need keyed random streams (--rng keyed)")
+
+
+def _cut_mode(policy) -> str:
+    """
+    Where a policy lets the driver cut the run:
+
+        "any"    every epoch (static weights, no pair state)
+        "pin"    every epoch, shipping snapshots for its cached sources
+        "clear"  only epochs where it clears its caches
+    """
+    if getattr(policy, "pair_state", False):
+        return "clear"
+    if policy.engine.static:
+        return "any"
+    caches = getattr(policy, "caches", [policy.cache])
+    if search.mode() == "full" and all(c.max_entries is None and c.max_bytes is None for c in caches):
+        return "pin"
+    return "clear"
+
+
+def _routed(flows) -> bool:
+    # run_epoch calls the policies for these flows only
+    return any(flow.rate > 0 and flow.src != flow.dst for flow in flows)
+
+
+def _run_segment(job):
+    """Run consecutive epochs from a cut with fresh policies."""
+    start, last_weights, pins, epochs = job
+    ctx = _worker_state["ctx"]
+    routing_schedule = [POLICY_BUILDERS[name](ctx) for name in _worker_state["policy_names"]]
+    for policy, last_w, pinned in zip(routing_schedule, last_weights, pins):
+        policy.engine.last_w = last_w
+        for src, (cong, stale) in pinned.items():
+            policy.engine.pin(src, cong, stale)
+
+    results = []
+    for offset, (cong, stale, flows) in enumerate(epochs):
+        ctx.congestion[:] = cong
+        ctx.stale_congestion[:] = stale
+        set_epoch(start + offset)
+
+        for policy in routing_schedule:
+            tick = getattr(policy, "epoch_tick", None)
+            if tick:
+                tick()
+
+        # policies clearing their caches this epoch drop the earlier DAGs
+        if _routed(flows):
+            for policy in routing_schedule:
+                if policy.engine.changed:
+                    policy.engine.pins.clear()
+
+        results.append(run_epoch(flows=flows, routing_schedule=routing_schedule, ctx=ctx))
+
+    dag_store.flush_all()
+    return results
+
+
+def run_epochs_parallel(
+    *,
+    topology: nx.Graph,
+    metrics: List[Metric],
+    congestion: CongestionType,
+    workload: Workload,
+    epochs: int,
+    ctx,
+    policy_names: List[str],
+    recorder: Optional[EpochRecorder],
+    steady_state: Optional[SteadyStateDetector],
+    telemetry,
+    processes: int,
+) -> Dict:
+    """
+    Run `epochs` epochs on `processes` workers; returns segment stats.
+
+    Metrics, recorder, steady-state detector, telemetry and ctx.history
+    are fed in the driver, in epoch order.
+    """
+    # only ticked: their engines' change flags mark the clears
+    probes = []
+    modes = []
+    for name in policy_names:
+        policy = POLICY_BUILDERS[name](ctx)
+        if getattr(policy, "engine", None) is None:
+            raise ValueError(f"Policy {name} has no engine; cannot find epoch-parallel cut points")
+        probes.append(policy.engine)
+        modes.append(_cut_mode(policy))
+
+    _worker_state["ctx"] = ctx
+    _worker_state["policy_names"] = list(policy_names)
+
+    step_congestion = bind(congestion, ctx)
+    # segments shorter than this run on past their next cut
+    min_segment = -(-epochs // processes)
+    pool = mp.get_context("fork").Pool(processes)
+    pending = deque()
+    segment: List = []
+    segment_start = 0
+    # probe weights before the tick of segment_start, pinned sources
+    segment_weights = [{} for _ in probes]
+    segment_pins = [{} for _ in probes]
+    # "pin" policies: source -> epoch of its cached DAG; snapshots by epoch
+    first_use = [{} for _ in probes]
+    snapshots = {}
+    segments = 0
+    done = 0
+    stop = False
+
+    def submit():
+        nonlocal segment, segments
+        if segment:
+            job = (segment_start, segment_weights, segment_pins, segment)
+            pending.append(pool.apply_async(_run_segment, (job,)))
+            segments += 1
+            segment = []
+
+    def drain(block_until: int):
+        # consume finished segments in order until at most block_until are pending
+        nonlocal done, stop
+        while pending and (len(pending) > block_until or pending[0].ready()):
+            for epoch_result in pending.popleft().get():
+                epoch = done
+                done += 1
+                for m in metrics:
+                    m.process(epoch_result)
+                if steady_state is not None:
+                    steady_state.process(epoch_result, ctx)
+                ctx.history.append(edge_load_array(epoch_result))
+                if telemetry is not None:
+                    telemetry.observe_metrics(metrics)
+                if recorder is not None:
+                    recorder.record(epoch, epoch_result, ctx)
+                if telemetry is not None:
+                    telemetry.epoch_done(epoch)
+                if steady_state is not None and steady_state.converged:
+                    stop = True
+                    return
+
+    try:
+        for epoch in range(epochs):
+            set_epoch(epoch)
+            step_congestion(topology, None)
+
+            # the next segment's engines start from these if this epoch cuts
+            can_cut = len(segment) >= min_segment
+            if can_cut:
+                last_weights = [dict(engine.last_w) for engine in probes]
+
+            for engine in probes:
+                engine.epoch_tick()
+
+            flows = workload.generate()
+            snapshot = (ctx.congestion.copy(), ctx.stale_congestion.copy())
+
+            # policies clear their caches on the first route of this epoch
+            routed = _routed(flows)
+            clears = [routed and engine.changed for engine in probes]
+
+            if can_cut and all(mode != "clear" or cleared for mode, cleared in zip(modes, clears)):
+                submit()
+                segment_start = epoch
+                segment_weights = last_weights
+                segment_pins = [
+                    {} if mode != "pin" or cleared else {src: snapshots[e] for src, e in uses.items()}
+                    for mode, cleared, uses in zip(modes, clears, first_use)
+                ]
+                drain(block_until=2 * processes)
+                if stop:
+                    break
+
+            if "pin" in modes and routed:
+                first = False
+                for mode, cleared, uses in zip(modes, clears, first_use):
+                    if mode != "pin":
+                        continue
+                    if cleared:
+                        uses.clear()
+                    for flow in flows:
+                        if flow.rate > 0 and flow.src != flow.dst and flow.src not in uses:
+                            uses[flow.src] = epoch
+                            first = True
+                if any(clears):
+                    live = set()
+                    for uses in first_use:
+                        live.update(uses.values())
+                    snapshots = {e: snap for e, snap in snapshots.items() if e in live}
+                if first:
+                    snapshots[epoch] = snapshot
+
+            segment.append((*snapshot, flows))
+
+        if not stop:
+            submit()
+            drain(block_until=0)
+    finally:
+        pool.terminate()
+        pool.join()
+        _worker_state.clear()
+
+    return {"processes": processes, "segments": segments, "epochs": done}
@@ -1,7 +1,51 @@
+from collections.abc import Mapping
 from dataclasses import dataclass
-from typing import Dict, Tuple, List, Hashable
+from typing import Dict, Tuple, List, Hashable, Optional
+
+import numpy as np
+
 from Components.topology.topology_types import Edge, Node
 
+
+class ArrayMapping(Mapping):
+    """
+    Read-only {key: float} view over an array, keys in array order.
+
+    Building one is O(1); run_epoch returns per-edge / per-switch values
+    this way so an epoch never builds a dict entry per edge. Lookups go
+    through `index` (key -> position), which may also map keys that are
+    not in `keys` (e.g. reversed edges); those are treated as missing.
+    """
+
+    __slots__ = ("_keys", "_index", "_values")
+
+    def __init__(self, keys: List[Hashable], index: Dict[Hashable, int], values: np.ndarray) -> None:
+        self._keys = keys
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, key) -> float:
+        i = self._index.get(key)
+        if i is None or self._keys[i] != key:
+            raise KeyError(key)
+        return float(self._values[i])
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key) -> bool:
+        i = self._index.get(key)
+        return i is not None and self._keys[i] == key
+
+    def items(self):
+        return zip(self._keys, self._values.tolist())
+
+    def values(self):
+        return self._values.tolist()
+
 @dataclass(slots=True)
 class EpochResult:
     """
@@ -15,13 +59,13 @@ class EpochResult:
     # Link statistics (core)
 
     # total traffic sent through each edge (bytes or rate)
-    edge_load: Dict[Edge, float]
+    edge_load: Mapping[Edge, float]
 
     # static capacity (copied once for convenience)
-    edge_capacity: Dict[Edge, float]
+    edge_capacity: Mapping[Edge, float]
 
     # overflow traffic
-    edge_dropped: Dict[Edge, float]
+    edge_dropped: Mapping[Edge, float]
 
     # Flow statistics
 
@@ -36,8 +80,8 @@ class EpochResult:
 
     # Switch statistics
 
-    switch_load: Dict[Node, float]
-    switch_capacity: Dict[Node, float]
+    switch_load: Mapping[Node, float]
+    switch_capacity: Mapping[Node, float]
 
     # Summary
 
@@ -45,4 +89,55 @@ class EpochResult:
     total_sent: float
 
     # total traffic dropped
-    total_dropped: float
\ No newline at end of file
+    total_dropped: float
+
+    # Vector views (optional)
+
+    # per-edge load / dropped indexed like EpochContext.edge_list
+    edge_load_array: Optional[np.ndarray] = None
+    edge_dropped_array: Optional[np.ndarray] = None
+    edge_capacity_array: Optional[np.ndarray] = None
+
+    # sorted ids of the edges that carried traffic this epoch; every
+    # other edge has zero load and zero drops
+    active_edges: Optional[np.ndarray] = None
+
+    # per-node load / capacity in EpochContext.switch_nodes order, and
+    # the sorted positions with non-zero load
+    switch_load_array: Optional[np.ndarray] = None
+    switch_capacity_array: Optional[np.ndarray] = None
+    active_switches: Optional[np.ndarray] = None
+
+    # Streaming epochs (run_epoch chunk_size)
+
+    # the per-flow lists above are empty; per-flow values went to the
+    # metrics' process_flows() chunk by chunk, totals are kept here
+    streamed: bool = False
+    flow_count: Optional[int] = None
+    flow_latency_sum: Optional[float] = None
+
+    def num_flows(self) -> int:
+        """Routed (flow, policy) paths this epoch."""
+        return self.flow_count if self.streamed else len(self.flow_latency)
+
+    def latency_sum(self) -> float:
+        return self.flow_latency_sum if self.streamed else sum(self.flow_latency)
+
+
+@dataclass(slots=True)
+class FlowChunk:
+    """
+    Per-flow results of one chunk of a streaming epoch.
+
+    One entry per (flow, policy) path, in routing order: path i uses
+    edges eids[offsets[i]:offsets[i + 1]] and delivered rates[i] at
+    latency[i].
+    """
+
+    eids: np.ndarray
+    offsets: np.ndarray
+    rates: np.ndarray
+    latency: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.rates)
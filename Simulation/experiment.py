@@ -0,0 +1,142 @@
+"""
+experiment.py
+
+Build and run one configuration from main.py-style arguments.
+
+Shared by main.py (single run) and the replication runner, so that a
+replication with seed s is exactly `python main.py ... --seed s`.
+"""
+
+from argparse import Namespace
+from typing import Dict, List, Optional, Tuple
+
+import networkx as nx
+
+from Components.host import Host, generate_hosts
+from Components.routing import bfs, cache, dag_store, kernels, search
+from Components.routing.configurations import policy_configuration
+from Components.topology.configuration import topology_configuration
+from Components.workloads.configuration import congestion_configuration, workload_configuration
+from Components.workloads.workload import Workload
+from Simulation.failures import FailureInjector, FailureSchedule
+from Simulation.metrics.metric import AllMetrics
+from Simulation.recorder import EpochRecorder
+from Simulation.run_simulation import run_simulation
+from Simulation.steady_state import SteadyStateDetector
+from Simulation.telemetry import Telemetry
+from global_randoms import reset_randoms, set_mode
+
+
+def configure(args: Namespace) -> str:
+    """
+    Apply process-wide settings (route cache bounds, DAG store, search
+    mode, BFS batching, kernel backend); returns the backend.
+    """
+    cache.configure(
+        max_entries=args.route_cache_entries,
+        max_bytes=int(args.route_cache_mb * 2**20) if args.route_cache_mb is not None else None,
+    )
+    dag_store.configure(args.dag_store)
+    search.configure(args.search, landmarks=args.landmarks)
+    bfs.configure(args.bfs_batch)
+    return kernels.set_backend(args.kernels)
+
+
+def build_workload(args: Namespace, hosts: List[Host]) -> Workload:
+    workload_cls = workload_configuration[args.workload]
+    workload_kwargs = {"trace_path": args.trace} if args.trace else {}
+    return workload_cls(
+        hosts,
+        flows_per_epoch=args.flows,
+        rate=args.rate,
+        alpha=args.alpha,
+        **workload_kwargs,
+    )
+
+
+def build_topology(args: Namespace, hosts: List[Host]) -> nx.Graph:
+    topology = topology_configuration[args.topology](hosts)
+    for _, _, data in topology.edges(data=True):
+        data.setdefault("congestion", 0.0)
+        data.setdefault("stale_congestion", 0.0)
+    return topology
+
+
+def build_failures(args: Namespace, topology: nx.Graph):
+    if args.failures:
+        return FailureInjector(FailureSchedule.from_json(args.failures))
+    if args.fail_mtbf:
+        return FailureInjector(FailureSchedule.random_mtbf(
+            topology, args.epochs, mtbf=args.fail_mtbf, mttr=args.fail_mttr, kind=args.fail_kind,
+        ))
+    return None
+
+
+def start_telemetry(args: Namespace) -> Optional[Telemetry]:
+    if not args.telemetry:
+        return None
+    telemetry = Telemetry(args.telemetry, interval=args.telemetry_interval)
+    print(f"Telemetry: {telemetry.url}")
+    return telemetry
+
+
+def run_experiment(args: Namespace, telemetry: Optional[Telemetry] = None) -> Tuple[Dict[str, float], Dict]:
+    """
+    Seed every random stream with args.seed, build hosts, workload and
+    topology, and run the simulation.
+
+    Returns (results, report); report is run_simulation's diagnostics.
+    A telemetry endpoint is opened for the run if args.telemetry is set,
+    unless the caller passes one it keeps open across runs.
+    """
+    set_mode(args.rng)
+    reset_randoms(args.seed)
+
+    hosts = generate_hosts(args.hosts)
+    print(f"Generated {len(hosts)} hosts")
+
+    workload = build_workload(args, hosts)
+
+    topology = build_topology(args, hosts)
+    print(f"Graph: {topology.number_of_nodes()} nodes, {topology.number_of_edges()} edges")
+
+    failures = build_failures(args, topology)
+
+    recorder = None
+    if args.record:
+        recorder = EpochRecorder(args.record, metadata=vars(args))
+
+    steady_state = None
+    if args.steady_state:
+        steady_state = SteadyStateDetector(
+            args.epochs,
+            series=args.ss_series or ("drop_ratio", "mean_latency"),
+            tolerance=args.ss_tolerance,
+            min_epochs=args.ss_min_epochs,
+        )
+
+    own_telemetry = telemetry is None
+    if own_telemetry:
+        telemetry = start_telemetry(args)
+
+    report = {}
+    try:
+        results = run_simulation(
+            topology=topology,
+            metrics=[AllMetrics(windowed=args.windowed_util)],
+            congestion=congestion_configuration[args.congestion](),
+            policy_names=policy_configuration[args.policy],
+            workload=workload,
+            epochs=args.epochs,
+            report=report,
+            recorder=recorder,
+            failures=failures,
+            steady_state=steady_state,
+            telemetry=telemetry,
+            epoch_processes=args.epoch_processes,
+            flow_chunk=args.flow_chunk,
+        )
+    finally:
+        if own_telemetry and telemetry is not None:
+            telemetry.close()
+    return results, report
@@ -0,0 +1,231 @@
+"""
+failures.py
+
+Link and switch failure injection.
+
+A FailureSchedule lists per-epoch down/up events. The FailureInjector
+applies them to the EpochContext by masking edges in ctx.edge_up (the
+topology and context are never rebuilt) and asks every policy to patch
+its cached routes through policy.on_links_changed(). Per event it
+reports the recovery cost and the drop-ratio impact.
+"""
+
+import json
+import time
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional
+
+import networkx as nx
+import numpy as np
+
+import global_randoms
+from Simulation.epoch_result import EpochResult
+
+
+@dataclass(slots=True)
+class FailureEvent:
+    epoch: int
+    kind: str           # "link" | "switch"
+    target: Hashable    # (u, v) for links, node for switches
+    up: bool = False    # False = fail, True = recover
+
+    def describe(self) -> str:
+        state = "up" if self.up else "down"
+        return f"{self.kind} {self.target} {state}"
+
+
+class FailureSchedule:
+    """Ordered collection of FailureEvents."""
+
+    def __init__(self, events: Optional[List[FailureEvent]] = None) -> None:
+        self.events = sorted(events or [], key=lambda e: e.epoch)
+        self._by_epoch: Dict[int, List[FailureEvent]] = {}
+        for event in self.events:
+            self._by_epoch.setdefault(event.epoch, []).append(event)
+
+    def events_at(self, epoch: int) -> List[FailureEvent]:
+        return self._by_epoch.get(epoch, [])
+
+    @classmethod
+    def from_json(cls, path: str) -> "FailureSchedule":
+        """
+        Load events from a JSON list, e.g.
+
+            [{"epoch": 3, "kind": "link", "target": ["a_0_0", "c_0"]},
+             {"epoch": 8, "kind": "link", "target": ["a_0_0", "c_0"], "up": true},
+             {"epoch": 5, "kind": "switch", "target": "e_1_0"}]
+        """
+        with open(path) as f:
+            raw = json.load(f)
+
+        events = []
+        for e in raw:
+            target = tuple(e["target"]) if e["kind"] == "link" else e["target"]
+            events.append(FailureEvent(e["epoch"], e["kind"], target, e.get("up", False)))
+        return cls(events)
+
+    @classmethod
+    def random_mtbf(
+        cls,
+        topology: nx.Graph,
+        epochs: int,
+        *,
+        mtbf: float,
+        mttr: float,
+        kind: str = "link",
+        include_host_links: bool = False,
+    ) -> "FailureSchedule":
+        """
+        Independent failures drawn from global_randoms.failures.
+
+        Every element fails with probability 1/mtbf per epoch while up and
+        recovers with probability 1/mttr per epoch while down. Host access
+        links (and hosts) are excluded unless include_host_links is set.
+        """
+        rng = global_randoms.failures
+
+        def is_host(n):
+            return topology.nodes[n].get("type") == "host"
+
+        if kind == "link":
+            targets = [
+                (u, v) for u, v in topology.edges()
+                if include_host_links or not (is_host(u) or is_host(v))
+            ]
+        elif kind == "switch":
+            targets = [n for n in topology.nodes() if not is_host(n)]
+        else:
+            raise ValueError(f"Unknown failure kind: {kind}")
+
+        events = []
+        down = set()
+        for epoch in range(epochs):
+            for target in targets:
+                if target in down:
+                    if rng.random() < 1.0 / mttr:
+                        down.discard(target)
+                        events.append(FailureEvent(epoch, kind, target, up=True))
+                elif rng.random() < 1.0 / mtbf:
+                    down.add(target)
+                    events.append(FailureEvent(epoch, kind, target, up=False))
+
+        return cls(events)
+
+
+class FailureInjector:
+    """
+    Apply a FailureSchedule during run_simulation().
+
+    apply()   -> before routing an epoch: mask edges, patch route caches
+    observe() -> after the epoch: record drops for impact reporting
+    report()  -> per-event recovery cost and metric impact
+    """
+
+    def __init__(self, schedule: FailureSchedule, impact_window: int = 3) -> None:
+        self.schedule = schedule
+        self.impact_window = impact_window
+        self.reset()
+
+    def reset(self) -> None:
+        self._down_count = None
+        self._drop_ratio: List[float] = []
+        self._records: List[Dict] = []
+        self._pending: Optional[Dict] = None
+        self._pending_schedule: List = []
+        self._pending_calls = 0
+        self._pending_seconds = 0.0
+
+    def _eids(self, ctx, event: FailureEvent) -> List[int]:
+        if event.kind == "link":
+            u, v = event.target
+            return [ctx.edge_id[(u, v)]]
+        return [eid for _, eid in ctx.adj[event.target]]
+
+    def apply(self, epoch: int, ctx, routing_schedule: List) -> None:
+        events = self.schedule.events_at(epoch)
+        if self._down_count is None:
+            self._down_count = np.zeros(len(ctx.edge_list), dtype=np.int32)
+        if not events:
+            self._pending = None
+            return
+
+        # an edge is down while any link/switch event holds it down
+        was_up = self._down_count == 0
+        for event in events:
+            self._down_count[self._eids(ctx, event)] += 1 if not event.up else -1
+        np.maximum(self._down_count, 0, out=self._down_count)
+
+        now_up = self._down_count == 0
+        down_eids = np.flatnonzero(was_up & ~now_up).tolist()
+        up_eids = np.flatnonzero(~was_up & now_up).tolist()
+        ctx.edge_up[:] = now_up
+
+        repaired = invalidated = cached = 0
+        full_estimate = recompute_estimate = 0.0
+
+        t0 = time.perf_counter()
+        for policy in routing_schedule:
+            handler = getattr(policy, "on_links_changed", None)
+            if handler is None:
+                continue
+
+            engine = policy.engine
+            per_dag = engine.dag_seconds / engine.dag_calls if engine.dag_calls else 0.0
+            sources = sum(1 for key in policy.cache.keys() if not isinstance(key, tuple))
+            cached += sources
+            full_estimate += sources * per_dag
+
+            r, i = handler(down_eids, up_eids)
+            repaired += r
+            invalidated += i
+            # invalidated sources are recomputed lazily at route time
+            recompute_estimate += i * per_dag
+        repair_seconds = time.perf_counter() - t0
+
+        self._pending = {
+            "epoch": epoch,
+            "events": [e.describe() for e in events],
+            "edges_down": len(down_eids),
+            "edges_up": len(up_eids),
+            "cached_sources": cached,
+            "repaired_sources": repaired,
+            "invalidated_sources": invalidated,
+            "repair_seconds": repair_seconds,
+            "recompute_seconds_est": recompute_estimate,
+            "recovery_seconds_est": repair_seconds + recompute_estimate,
+            "full_recompute_seconds_est": full_estimate,
+        }
+        self._pending_schedule = routing_schedule
+        self._pending_calls, self._pending_seconds = self._dag_work(routing_schedule)
+
+    @staticmethod
+    def _dag_work(routing_schedule):
+        # (Dijkstra calls, seconds) so far over the schedule's engines
+        engines = [policy.engine for policy in routing_schedule if getattr(policy, "engine", None) is not None]
+        return sum(e.dag_calls for e in engines), sum(e.dag_seconds for e in engines)
+
+    def observe(self, epoch: int, epoch_result: EpochResult) -> None:
+        sent = epoch_result.total_sent
+        ratio = epoch_result.total_dropped / sent if sent else 0.0
+        self._drop_ratio.append(ratio)
+
+        pending = self._pending
+        if pending is None:
+            return
+
+        # Dijkstra runs in the failure epoch (invalidated sources + ordinary misses)
+        calls, seconds = self._dag_work(self._pending_schedule)
+        pending["epoch_dijkstra_calls"] = calls - self._pending_calls
+        pending["epoch_dijkstra_seconds"] = seconds - self._pending_seconds
+
+        before = self._drop_ratio[-1 - self.impact_window:-1]
+        baseline = sum(before) / len(before) if before else 0.0
+        pending["drop_ratio"] = ratio
+        pending["drop_ratio_before"] = baseline
+        pending["drop_ratio_delta"] = ratio - baseline
+
+        self._records.append(pending)
+        self._pending = None
+
+    def report(self) -> List[Dict]:
+        return list(self._records)
@@ -0,0 +1,304 @@
+"""
+jobqueue.py
+
+SQLite job queue for sweeps on machines that share a filesystem.
+
+The sweep grid is written to one database file; any number of
+`main.py --worker --queue PATH` processes, on any machine that can see
+the file, claim jobs atomically, heartbeat while running, and write the
+results back. A job whose worker stops heartbeating for `lease` seconds
+is requeued by the next claim. No network service is involved: SQLite's
+file locking is the only coordination, so the database must live on a
+filesystem with working POSIX locks (rollback journal, not WAL, because
+WAL needs shared memory on one host).
+
+Schema:
+    jobs(id, job_key, config, status, attempts, worker, claimed_at,
+         heartbeat, finished_at, seconds, error, results)
+status: pending -> running -> done | failed (after max_attempts)
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+from argparse import Namespace
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          INTEGER PRIMARY KEY,
+    job_key     TEXT UNIQUE NOT NULL,
+    config      TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    worker      TEXT,
+    claimed_at  REAL,
+    heartbeat   REAL,
+    finished_at REAL,
+    seconds     REAL,
+    error       TEXT,
+    results     TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, id);
+"""
+
+STATUSES = ("pending", "running", "done", "failed")
+
+
+def job_key(config: Dict) -> str:
+    """Stable identity of a job configuration (resubmitting is a no-op)."""
+    blob = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@dataclass(slots=True)
+class Job:
+    id: int
+    config: Dict
+    attempts: int
+
+
+class JobQueue:
+    """
+    Claim / heartbeat / complete jobs in a shared SQLite file.
+
+    Every state change is a single short IMMEDIATE transaction, so any
+    number of processes can use the same file concurrently.
+    """
+
+    def __init__(self, path: str, lease: float = 120.0, max_attempts: int = 3, timeout: float = 60.0) -> None:
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    # ---------------------------------------
+    # Coordinator side
+    # ---------------------------------------
+
+    def submit(self, configs: Iterable[Dict]) -> int:
+        """Add jobs; configurations already in the queue are skipped. Returns the number added."""
+        rows = [(job_key(c), json.dumps(c, sort_keys=True, default=str)) for c in configs]
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO jobs (job_key, config) VALUES (?, ?)", rows)
+            return conn.total_changes - before
+
+    def retry_failed(self) -> int:
+        """Put failed jobs back to pending with a fresh attempt budget."""
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'pending', attempts = 0, worker = NULL, error = NULL "
+                "WHERE status = 'failed'"
+            )
+            return cur.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        counts = dict.fromkeys(STATUSES, 0)
+        for status, n in self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+            counts[status] = n
+        return counts
+
+    def workers(self) -> List[Dict]:
+        """Workers currently holding a job, with seconds since their last heartbeat."""
+        now = time.time()
+        return [
+            {"worker": worker, "job": job_id, "since_heartbeat": now - heartbeat}
+            for worker, job_id, heartbeat in self.conn.execute(
+                "SELECT worker, id, heartbeat FROM jobs WHERE status = 'running' ORDER BY worker"
+            )
+        ]
+
+    def finished(self) -> List[Dict]:
+        """Config and results of every completed job."""
+        return [
+            {"id": job_id, "config": json.loads(config), "results": json.loads(results),
+             "worker": worker, "seconds": seconds}
+            for job_id, config, results, worker, seconds in self.conn.execute(
+                "SELECT id, config, results, worker, seconds FROM jobs WHERE status = 'done' ORDER BY id"
+            )
+        ]
+
+    # ---------------------------------------
+    # Worker side
+    # ---------------------------------------
+
+    def requeue_stale(self) -> int:
+        """Return running jobs whose worker stopped heartbeating to the queue."""
+        cutoff = time.time() - self.lease
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', worker = NULL, error = 'worker lost (lease expired)' "
+                "WHERE status = 'running' AND heartbeat < ? AND attempts >= ?",
+                (cutoff, self.max_attempts),
+            )
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'pending', worker = NULL "
+                "WHERE status = 'running' AND heartbeat < ?",
+                (cutoff,),
+            )
+            return cur.rowcount
+
+    def claim(self, worker: str) -> Optional[Job]:
+        """Atomically take the oldest pending job, or None if there is none."""
+        self.requeue_stale()
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id, config, attempts FROM jobs WHERE status = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, config, attempts = row
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, "
+                "claimed_at = ?, heartbeat = ?, error = NULL WHERE id = ?",
+                (worker, now, now, job_id),
+            )
+        return Job(job_id, json.loads(config), attempts + 1)
+
+    def heartbeat(self, job_id: int, worker: str) -> bool:
+        """Extend the lease; False if the job is no longer ours (it was requeued)."""
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time(), job_id, worker),
+            )
+            return cur.rowcount == 1
+
+    def complete(self, job_id: int, worker: str, results: Dict[str, float], seconds: float) -> bool:
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = 'done', results = ?, finished_at = ?, seconds = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (json.dumps(results), time.time(), seconds, job_id, worker),
+            )
+            return cur.rowcount == 1
+
+    def fail(self, job_id: int, worker: str, error: str) -> None:
+        """Record an error; the job is retried until max_attempts, then marked failed."""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "worker = NULL, error = ?, finished_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (self.max_attempts, error, time.time(), job_id, worker),
+            )
+
+
+class _Heartbeat(threading.Thread):
+    """Background lease renewal (own connection: sqlite3 objects are per thread)."""
+
+    def __init__(self, path: str, job_id: int, worker: str, every: float, lease: float) -> None:
+        super().__init__(daemon=True)
+        self.path = path
+        self.job_id = job_id
+        self.worker = worker
+        self.every = every
+        self.lease = lease
+        self.lost = False
+        self._halt = threading.Event()
+
+    def run(self) -> None:
+        with JobQueue(self.path, lease=self.lease) as queue:
+            while not self._halt.wait(self.every):
+                try:
+                    if not queue.heartbeat(self.job_id, self.worker):
+                        self.lost = True
+                        return
+                except sqlite3.OperationalError:
+                    # transient lock contention; the lease tolerates a missed beat
+                    continue
+
+    def stop(self) -> None:
+        self._halt.set()
+        self.join()
+
+
+def run_worker(
+    path: str,
+    run_job: Callable[[Namespace], Dict[str, float]],
+    *,
+    worker: Optional[str] = None,
+    lease: float = 120.0,
+    heartbeat_every: float = 20.0,
+    poll: float = 10.0,
+    max_jobs: Optional[int] = None,
+    on_done: Optional[Callable[[Job, Dict[str, float]], None]] = None,
+) -> int:
+    """
+    Claim and run jobs until the queue is drained; returns jobs completed.
+
+    run_job(Namespace(**config)) must return the metric results. While
+    other workers still hold running jobs this worker keeps polling, so
+    it can pick up their jobs if they die.
+    """
+    worker = worker or default_worker_id()
+    done = 0
+
+    with JobQueue(path, lease=lease) as queue:
+        while max_jobs is None or done < max_jobs:
+            job = queue.claim(worker)
+            if job is None:
+                if queue.counts()["running"] == 0:
+                    break
+                time.sleep(poll)
+                continue
+
+            print(f"[worker {worker}] job {job.id} (attempt {job.attempts}): "
+                  f"{job.config.get('topology')} {job.config.get('workload')} "
+                  f"{job.config.get('policy')} r{job.config.get('rate')}", flush=True)
+
+            beat = _Heartbeat(path, job.id, worker, heartbeat_every, lease)
+            beat.start()
+            t0 = time.perf_counter()
+            try:
+                results = run_job(Namespace(**job.config))
+            except Exception:
+                beat.stop()
+                queue.fail(job.id, worker, traceback.format_exc())
+                continue
+            beat.stop()
+
+            if beat.lost or not queue.complete(job.id, worker, results, time.perf_counter() - t0):
+                print(f"[worker {worker}] lost job {job.id} to another worker", flush=True)
+                continue
+
+            done += 1
+            if on_done is not None:
+                on_done(job, results)
+
+    return done
@@ -0,0 +1,81 @@
+"""
+kernels.py
+
+Compiled kernels for run_epoch Phase 1 / 3.
+
+Same contract as the routing kernels (Components/routing/kernels.py):
+compiled with Numba's @njit when installed, step-for-step equal to the
+pure-Python paths, and used by run_epoch only while enabled(), i.e.
+while that module's backend (set_backend there) is "numba".
+"""
+
+import numpy as np
+
+from Components.routing.kernels import enabled, njit
+
+
+@njit
+def accumulate_loads(flat_eids, offsets, rates, latency, edge_load):
+    """Add each path's rate to its edges; return per-path latency."""
+    n_paths = len(offsets) - 1
+    path_latency = np.zeros(n_paths)
+
+    for i in range(n_paths):
+        rate = rates[i]
+        total = 0.0
+        for k in range(offsets[i], offsets[i + 1]):
+            e = flat_eids[k]
+            edge_load[e] += rate
+            total += latency[e]
+        path_latency[i] = total
+
+    return path_latency
+
+
+@njit
+def deliver(flat_eids, offsets, offered, routed, edge_util, k, edge_dropped):
+    """
+    Delivered rate per path and dropped traffic per edge.
+
+    Mirrors run_epoch Phase 3: a path delivers offered / max_util when
+    its bottleneck is over capacity, drops are shared equally by its
+    edges, and unrouted flows drop everything.
+    """
+    n_paths = len(offsets) - 1
+    flow_rates = np.empty(n_paths)
+    total_dropped = 0.0
+
+    for i in range(n_paths):
+        start = offsets[i]
+        end = offsets[i + 1]
+
+        if not routed[i]:
+            flow_rates[i] = 0.0
+            total_dropped += offered[i]
+            continue
+
+        if end == start:
+            flow_rates[i] = offered[i]
+            continue
+
+        util = edge_util[flat_eids[start]]
+        for j in range(start + 1, end):
+            if edge_util[flat_eids[j]] > util:
+                util = edge_util[flat_eids[j]]
+
+        if util <= 1.0:
+            delivered = offered[i]
+            dropped = 0.0
+        else:
+            delivered = offered[i] / util
+            dropped = offered[i] - delivered
+
+        flow_rates[i] = delivered * k
+        total_dropped += dropped
+
+        if dropped > 0.0:
+            share = dropped / (end - start)
+            for j in range(start, end):
+                edge_dropped[flat_eids[j]] += share
+
+    return flow_rates, total_dropped
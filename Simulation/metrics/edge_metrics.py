@@ -1,5 +1,10 @@
 import math
 
+import numpy as np
+
+from Simulation.edge_history import EdgeHistory
+from Simulation.metrics.sparse import edge_capacity_array, edge_load_array, edge_loads, edge_utils
+
 
 class EdgeUtilization:
     def __init__(self):
@@ -13,14 +18,18 @@ class EdgeUtilization:
         self.max_util = 0.0
 
     def process(self, epoch):
-        for e, load in epoch.edge_load.items():
-            cap = epoch.edge_capacity.get(e, 0.0)
-            if cap > 0:
-                util = load / cap
-                self.sum_util += util
-                self.count += 1
-                if util > self.max_util:
-                    self.max_util = util
+        # zero-load edges add 0 to the sum and count towards the mean
+        utils, count = edge_utils(epoch)
+        self.count += count
+        for util in utils:
+            self.sum_util += util
+            if util > self.max_util:
+                self.max_util = util
+
+    def merge(self, later):
+        self.sum_util += later.sum_util
+        self.count += later.count
+        self.max_util = max(self.max_util, later.max_util)
 
     def result(self):
         mean_util = self.sum_util / self.count if self.count else 0.0
@@ -39,12 +48,13 @@ class SaturatedEdges:
         self.total = 0
 
     def process(self, epoch):
-        for e, load in epoch.edge_load.items():
-            cap = epoch.edge_capacity.get(e, 0.0)
-            if cap > 0:
-                self.total += 1
-                if load / cap > 1.0:
-                    self.saturated += 1
+        utils, count = edge_utils(epoch)
+        self.total += count
+        self.saturated += sum(1 for util in utils if util > 1.0)
+
+    def merge(self, later):
+        self.saturated += later.saturated
+        self.total += later.total
 
     def result(self):
         frac = self.saturated / self.total if self.total else 0.0
@@ -62,16 +72,16 @@ class EdgeUtilizationStd:
         self.count = 0
 
     def process(self, epoch):
-        for e, cap in epoch.edge_capacity.items():
-            if cap <= 0:
-                continue
-
-            load = epoch.edge_load.get(e, 0.0)
-            u = load / cap
-
+        utils, count = edge_utils(epoch)
+        self.count += count
+        for u in utils:
             self.sum_u += u
             self.sum_u2 += u * u
-            self.count += 1
+
+    def merge(self, later):
+        self.sum_u += later.sum_u
+        self.sum_u2 += later.sum_u2
+        self.count += later.count
 
     def result(self):
         if self.count == 0:
@@ -93,14 +103,156 @@ class LoadCapTotals:
         self.sum_cap = 0.0
 
     def process(self, epoch):
-        for e, load in epoch.edge_load.items():
-            cap = epoch.edge_capacity.get(e, 0.0)
-            if cap > 0:
-                self.sum_load += load
-                self.sum_cap += cap
+        loads, _, _, total_cap = edge_loads(epoch)
+        for load in loads:
+            self.sum_load += load
+        self.sum_cap += total_cap
+
+    def merge(self, later):
+        self.sum_load += later.sum_load
+        self.sum_cap += later.sum_cap
 
     def result(self):
         return {
             "sum_edge_load": self.sum_load,
             "sum_edge_cap": self.sum_cap,
-        }
\ No newline at end of file
+        }
+
+class WindowedEdgeUtilization:
+    """
+    Sustained hotspots: the highest per-edge utilisation averaged over
+    `window` consecutive epochs, and the highest per-edge EWMA.
+
+    Window sums are kept running: each epoch adds its utilisation and
+    drops the one `window` epochs back (read from the history), so an
+    epoch costs O(E) whatever the window. A successor() takes the sums
+    over, so windows reaching back before its first epoch are still
+    seen. Their values depend on where the run being reported starts:
+    peaks are kept per start within one window back (`peaks`, with sums
+    since that start while it is younger than a window) and once for
+    all earlier starts (`settled`), and merge() picks the ones of its
+    own start.
+    """
+
+    def __init__(self, window: int = 10, alpha: float = 0.3):
+        self.window = window
+        self.alpha = alpha
+        # EWMA weights: normaliser over the last n epochs, weight of the epoch leaving the window
+        decay = (1.0 - alpha) ** np.arange(window + 1, dtype=np.float64)
+        self._norm = np.cumsum(decay[:window])
+        self._leaving = decay[window]
+        self.reset()
+
+    def reset(self):
+        self.history = None
+        self._owned = False
+        self.start = 0
+        self.epochs = 0
+        # run start (epoch) -> [peak mean, peak ewma, latest short-window mean]
+        self.peaks = {0: [0.0, 0.0, None]}
+        self.settled = [0.0, 0.0, None]
+        # running (sum, EWMA) per edge over the last `window` epochs, epochs in them
+        self._sums = None
+        self._seen = 0
+        # start -> (sum, EWMA) since that start, while younger than a window
+        self._since = {}
+
+    def attach(self, ctx):
+        if ctx.history.window < self.window:
+            raise ValueError(
+                f"Edge history holds {ctx.history.window} epochs; WindowedEdgeUtilization needs {self.window}"
+            )
+        self.history = ctx.history
+
+    def process(self, epoch):
+        if self.history is None:
+            self.history = EdgeHistory(edge_capacity_array(epoch), window=self.window)
+            self._owned = True
+        history = self.history
+        load = edge_load_array(epoch)
+        at = self.start + self.epochs
+        self.epochs += 1
+
+        if history.num_edges:
+            self._update(history.utilisation(load), at)
+        if self._owned:
+            history.append(load)
+
+    def _update(self, util, at):
+        beta = 1.0 - self.alpha
+        if self._sums is None:
+            self._sums = [np.zeros_like(util), np.zeros_like(util)]
+        total, ewma = self._sums
+
+        total += util
+        ewma *= beta
+        ewma += util
+        if self._seen >= self.window:
+            # the history holds the completed epochs; the oldest of the window leaves
+            old = self.history.last("util", ago=self.window - 1)
+            total -= old
+            ewma -= self._leaving * old
+        else:
+            self._seen += 1
+
+        full = None
+        if self._seen == self.window:
+            full = float(total.max()) / self.window, float(ewma.max()) / self._norm[-1]
+            self.settled[0] = max(self.settled[0], full[0])
+            self.settled[1] = max(self.settled[1], full[1])
+
+        for start, peak in self.peaks.items():
+            n = at + 1 - start
+            if n >= self.window:
+                self._since.pop(start, None)
+                peak[0] = max(peak[0], full[0])
+                peak[1] = max(peak[1], full[1])
+                continue
+            # windows shorter than `window` only count if the run is (see result)
+            since = self._since.get(start)
+            if since is None:
+                since = self._since[start] = [np.zeros_like(util), np.zeros_like(util)]
+            since[0] += util
+            since[1] *= beta
+            since[1] += util
+            peak[1] = max(peak[1], float(since[1].max()) / self._norm[n - 1])
+
+    def _settle(self):
+        # latest short-window means of the starts still younger than a window
+        at = self.start + self.epochs
+        for start, (total, _) in self._since.items():
+            self.peaks[start][2] = float(total.max()) / (at - start)
+
+    def successor(self):
+        """The metric for the epochs after this one's; takes over the history and sums."""
+        self._settle()
+        nxt = WindowedEdgeUtilization(self.window, self.alpha)
+        nxt.history, nxt._owned = self.history, self._owned
+        nxt._sums, nxt._seen = self._sums, self._seen
+        at = nxt.start = self.start + self.epochs
+        nxt._since = {s: v for s, v in self._since.items() if at - s < self.window}
+        nxt.peaks = {s: [0.0, 0.0, None] for s in self.peaks if at - s < self.window}
+        nxt.peaks[at] = [0.0, 0.0, None]
+        self._owned = False
+        self._sums, self._since = None, {}
+        return nxt
+
+    def merge(self, later):
+        later._settle()
+        peak = self.peaks[self.start]
+        other = later.peaks.get(self.start, later.settled)
+        peak[0] = max(peak[0], other[0])
+        peak[1] = max(peak[1], other[1])
+        if later.epochs:
+            peak[2] = other[2]
+        self.epochs += later.epochs
+
+    def result(self):
+        self._settle()
+        peak_mean, peak_ewma, short_mean = self.peaks[self.start]
+        if short_mean is not None and 0 < self.epochs < self.window:
+            peak_mean = short_mean
+        return {
+            "peak_window_edge_util": peak_mean,
+            "peak_ewma_edge_util": peak_ewma,
+        }
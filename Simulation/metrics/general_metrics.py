@@ -1,16 +1,20 @@
-from collections import defaultdict
+import numpy as np
+
+from Simulation.metrics.sparse import edge_load_array, edge_loads
 
 
 class Throughput:
     def __init__(self): self.delivered = 0.0
     def reset(self): self.delivered = 0.0
     def process(self, epoch): self.delivered += epoch.total_sent - epoch.total_dropped
+    def merge(self, later): self.delivered += later.delivered
     def result(self): return {"throughput": self.delivered}
 
 class OfferedLoad:
     def __init__(self): self.offered = 0.0
     def reset(self): self.offered = 0.0
     def process(self, epoch): self.offered += epoch.total_sent
+    def merge(self, later): self.offered += later.offered
     def result(self): return {"offered_load": self.offered}
 
 class TrafficWeightedUtilization:
@@ -23,34 +27,51 @@ class TrafficWeightedUtilization:
         self.sum_cap = 0.0
 
     def process(self, epoch):
-        for e, cap in epoch.edge_capacity.items():
-            load = epoch.edge_load.get(e, 0.0)
+        loads, _, _, total_cap = edge_loads(epoch)
+        for load in loads:
+            self.sum_load += load
+        self.sum_cap += total_cap
 
-            if cap > 0:
-                self.sum_load += load
-                self.sum_cap += cap
+    def merge(self, later):
+        self.sum_load += later.sum_load
+        self.sum_cap += later.sum_cap
 
     def result(self):
         util = self.sum_load / self.sum_cap if self.sum_cap else 0.0
         return {"traffic_weighted_util": util}
 
 class HotspotShare:
+    """
+    Share of all edge load carried by the `k` busiest edges.
+
+    The busiest edges are those of the whole run, which the context's
+    edge history (a window of recent epochs) cannot tell, so per-edge
+    load totals are kept here in float64.
+    """
+
     def __init__(self, k: int = 5):
         self.k = k
-        self.edge_totals = defaultdict(float)
+        self.total = None
 
     def reset(self):
-        self.edge_totals.clear()
+        self.total = None
 
     def process(self, epoch):
-        for e, load in epoch.edge_load.items():
-            self.edge_totals[e] += load
+        load = edge_load_array(epoch)
+        if self.total is None:
+            self.total = np.zeros(len(load), dtype=np.float64)
+        self.total += load
+
+    def merge(self, later):
+        if later.total is not None:
+            self.total = later.total.copy() if self.total is None else self.total + later.total
 
     def result(self):
-        if not self.edge_totals:
+        if self.total is None or not len(self.total):
             return {"topk_edge_load_share": 0.0}
 
-        loads = list(self.edge_totals.values())
-        total = sum(loads)
-        topk = sum(sorted(loads, reverse=True)[: self.k])
-        return {"topk_edge_load_share": topk / total if total else 0.0}
\ No newline at end of file
+        loads = self.total
+        total = float(loads.sum())
+        k = min(self.k, len(loads))
+        topk = float(np.partition(loads, len(loads) - k)[len(loads) - k:].sum()) if k else 0.0
+        return {"topk_edge_load_share": topk / total if total else 0.0}
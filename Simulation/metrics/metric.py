@@ -1,6 +1,6 @@
 from typing import Protocol, runtime_checkable, Iterable
 from typing import Dict
-from Simulation.epoch_result import EpochResult
+from Simulation.epoch_result import EpochResult, FlowChunk
 from Simulation.metrics.edge_metrics import *
 from Simulation.metrics.flow_metrics import *
 from Simulation.metrics.general_metrics import *
@@ -15,6 +15,23 @@ class Metric(Protocol):
     process()  -> consume one epoch
     result()   -> return final scalar(s)
     reset()    -> optional reuse
+
+    Metrics that read per-flow values also implement
+    process_flows(chunk: FlowChunk): in streaming epochs the per-flow
+    lists of EpochResult are empty and the values arrive chunk by chunk,
+    before process() of the same epoch.
+
+    merge(later) folds in a metric of the same kind that processed the
+    epochs right after this one's, as if this one had processed them
+    too (SteadyStateDetector keeps one metric set per batch and merges
+    them from the truncation point). successor() is optional: the metric
+    for the epochs after this one's, for metrics that need the earlier
+    epochs' context; without it a fresh instance is used.
+
+    attach(ctx) is optional too: run_simulation calls it after reset()
+    for metrics that read the EpochContext. ctx.history holds the
+    completed epochs and is appended after every metric has processed
+    the epoch; unattached, such a metric keeps a history of its own.
     """
 
     def process(self, epoch: "EpochResult") -> None: ...
@@ -22,8 +39,14 @@ class Metric(Protocol):
     def reset(self) -> None: ...
 
 class AllMetrics:
+    """
+    The metric set of a run. windowed adds WindowedEdgeUtilization
+    (peak_window_edge_util, peak_ewma_edge_util), which is opt-in.
+    """
+
     metrics: Iterable[Metric]
-    def __init__(self):
+    def __init__(self, windowed: bool = False):
+        self.windowed = windowed
         self.metrics = [
         DropRatio(),
         MeanLatency(),
@@ -44,11 +67,37 @@ class AllMetrics:
         MeanSwitchUtil(),
         P95SwitchUtil(),
     ]
+        if windowed:
+            self.metrics.append(WindowedEdgeUtilization())
 
     def process(self, epoch: "EpochResult") -> None:
         for metric in self.metrics:
             metric.process(epoch)
 
+    def attach(self, ctx) -> None:
+        for metric in self.metrics:
+            attach = getattr(metric, "attach", None)
+            if attach:
+                attach(ctx)
+
+    def process_flows(self, chunk: "FlowChunk") -> None:
+        for metric in self.metrics:
+            process_flows = getattr(metric, "process_flows", None)
+            if process_flows:
+                process_flows(chunk)
+
+    def merge(self, later: "AllMetrics") -> None:
+        for metric, other in zip(self.metrics, later.metrics):
+            metric.merge(other)
+
+    def successor(self) -> "AllMetrics":
+        nxt = AllMetrics(self.windowed)
+        nxt.metrics = [
+            metric.successor() if hasattr(metric, "successor") else fresh
+            for metric, fresh in zip(self.metrics, nxt.metrics)
+        ]
+        return nxt
+
     def result(self) -> Dict[str, float]:
         result = {}
         for metric in self.metrics:
@@ -0,0 +1,78 @@
+"""
+sparse.py
+
+Per-epoch edge / switch views for the streaming metrics.
+
+Most edges of a large, lightly loaded fabric carry nothing in a given
+epoch. EpochResult lists the edges (active_edges) and switches
+(active_switches) with non-zero load; the helpers below return values
+for those only, plus the number of entries a dense loop would have
+visited, so zero-load entries can be counted in closed form. Values come
+in edge_list / switch order, so sequential sums match a dense loop
+exactly (adding 0.0 changes nothing).
+
+Results built without the array fields fall back to the dicts.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+
+def edge_load_array(epoch) -> np.ndarray:
+    """Per-edge load in edge_list order (the dict is built in that order)."""
+    if epoch.edge_load_array is not None:
+        return epoch.edge_load_array
+    return np.fromiter(epoch.edge_load.values(), dtype=np.float64, count=len(epoch.edge_load))
+
+
+def edge_capacity_array(epoch) -> np.ndarray:
+    if epoch.edge_capacity_array is not None:
+        return epoch.edge_capacity_array
+    return np.fromiter(epoch.edge_capacity.values(), dtype=np.float64, count=len(epoch.edge_capacity))
+
+
+def active_edges(epoch) -> np.ndarray:
+    if epoch.active_edges is not None:
+        return epoch.active_edges
+    return np.flatnonzero(edge_load_array(epoch))
+
+
+def edge_loads(epoch) -> Tuple[List[float], List[float], int, float]:
+    """
+    (loads, capacities) of the active edges with capacity > 0, the
+    number of edges with capacity > 0 and their total capacity.
+    """
+    cap = edge_capacity_array(epoch)
+    load = edge_load_array(epoch)
+    active = active_edges(epoch)
+    active = active[cap[active] > 0]
+
+    positive = cap[cap > 0]
+    return load[active].tolist(), cap[active].tolist(), len(positive), float(positive.sum())
+
+
+def edge_utils(epoch) -> Tuple[List[float], int]:
+    """Utilisation of the active edges with capacity > 0, and the number of edges with capacity > 0."""
+    loads, caps, count, _ = edge_loads(epoch)
+    return [load / cap for load, cap in zip(loads, caps)], count
+
+
+def switch_utils(epoch) -> Tuple[List[float], int]:
+    """Utilisation of the loaded switches with capacity > 0, and the number of switches with capacity > 0."""
+    if epoch.switch_load_array is None:
+        utils = []
+        count = 0
+        for s, load in epoch.switch_load.items():
+            cap = epoch.switch_capacity.get(s, 0.0)
+            if cap > 0:
+                count += 1
+                if load != 0.0:
+                    utils.append(load / cap)
+        return utils, count
+
+    cap = epoch.switch_capacity_array
+    load = epoch.switch_load_array
+    active = epoch.active_switches
+    active = active[cap[active] > 0]
+    return [l / c for l, c in zip(load[active].tolist(), cap[active].tolist())], int(np.count_nonzero(cap > 0))
@@ -1,10 +1,7 @@
 import math
 
-def _switch_utils(epoch):
-    for s, load in epoch.switch_load.items():
-        cap = epoch.switch_capacity.get(s, 0.0)
-        if cap > 0:
-            yield load / cap
+from Simulation.metrics.sparse import switch_utils
+
 
 class MeanSwitchUtil:
     def __init__(self):
@@ -16,9 +13,14 @@ class MeanSwitchUtil:
         self.count = 0
 
     def process(self, epoch):
-        for u in _switch_utils(epoch):
+        utils, count = switch_utils(epoch)
+        self.count += count
+        for u in utils:
             self.sum += u
-            self.count += 1
+
+    def merge(self, later):
+        self.sum += later.sum
+        self.count += later.count
 
     def result(self):
         return {"mean_switch_util": self.sum / self.count if self.count else 0.0}
@@ -33,10 +35,16 @@ class SwitchUtilStd:
         self.count = 0
 
     def process(self, epoch):
-        for u in _switch_utils(epoch):
+        utils, count = switch_utils(epoch)
+        self.count += count
+        for u in utils:
             self.sum += u
             self.sum2 += u*u
-            self.count += 1
+
+    def merge(self, later):
+        self.sum += later.sum
+        self.sum2 += later.sum2
+        self.count += later.count
 
     def result(self):
         if self.count == 0:
@@ -54,29 +62,44 @@ class MaxSwitchUtil:
         self.max_u = 0.0
 
     def process(self, epoch):
-        for u in _switch_utils(epoch):
+        for u in switch_utils(epoch)[0]:
             self.max_u = max(self.max_u, u)
 
+    def merge(self, later):
+        self.max_u = max(self.max_u, later.max_u)
+
     def result(self):
         return {"max_switch_util": self.max_u}
 
 class P95SwitchUtil:
+    # non-zero values only; idle switches are counted in `zeros`
     def __init__(self):
         self.values = []
+        self.zeros = 0
 
     def reset(self):
         self.values.clear()
+        self.zeros = 0
 
     def process(self, epoch):
-        self.values.extend(_switch_utils(epoch))
+        utils, count = switch_utils(epoch)
+        self.values.extend(utils)
+        self.zeros += count - len(utils)
+
+    def merge(self, later):
+        self.values.extend(later.values)
+        self.zeros += later.zeros
 
     def result(self):
-        if not self.values:
+        n = self.zeros + len(self.values)
+        if not n:
             return {"p95_switch_util": 0.0}
 
+        idx = int(0.95 * (n - 1))
+        if idx < self.zeros:
+            return {"p95_switch_util": 0.0}
         v = sorted(self.values)
-        idx = int(0.95 * (len(v) - 1))
-        return {"p95_switch_util": v[idx]}
+        return {"p95_switch_util": v[idx - self.zeros]}
 
 class HotSwitchFraction:
     def __init__(self, threshold=0.9):
@@ -87,32 +110,49 @@ class HotSwitchFraction:
         self.hot = self.total = 0
 
     def process(self, epoch):
-        for u in _switch_utils(epoch):
-            self.total += 1
+        utils, count = switch_utils(epoch)
+        self.total += count
+        if self.th <= 0.0:
+            self.hot += count - len(utils)
+        for u in utils:
             if u >= self.th:
                 self.hot += 1
 
+    def merge(self, later):
+        self.hot += later.hot
+        self.total += later.total
+
     def result(self):
         return {"frac_hot_switches": self.hot / self.total if self.total else 0.0}
 
 class SwitchUtilGini:
+    # non-zero values only; idle switches are counted in `zeros`
     def __init__(self):
         self.values = []
+        self.zeros = 0
 
     def reset(self):
         self.values.clear()
+        self.zeros = 0
 
     def process(self, epoch):
-        self.values.extend(_switch_utils(epoch))
+        utils, count = switch_utils(epoch)
+        self.values.extend(utils)
+        self.zeros += count - len(utils)
+
+    def merge(self, later):
+        self.values.extend(later.values)
+        self.zeros += later.zeros
 
     def result(self):
-        if not self.values:
+        if not self.values and not self.zeros:
             return {"switch_util_gini": 0.0}
 
+        # zeros sort first and add nothing to either sum
         v = sorted(self.values)
-        n = len(v)
+        n = self.zeros + len(v)
         cum = 0
-        for i, x in enumerate(v, 1):
+        for i, x in enumerate(v, self.zeros + 1):
             cum += i * x
 
         gini = (2 * cum) / (n * sum(v)) - (n + 1) / n if sum(v) > 0 else 0
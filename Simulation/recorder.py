@@ -0,0 +1,223 @@
+"""
+recorder.py
+
+Per-epoch time-series export.
+
+run_simulation() only returns end-of-run aggregates. EpochRecorder
+streams per-epoch scalars and per-edge vectors to disk as the run
+proceeds so convergence / oscillation of closed-loop congestion can be
+studied afterwards.
+
+On-disk layout (one directory per run):
+
+    meta.json                 schema, chunk size, epochs written
+    edges.npy                 (E, 2) edge endpoints, EpochContext.edge_list order
+    capacity.npy              (E,)   edge capacity
+    scalars/chunk_00000.npy   (rows, n_scalars) float64
+    edge_load/chunk_00000.npy (rows, E)
+    edge_util/chunk_00000.npy (rows, E)
+    edge_dropped/chunk_00000.npy (rows, E)
+
+Chunks are plain .npy files, written one row group at a time, so memory
+stays at one chunk per series and files can be opened with
+np.load(..., mmap_mode="r").
+"""
+
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from Simulation.epoch_result import EpochResult
+
+SCALARS = (
+    "epoch",
+    "total_sent",
+    "total_dropped",
+    "drop_ratio",
+    "num_flows",
+    "mean_latency",
+    "mean_edge_util",
+    "max_edge_util",
+    "mean_congestion",
+)
+
+VECTORS = ("edge_load", "edge_util", "edge_dropped")
+
+
+def _chunk_name(index: int) -> str:
+    return f"chunk_{index:05d}.npy"
+
+
+class EpochRecorder:
+    """
+    Stream per-epoch data of one run to a directory.
+
+    Parameters
+    ----------
+    path : str
+        Output directory (created if missing).
+    chunk_epochs : int
+        Epochs per row group.
+    dtype : numpy dtype
+        Storage type of per-edge vectors.
+    metadata : dict | None
+        Free-form run description stored in meta.json.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        chunk_epochs: int = 16,
+        dtype=np.float32,
+        metadata: Optional[Dict] = None,
+    ) -> None:
+        self.path = path
+        self.chunk_epochs = chunk_epochs
+        self.dtype = np.dtype(dtype)
+        self.metadata = metadata or {}
+
+        self._capacity = None
+        self._rows = 0
+        self._chunks = 0
+        self._epochs = 0
+
+    # ------------------------
+    # lifecycle
+    # ------------------------
+
+    def start(self, ctx) -> None:
+        """Write the edge-index table and allocate one chunk of buffers."""
+        os.makedirs(self.path, exist_ok=True)
+        for name in ("scalars",) + VECTORS:
+            os.makedirs(os.path.join(self.path, name), exist_ok=True)
+
+        num_edges = len(ctx.edge_list)
+        edges = np.asarray([(str(u), str(v)) for u, v in ctx.edge_list], dtype=str)
+        np.save(os.path.join(self.path, "edges.npy"), edges.reshape(num_edges, 2))
+        np.save(os.path.join(self.path, "capacity.npy"), ctx.capacity)
+
+        self._capacity = np.asarray(ctx.capacity, dtype=np.float64)
+        self._scalars = np.zeros((self.chunk_epochs, len(SCALARS)), dtype=np.float64)
+        self._vectors = {
+            name: np.zeros((self.chunk_epochs, num_edges), dtype=self.dtype)
+            for name in VECTORS
+        }
+        self._rows = 0
+        self._chunks = 0
+        self._epochs = 0
+        self._write_meta(num_edges)
+
+    def record(self, epoch: int, epoch_result: EpochResult, ctx) -> None:
+        """Append one epoch; flushes a row group every chunk_epochs epochs."""
+        load = epoch_result.edge_load_array
+        dropped = epoch_result.edge_dropped_array
+        if load is None:
+            load = np.fromiter((epoch_result.edge_load.get(e, 0.0) for e in ctx.edge_list), dtype=np.float64)
+            dropped = np.fromiter((epoch_result.edge_dropped.get(e, 0.0) for e in ctx.edge_list), dtype=np.float64)
+
+        cap = self._capacity
+        util = np.divide(load, cap, out=np.zeros_like(cap), where=cap > 0)
+
+        sent = epoch_result.total_sent
+        n_flows = epoch_result.num_flows()
+
+        row = self._rows
+        self._scalars[row] = (
+            epoch,
+            sent,
+            epoch_result.total_dropped,
+            epoch_result.total_dropped / sent if sent else 0.0,
+            n_flows,
+            epoch_result.latency_sum() / n_flows if n_flows else 0.0,
+            float(util.mean()) if len(util) else 0.0,
+            float(util.max()) if len(util) else 0.0,
+            float(ctx.congestion.mean()) if len(ctx.congestion) else 0.0,
+        )
+        self._vectors["edge_load"][row] = load
+        self._vectors["edge_util"][row] = util
+        self._vectors["edge_dropped"][row] = dropped
+
+        self._rows += 1
+        self._epochs += 1
+        if self._rows == self.chunk_epochs:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered rows as the next row group."""
+        if self._rows == 0:
+            return
+
+        name = _chunk_name(self._chunks)
+        rows = self._rows
+        np.save(os.path.join(self.path, "scalars", name), self._scalars[:rows])
+        for series, buf in self._vectors.items():
+            np.save(os.path.join(self.path, series, name), buf[:rows])
+
+        self._chunks += 1
+        self._rows = 0
+        self._write_meta(len(self._capacity))
+
+    def close(self) -> None:
+        self.flush()
+
+    def _write_meta(self, num_edges: int) -> None:
+        meta = {
+            "num_edges": num_edges,
+            "epochs": self._epochs - self._rows,
+            "chunks": self._chunks,
+            "chunk_epochs": self.chunk_epochs,
+            "dtype": self.dtype.name,
+            "scalars": list(SCALARS),
+            "vectors": list(VECTORS),
+            "metadata": self.metadata,
+        }
+        tmp = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp, os.path.join(self.path, "meta.json"))
+
+
+class Recording:
+    """Read-only view of a directory written by EpochRecorder."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+
+        self.edges = np.load(os.path.join(path, "edges.npy"))
+        self.capacity = np.load(os.path.join(path, "capacity.npy"))
+
+    @property
+    def epochs(self) -> int:
+        return self.meta["epochs"]
+
+    def _chunk(self, series: str, index: int) -> np.ndarray:
+        return np.load(os.path.join(self.path, series, _chunk_name(index)), mmap_mode="r")
+
+    def scalars(self) -> Dict[str, np.ndarray]:
+        """All per-epoch scalars as name -> (epochs,) array."""
+        chunks = [self._chunk("scalars", i) for i in range(self.meta["chunks"])]
+        if not chunks:
+            return {name: np.zeros(0) for name in self.meta["scalars"]}
+        table = np.concatenate(chunks)
+        return {name: table[:, i] for i, name in enumerate(self.meta["scalars"])}
+
+    def iter_vector(self, series: str) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (first_epoch_row, memmapped (rows, E) chunk) without loading everything."""
+        start = 0
+        for i in range(self.meta["chunks"]):
+            chunk = self._chunk(series, i)
+            yield start, chunk
+            start += len(chunk)
+
+    def vector(self, series: str, row: int) -> np.ndarray:
+        """Per-edge vector of one recorded epoch (row index, 0-based)."""
+        chunk_epochs = self.meta["chunk_epochs"]
+        return np.asarray(self._chunk(series, row // chunk_epochs)[row % chunk_epochs])
+
+    def edge_series(self, series: str, eids: List[int]) -> np.ndarray:
+        """(epochs, len(eids)) time series for selected edges."""
+        return np.concatenate([chunk[:, eids] for _, chunk in self.iter_vector(series)])
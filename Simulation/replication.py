@@ -0,0 +1,132 @@
+"""
+replication.py
+
+Multi-seed replications of one configuration with confidence intervals.
+
+Replication i runs run_experiment() with seed base_seed + i, so every
+replication can be reproduced on its own with main.py --seed. Seeds run
+in parallel worker processes. After the first `min_replications`, more
+are added one batch (one per process) at a time until the CI
+half-width of every key metric is below the target, or
+`max_replications` is reached.
+"""
+
+import contextlib
+import io
+import math
+import os
+import statistics
+from argparse import Namespace
+from multiprocessing import Pool
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from Simulation.experiment import run_experiment
+from Simulation.stats import t_critical
+
+
+def summarize(samples: Sequence[Dict[str, float]], confidence: float = 0.95) -> Dict[str, Dict[str, float]]:
+    """Mean, sample std and CI half-width of every metric key."""
+    summary = {}
+    n = len(samples)
+
+    for key in samples[0] if samples else ():
+        values = [s[key] for s in samples]
+        mean = statistics.fmean(values)
+        std = statistics.stdev(values) if n > 1 else 0.0
+        half = t_critical(n - 1, confidence) * std / math.sqrt(n) if n > 1 else math.inf
+        summary[key] = {"mean": mean, "std": std, "half_width": half, "n": n}
+
+    return summary
+
+
+def converged(
+    summary: Dict[str, Dict[str, float]],
+    key_metrics: Sequence[str],
+    target: float,
+    relative: bool = False,
+) -> bool:
+    """True when every key metric's half-width is within target (× |mean| if relative)."""
+    for key in key_metrics:
+        if key not in summary:
+            raise KeyError(f"Unknown metric for stopping rule: {key}")
+        stats = summary[key]
+        bound = target * abs(stats["mean"]) if relative else target
+        if not stats["half_width"] <= bound:
+            return False
+    return True
+
+
+def _replicate(job: Tuple[Namespace, int]) -> Tuple[int, Dict[str, float]]:
+    args, seed = job
+    args = Namespace(**{**vars(args), "seed": seed})
+
+    # keep per-epoch prints and progress bars of the workers out of the report
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+        results, _ = run_experiment(args)
+    return seed, results
+
+
+def run_replications(
+    args: Namespace,
+    *,
+    max_replications: int,
+    min_replications: int = 3,
+    key_metrics: Sequence[str] = (),
+    target: Optional[float] = None,
+    relative: bool = False,
+    confidence: float = 0.95,
+    processes: Optional[int] = None,
+    on_replication: Optional[Callable[[int, Dict[str, float]], None]] = None,
+) -> Dict:
+    """
+    Run seeds args.seed, args.seed + 1, ... until the stopping rule holds.
+
+    Without `target` (or key metrics) all max_replications are run.
+    on_replication(seed, results) is called as replications finish, in
+    seed order. Returns {"replications", "summary", "converged",
+    "confidence"}.
+    """
+    if args.record:
+        raise ValueError("--record is not supported with replications")
+    if args.telemetry:
+        raise ValueError("--telemetry is not supported with replications")
+
+    processes = processes or os.cpu_count() or 1
+    if processes > 1 and args.epoch_processes:
+        raise ValueError("--epoch-processes cannot run inside replication worker processes")
+    adaptive = target is not None and bool(key_metrics)
+    min_replications = max(2, min(min_replications, max_replications))
+
+    replications: List[Dict] = []
+    summary: Dict[str, Dict[str, float]] = {}
+    done = False
+    next_seed = args.seed
+
+    pool = Pool(processes) if processes > 1 else None
+    try:
+        while not done and len(replications) < max_replications:
+            batch = min_replications if not replications else processes
+            batch = min(batch, max_replications - len(replications))
+            jobs = [(args, next_seed + i) for i in range(batch)]
+            next_seed += batch
+
+            results = pool.imap(_replicate, jobs) if pool is not None else map(_replicate, jobs)
+            for seed, result in results:
+                replications.append({"seed": seed, "results": result})
+                if on_replication is not None:
+                    on_replication(seed, result)
+
+            summary = summarize([r["results"] for r in replications], confidence)
+            done = adaptive and converged(summary, key_metrics, target, relative)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return {
+        "replications": replications,
+        "summary": summary,
+        "converged": done,
+        "confidence": confidence,
+    }
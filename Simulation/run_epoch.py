@@ -1,12 +1,14 @@
-from collections import defaultdict
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional, Sequence
 import networkx as nx
 from multiprocessing import Pool
 import os
+import tempfile
 
 import numpy as np
 from Components.workloads.flow import Flow
-from Simulation.epoch_result import EpochResult
+from Simulation import kernels
+from Simulation.edge_history import EdgeHistory
+from Simulation.epoch_result import ArrayMapping, EpochResult, FlowChunk
 
 from dataclasses import dataclass
 
@@ -20,9 +22,32 @@ class EpochContext:
     stale_congestion: np.ndarray
     edge_list: List[Tuple[int, int]]
     adj: Dict[int, List[Tuple[int, int]]]
-
-
-def build_epoch_context(topology: nx.Graph) -> EpochContext:
+    # False while a link is failed; routing skips masked edges
+    edge_up: np.ndarray
+    # CSR form of adj over node indices (same neighbour order as adj)
+    node_list: List[int]
+    node_index: Dict[int, int]
+    indptr: np.ndarray
+    indices: np.ndarray
+    adj_eids: np.ndarray
+    # per-edge load / utilisation of the last completed epochs (the run
+    # loop appends after each epoch's metrics; epoch-parallel workers
+    # do not see it)
+    history: EdgeHistory
+    # edge endpoints in order of first appearance along edge_list (the
+    # EpochResult.switch_* order), their link capacity sums, and the
+    # (E, 2) positions of each edge's endpoints in that list
+    switch_nodes: List[int]
+    switch_index: Dict[int, int]
+    switch_capacity: np.ndarray
+    edge_ends: np.ndarray
+
+
+def build_epoch_context(
+    topology: nx.Graph,
+    history_window: int = 16,
+    history_dtype=np.float32,
+) -> EpochContext:
 
     edge_id = {}
     edge_list = []
@@ -56,6 +81,31 @@ def build_epoch_context(topology: nx.Graph) -> EpochContext:
     congestion = np.asarray(congestion, dtype=np.float64)
     stale_congestion = np.asarray(stale_congestion, dtype=np.float64)
 
+    # CSR adjacency for array kernels
+    node_list = list(adj)
+    node_index = {node: i for i, node in enumerate(node_list)}
+    indptr = np.zeros(len(node_list) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(adj[node]) for node in node_list])
+    indices = np.fromiter(
+        (node_index[v] for node in node_list for v, _ in adj[node]), dtype=np.int64, count=indptr[-1]
+    )
+    adj_eids = np.fromiter(
+        (eid for node in node_list for _, eid in adj[node]), dtype=np.int64, count=indptr[-1]
+    )
+
+    # per-switch capacity, summed edge by edge as run_epoch used to
+    switch_index = {}
+    switch_cap = []
+    edge_ends = np.zeros((len(edge_list), 2), dtype=np.int64)
+    for eid, (u, v) in enumerate(edge_list):
+        for side, node in enumerate((u, v)):
+            i = switch_index.get(node)
+            if i is None:
+                i = switch_index[node] = len(switch_cap)
+                switch_cap.append(0.0)
+            switch_cap[i] += float(capacity[eid])
+            edge_ends[eid, side] = i
+
     return EpochContext(
         edge_id=edge_id,
         capacity=capacity,
@@ -63,16 +113,36 @@ def build_epoch_context(topology: nx.Graph) -> EpochContext:
         congestion=congestion,
         stale_congestion=stale_congestion,
         edge_list=edge_list,
-        adj=adj
+        adj=adj,
+        edge_up=np.ones(len(edge_list), dtype=bool),
+        node_list=node_list,
+        node_index=node_index,
+        indptr=indptr,
+        indices=indices,
+        adj_eids=adj_eids,
+        history=EdgeHistory(capacity, window=history_window, dtype=history_dtype),
+        switch_nodes=list(switch_index),
+        switch_index=switch_index,
+        switch_capacity=np.asarray(switch_cap, dtype=np.float64),
+        edge_ends=edge_ends,
     )
 def run_epoch(
     flows: List["Flow"],
     routing_schedule: List,
     ctx: EpochContext,
+    chunk_size: Optional[int] = None,
+    flow_sinks: Sequence = (),
 ) -> EpochResult:
+    """
+    Route `flows` over every policy in the schedule and deliver them.
+
+    With chunk_size, the epoch is streamed (see _stream_flows): per-flow
+    results are passed chunk by chunk to process_flows() of every object
+    in flow_sinks that has one, and the returned EpochResult holds no
+    per-flow lists (streamed=True).
+    """
     print("Unique sources this epoch:", len(set(flow.src for flow in flows)))
     capacity = ctx.capacity
-    latency = ctx.latency
     edge_list = ctx.edge_list
     edge_id = ctx.edge_id
 
@@ -80,118 +150,292 @@ def run_epoch(
     k = len(routing_schedule) if routing_schedule else 1
 
     cap = np.asarray(capacity, dtype=np.float64)
-    lat_arr = np.asarray(latency, dtype=np.float64)
 
     edge_load = np.zeros(num_edges, dtype=np.float64)
     edge_dropped = np.zeros(num_edges, dtype=np.float64)
 
-    flow_paths_eids = []
-    flow_offered = []
-    flow_latency = []
-
-    # --------------------------------------------------
-    # Phase 1: Routing + edge load accumulation
-    # --------------------------------------------------
-
-    for flow in flows:
-        base_rate = flow.rate / k
-        if base_rate <= 0.0:
-            continue
+    compiled = kernels.enabled()
+
+    # this epoch's destinations, for targeted shortest-path searches
+    for policy in routing_schedule:
+        prepare = getattr(policy, "prepare", None)
+        if prepare:
+            prepare(flows)
+
+    if chunk_size:
+        total_sent, total_dropped, flow_count, latency_sum = _stream_flows(
+            flows, routing_schedule, ctx, k, edge_load, edge_dropped, compiled, chunk_size, flow_sinks,
+        )
+        flow_fields = dict(
+            flow_paths=[], flow_rates=[], flow_latency=[],
+            streamed=True, flow_count=flow_count, flow_latency_sum=latency_sum,
+        )
+    else:
+        # --------------------------------------------------
+        # Phase 1: Routing + edge load accumulation
+        # --------------------------------------------------
+
+        flow_paths_eids, flow_offered, flow_latency, flow_routed, arrays = _route(
+            flows, routing_schedule, ctx, k, edge_load, compiled,
+        )
+
+        total_sent = float(sum(flow_offered)) if flow_offered else 0.0
+
+        # --------------------------------------------------
+        # Phase 2: Edge utilization (vectorized)
+        # --------------------------------------------------
+
+        edge_util = _edge_util(edge_load, cap)
+
+        # --------------------------------------------------
+        # Phase 3: Delivered / dropped
+        # --------------------------------------------------
+
+        flow_rates = []
+        total_dropped = 0.0
+
+        if compiled:
+            flat_eids, offsets, offered_arr = arrays
+            rates_arr, total_dropped = kernels.deliver(
+                flat_eids, offsets, offered_arr,
+                np.asarray(flow_routed, dtype=np.bool_), edge_util, k, edge_dropped,
+            )
+            flow_rates = rates_arr.tolist()
+        else:
+            for path_eids, offered, routed in zip(flow_paths_eids, flow_offered, flow_routed):
 
-        for policy in routing_schedule:
+                if not routed:
+                    flow_rates.append(0.0)
+                    total_dropped += offered
+                    continue
 
-            path_nodes = policy(flow.src, flow.dst)
+                if not path_eids:
+                    flow_rates.append(offered)
+                    continue
 
-            path_eids = []
-            total_lat = 0.0
+                # No numpy allocation here
+                util = max(edge_util[eid] for eid in path_eids)
 
-            for i in range(len(path_nodes) - 1):
-                eid = edge_id[(path_nodes[i], path_nodes[i + 1])]
-                path_eids.append(eid)
+                if util <= 1.0:
+                    delivered = offered
+                    dropped = 0.0
+                else:
+                    delivered = offered / util
+                    dropped = offered - delivered
 
-                edge_load[eid] += base_rate
-                total_lat += lat_arr[eid]
+                flow_rates.append(delivered * k)
+                total_dropped += dropped
 
-            flow_paths_eids.append(path_eids)
-            flow_offered.append(base_rate)
-            flow_latency.append(total_lat)
+                if dropped > 0.0:
+                    share = dropped / len(path_eids)
+                    for eid in path_eids:
+                        edge_dropped[eid] += share
 
-    total_sent = float(sum(flow_offered)) if flow_offered else 0.0
+        flow_fields = dict(flow_paths=flow_paths_eids, flow_rates=flow_rates, flow_latency=flow_latency)
 
     # --------------------------------------------------
-    # Phase 2: Edge utilization (vectorized)
+    # Phase 4: Sparse per-edge / per-switch results
     # --------------------------------------------------
 
-    edge_util = np.ones(num_edges, dtype=np.float64)
-    mask = cap > 0.0
-    edge_util[mask] = edge_load[mask] / cap[mask]
-
-    # --------------------------------------------------
-    # Phase 3: Delivered / dropped
-    # --------------------------------------------------
+    # only edges that carried traffic contribute to switch loads
+    active = np.flatnonzero(edge_load)
+    active_load = edge_load[active]
 
-    flow_rates = []
-    total_dropped = 0.0
+    # interleave (u, v) per edge: each switch adds its edges in edge order
+    switch_load = np.zeros(len(ctx.switch_nodes), dtype=np.float64)
+    np.add.at(switch_load, ctx.edge_ends[active].ravel(), np.repeat(active_load, 2))
+    active_switches = np.flatnonzero(switch_load)
 
-    for path_eids, offered in zip(flow_paths_eids, flow_offered):
+    switch_capacity = ctx.switch_capacity
 
-        if not path_eids:
-            flow_rates.append(offered)
-            continue
+    return EpochResult(
+        edge_load=ArrayMapping(edge_list, edge_id, edge_load),
+        edge_capacity=ArrayMapping(edge_list, edge_id, cap),
+        edge_dropped=ArrayMapping(edge_list, edge_id, edge_dropped),
+        switch_load=ArrayMapping(ctx.switch_nodes, ctx.switch_index, switch_load),
+        switch_capacity=ArrayMapping(ctx.switch_nodes, ctx.switch_index, switch_capacity),
+        total_sent=total_sent,
+        total_dropped=float(total_dropped),
+        edge_load_array=edge_load,
+        edge_dropped_array=edge_dropped,
+        edge_capacity_array=cap,
+        active_edges=active,
+        switch_load_array=switch_load,
+        switch_capacity_array=switch_capacity,
+        active_switches=active_switches,
+        **flow_fields,
+    )
 
-        # No numpy allocation here
-        util = max(edge_util[eid] for eid in path_eids)
 
-        if util <= 1.0:
-            delivered = offered
-            dropped = 0.0
-        else:
-            delivered = offered / util
-            dropped = offered - delivered
+def _edge_util(edge_load: np.ndarray, cap: np.ndarray) -> np.ndarray:
+    edge_util = np.ones(len(cap), dtype=np.float64)
+    mask = cap > 0.0
+    edge_util[mask] = edge_load[mask] / cap[mask]
+    return edge_util
 
-        flow_rates.append(delivered * k)
-        total_dropped += dropped
 
-        if dropped > 0.0:
-            share = dropped / len(path_eids)
-            for eid in path_eids:
-                edge_dropped[eid] += share
+def _route(flows, routing_schedule, ctx, k, edge_load, compiled):
+    """
+    Phase 1 for `flows`: one path per (flow, policy), rates added to
+    edge_load. Returns per-path lists (edge ids, offered rate, latency,
+    routed) and, with the compiled kernels, the flat (eids, offsets,
+    offered) arrays the loads were accumulated from (else None).
+    """
+    lat_arr = np.asarray(ctx.latency, dtype=np.float64)
+    edge_id = ctx.edge_id
 
-    # --------------------------------------------------
-    # Phase 4: Build result dictionaries
-    # --------------------------------------------------
+    flow_paths_eids = []
+    flow_offered = []
+    flow_latency = []
+    flow_routed = []
 
-    edge_load_dict = {}
-    edge_capacity_dict = {}
-    edge_dropped_dict = {}
+    for flow in flows:
+        base_rate = flow.rate / k
+        if base_rate <= 0.0:
+            continue
 
-    switch_load = defaultdict(float)
-    switch_capacity = defaultdict(float)
+        for policy in routing_schedule:
 
-    for eid, (u, v) in enumerate(edge_list):
+            path_nodes = policy(flow.src, flow.dst)
 
-        load_e = float(edge_load[eid])
-        cap_e = float(cap[eid])
-        drop_e = float(edge_dropped[eid])
+            if compiled:
+                # loads and latencies are accumulated by the kernel below
+                path_eids = [
+                    edge_id[(path_nodes[i], path_nodes[i + 1])]
+                    for i in range(len(path_nodes) - 1)
+                ]
+                total_lat = 0.0
+            else:
+                path_eids = []
+                total_lat = 0.0
 
-        edge_load_dict[(u, v)] = load_e
-        edge_capacity_dict[(u, v)] = cap_e
-        edge_dropped_dict[(u, v)] = drop_e
+                for i in range(len(path_nodes) - 1):
+                    eid = edge_id[(path_nodes[i], path_nodes[i + 1])]
+                    path_eids.append(eid)
 
-        switch_load[u] += load_e
-        switch_load[v] += load_e
-        switch_capacity[u] += cap_e
-        switch_capacity[v] += cap_e
+                    edge_load[eid] += base_rate
+                    total_lat += lat_arr[eid]
 
-    return EpochResult(
-        edge_load=edge_load_dict,
-        edge_capacity=edge_capacity_dict,
-        edge_dropped=edge_dropped_dict,
-        flow_paths=flow_paths_eids,
-        flow_rates=flow_rates,
-        flow_latency=flow_latency,
-        switch_load=switch_load,
-        switch_capacity=switch_capacity,
-        total_sent=total_sent,
-        total_dropped=float(total_dropped),
+            flow_paths_eids.append(path_eids)
+            flow_offered.append(base_rate)
+            flow_latency.append(total_lat)
+            # policies return [] when dst is unreachable (failed links)
+            flow_routed.append(bool(path_nodes))
+
+    arrays = None
+    if compiled:
+        arrays = _flatten(flow_paths_eids, flow_offered)
+        flat_eids, offsets, offered_arr = arrays
+        flow_latency = kernels.accumulate_loads(
+            flat_eids, offsets, offered_arr, lat_arr, edge_load
+        ).tolist()
+
+    return flow_paths_eids, flow_offered, flow_latency, flow_routed, arrays
+
+
+def _flatten(paths: List[List[int]], offered: List[float]):
+    """(flat eids, offsets, offered) arrays of per-path lists."""
+    offsets = np.zeros(len(paths) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(p) for p in paths])
+    flat_eids = np.fromiter(
+        (eid for p in paths for eid in p), dtype=np.int64, count=offsets[-1]
     )
+    return flat_eids, offsets, np.asarray(offered, dtype=np.float64)
+
+
+# --------------------------------------------------
+# Streaming epochs
+# --------------------------------------------------
+
+def _stream_flows(flows, routing_schedule, ctx, k, edge_load, edge_dropped, compiled, chunk_size, flow_sinks):
+    """
+    Two-pass epoch over chunks of `chunk_size` flows.
+
+    Pass one routes each chunk and accumulates edge loads; the chunk's
+    paths are spilled to a temporary file as flat arrays and its lists
+    dropped. Pass two reads the chunks back, delivers them against the
+    final utilisation and hands each one to the sinks as a FlowChunk.
+    At most one chunk of paths is in memory at a time.
+
+    Per path, delivered rates, drops and latencies equal the unchunked
+    epoch; totals summed across chunks may differ in the last bits.
+    Returns (total_sent, total_dropped, flow_count, latency_sum).
+    """
+    sinks = [s.process_flows for s in flow_sinks if getattr(s, "process_flows", None)]
+    cap = np.asarray(ctx.capacity, dtype=np.float64)
+
+    total_sent = 0.0
+    chunks = 0
+
+    with tempfile.TemporaryFile() as spill:
+        for start in range(0, len(flows), chunk_size):
+            paths, offered, latency, routed, arrays = _route(
+                flows[start:start + chunk_size], routing_schedule, ctx, k, edge_load, compiled,
+            )
+            if arrays is None:
+                arrays = _flatten(paths, offered)
+            del paths
+
+            total_sent = sum(offered, total_sent)
+            for arr in (*arrays, np.asarray(latency, dtype=np.float64), np.asarray(routed, dtype=np.bool_)):
+                np.save(spill, arr)
+            chunks += 1
+
+        edge_util = _edge_util(edge_load, cap)
+
+        total_dropped = 0.0
+        flow_count = 0
+        latency_sum = 0.0
+
+        spill.seek(0)
+        for _ in range(chunks):
+            flat_eids, offsets, offered, latency, routed = (np.load(spill) for _ in range(5))
+
+            if compiled:
+                rates, dropped = kernels.deliver(flat_eids, offsets, offered, routed, edge_util, k, edge_dropped)
+                total_dropped += dropped
+            else:
+                rates, total_dropped = _deliver_chunk(
+                    flat_eids, offsets, offered, routed, edge_util, k, edge_dropped, total_dropped,
+                )
+
+            flow_count += len(rates)
+            latency_sum = sum(latency.tolist(), latency_sum)
+
+            chunk = FlowChunk(eids=flat_eids, offsets=offsets, rates=rates, latency=latency)
+            for sink in sinks:
+                sink(chunk)
+
+    return total_sent, total_dropped, flow_count, latency_sum
+
+
+def _deliver_chunk(flat_eids, offsets, offered, routed, edge_util, k, edge_dropped, total_dropped):
+    """
+    Phase 3 on flat arrays (numpy): the per-path arithmetic of the loop
+    in run_epoch, drops added to edge_dropped in the same order.
+    Returns (rates, total_dropped).
+    """
+    lens = np.diff(offsets)
+    has_path = lens > 0
+
+    util = np.zeros(len(offered), dtype=np.float64)
+    if has_path.any():
+        util[has_path] = np.maximum.reduceat(edge_util[flat_eids], offsets[:-1][has_path])
+
+    over = routed & (util > 1.0)
+    delivered = offered.copy()
+    np.divide(offered, util, out=delivered, where=over)
+    dropped = offered - delivered
+
+    rates = np.where(has_path, delivered * k, offered)
+    rates[~routed] = 0.0
+
+    # unrouted paths lose their whole rate
+    lost = np.where(routed, dropped, offered)
+    total_dropped = sum(lost.tolist(), total_dropped)
+
+    if over.any():
+        share = dropped[over] / lens[over]
+        np.add.at(edge_dropped, flat_eids[np.repeat(over, lens)], np.repeat(share, lens[over]))
+
+    return rates, total_dropped
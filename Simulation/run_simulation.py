@@ -1,16 +1,25 @@
+import contextlib
 import os
 from multiprocessing import Pool
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import networkx as nx
 
+from Components.routing import dag_store
+from Components.routing.cache import route_cache_stats
 from Components.routing.configurations import POLICY_BUILDERS
 from Components.topology.utils import clear_congestions
-from Components.workloads.congestion import CongestionType
+from Components.workloads.congestion import CongestionType, bind
 from Components.workloads.workload import Workload
+from Simulation.epoch_parallel import check_parallel, run_epochs_parallel
+from Simulation.failures import FailureInjector
 from Simulation.metrics.metric import Metric
+from Simulation.metrics.sparse import edge_load_array
+from Simulation.recorder import EpochRecorder
 from Simulation.run_epoch import run_epoch, build_epoch_context
-from global_randoms import reset_randoms
+from Simulation.steady_state import SteadyStateDetector
+from Simulation.telemetry import Telemetry
+from global_randoms import reset_randoms, set_epoch
 from tqdm import tqdm
 
 def run_simulation(
@@ -21,61 +30,236 @@ def run_simulation(
     policy_names: List[str],
     workload: Workload,
     epochs: int,
+    report: Optional[Dict] = None,
+    recorder: Optional[EpochRecorder] = None,
+    failures: Optional[FailureInjector] = None,
+    steady_state: Optional[SteadyStateDetector] = None,
+    telemetry: Optional[Telemetry] = None,
+    epoch_processes: Optional[int] = None,
+    flow_chunk: Optional[int] = None,
 ) -> Dict[str, float]:
+    """
+    Run `epochs` epochs and return the aggregated metric results.
 
-    for m in metrics:
-        m.reset()
+    If `report` is given it is filled with run diagnostics
+    ("route_caches": per-policy cache stats, "dag_stores": on-disk DAG
+    store stats, "failures": per-event recovery cost and impact).
+    If `recorder` is given every epoch is streamed to it.
+    If `failures` is given its events are applied before each epoch.
+    If `steady_state` is given the warm-up is truncated and the run ends
+    once the tracked series converge (`epochs` becomes a maximum); the
+    returned results cover the steady-state window only and
+    report["steady_state"] holds the detection summary.
+    If `telemetry` is given, progress is published on its endpoint.
+    If `epoch_processes` is given (open-loop congestion only), segments
+    of epochs run on that many worker processes (see epoch_parallel.py);
+    report["epoch_parallel"] holds the segment counts.
+    If `flow_chunk` is given, epochs are streamed in chunks of that many
+    flows (run_epoch chunk_size): per-flow values reach the metrics via
+    process_flows() and no epoch holds all of its paths at once.
+    """
 
-    epoch_result = None
+    if epoch_processes is not None:
+        check_parallel(congestion, failures)
+
+    if flow_chunk is not None:
+        if flow_chunk <= 0:
+            raise ValueError("flow_chunk must be > 0")
+        if epoch_processes is not None:
+            raise ValueError("Streaming epochs do not support epoch-parallel execution")
 
     ctx = build_epoch_context(topology)
 
+    for m in metrics:
+        m.reset()
+        attach = getattr(m, "attach", None)
+        if attach:
+            attach(ctx)
+
+    if steady_state is not None:
+        steady_state.reset(metrics, ctx)
+
+    # epoch-parallel workers build their own policies
     routing_schedule = [
         POLICY_BUILDERS[name](ctx)
         for name in policy_names
-    ]
+    ] if epoch_processes is None else []
+
+    if recorder is not None:
+        recorder.start(ctx)
+
+    if failures is not None:
+        failures.reset()
+
+    if telemetry is not None:
+        telemetry.start(ctx, policy_names, routing_schedule, epochs)
+
+    parallel_stats = None
+    if epoch_processes is not None:
+        parallel_stats = run_epochs_parallel(
+            topology=topology,
+            metrics=metrics,
+            congestion=congestion,
+            workload=workload,
+            epochs=epochs,
+            ctx=ctx,
+            policy_names=policy_names,
+            recorder=recorder,
+            steady_state=steady_state,
+            telemetry=telemetry,
+            processes=epoch_processes,
+        )
+    else:
+        _run_epochs(
+            topology=topology,
+            metrics=metrics,
+            congestion=congestion,
+            workload=workload,
+            epochs=epochs,
+            ctx=ctx,
+            routing_schedule=routing_schedule,
+            recorder=recorder,
+            failures=failures,
+            steady_state=steady_state,
+            telemetry=telemetry,
+            flow_chunk=flow_chunk,
+        )
+
+    if recorder is not None:
+        recorder.close()
+
+    # DAGs computed this run, for the next one on this topology
+    dag_store.flush_all()
+
+    results: Dict[str, float] = {}
+    for m in metrics:
+        results.update(m.result())
+
+    if telemetry is not None:
+        telemetry.observe_metrics(metrics, force=True)
+
+    if steady_state is not None:
+        full_results = results
+        results = steady_state.results()
+
+    if report is not None:
+        report["route_caches"] = route_cache_stats(routing_schedule)
+        report["dag_stores"] = dag_store.dag_store_stats()
+        if parallel_stats is not None:
+            report["epoch_parallel"] = parallel_stats
+        if failures is not None:
+            report["failures"] = failures.report()
+        if steady_state is not None:
+            report["steady_state"] = {**steady_state.report(), "full_results": full_results}
+
+    clear_congestions(topology)
+    reset_randoms()
 
-    for _ in tqdm(range(epochs)):
+    return results
+
+
+def _run_epochs(
+    *,
+    topology: nx.Graph,
+    metrics: List[Metric],
+    congestion: CongestionType,
+    workload: Workload,
+    epochs: int,
+    ctx,
+    routing_schedule: List,
+    recorder: Optional[EpochRecorder],
+    failures: Optional[FailureInjector],
+    steady_state: Optional[SteadyStateDetector],
+    telemetry: Optional[Telemetry],
+    flow_chunk: Optional[int] = None,
+) -> None:
+    """
+    The serial epoch loop: congestion, failures, flow generation,
+    routing, metrics and observers, strictly one after another.
+
+    The phases are deliberately not overlapped. Generating the next
+    epoch's flows and processing the previous epoch's metrics in
+    background workers behind bounded queues was measured and dropped:
+    the two phases take 1-9% of an epoch (netsim_phase_seconds_total
+    shows the split of a run), the GIL serialises thread stages, and
+    shipping EpochResults to a metric process costs more than it hides.
+    Open-loop runs are parallelised across epochs instead
+    (epoch_parallel.py).
+    """
+
+    epoch_result = None
+    step_congestion = bind(congestion, ctx)
+    phase = telemetry.phase if telemetry is not None else _untimed
+
+    # receivers of per-flow chunks in streaming epochs
+    flow_sinks = list(metrics) + ([steady_state] if steady_state is not None else [])
+
+    for epoch in tqdm(range(epochs)):
+
+        # keyed random streams: multipath / congestion draws of this epoch
+        set_epoch(epoch)
 
         # ------------------------------
         # Phase 0: update congestion
         # ------------------------------
-        congestion(topology, epoch_result)
+        with phase("congestion"):
+            # updates the ctx arrays too
+            step_congestion(topology, epoch_result)
 
-        # 🔥 Sync ctx arrays
-        for eid, (u, v) in enumerate(ctx.edge_list):
-            data = topology[u][v]
-            ctx.congestion[eid] = data["congestion"]
-            ctx.stale_congestion[eid] = data["stale_congestion"]
+            # Notify policies (engine weights, per-epoch policy state)
+            for policy in routing_schedule:
+                tick = getattr(policy, "epoch_tick", None)
+                if tick:
+                    tick()
 
-        # Notify engines
-        for policy in routing_schedule:
-            engine = getattr(policy, "engine", None)
-            if engine:
-                engine.epoch_tick()
+        if failures is not None:
+            with phase("failures"):
+                failures.apply(epoch, ctx, routing_schedule)
 
         # ------------------------------
         # Generate flows
         # ------------------------------
-        flows = workload.generate()
+        with phase("generate"):
+            flows = workload.generate()
 
         # ------------------------------
         # Run epoch
         # ------------------------------
-        epoch_result = run_epoch(
-            flows=flows,
-            routing_schedule=routing_schedule,
-            ctx=ctx,
-        )
+        with phase("route"):
+            epoch_result = run_epoch(
+                flows=flows,
+                routing_schedule=routing_schedule,
+                ctx=ctx,
+                chunk_size=flow_chunk,
+                flow_sinks=flow_sinks,
+            )
 
-        for m in metrics:
-            m.process(epoch_result)
+        with phase("metrics"):
+            for m in metrics:
+                m.process(epoch_result)
 
-    results: Dict[str, float] = {}
-    for m in metrics:
-        results.update(m.result())
+            if steady_state is not None:
+                steady_state.process(epoch_result, ctx)
+
+            # completed epochs, for the policies and metrics of later ones
+            ctx.history.append(edge_load_array(epoch_result))
+
+            if telemetry is not None:
+                telemetry.observe_metrics(metrics)
+
+        with phase("observe"):
+            if failures is not None:
+                failures.observe(epoch, epoch_result)
+
+            if recorder is not None:
+                recorder.record(epoch, epoch_result, ctx)
+
+        if telemetry is not None:
+            telemetry.epoch_done(epoch)
+
+        if steady_state is not None and steady_state.converged:
+            break
 
-    clear_congestions(topology)
-    reset_randoms()
 
-    return results
\ No newline at end of file
+def _untimed(name: str):
+    return contextlib.nullcontext()
@@ -0,0 +1,84 @@
+"""
+stats.py
+
+Small statistics helpers shared by the replication runner and the
+steady-state detector (no scipy dependency).
+"""
+
+import math
+from typing import List, Sequence
+
+# Two-sided Student-t critical values t_{1-(1-c)/2, df}
+_T_DF = list(range(1, 31)) + [40, 60, 120]
+_T_TABLE = {
+    0.90: [
+        6.314, 2.920, 2.353, 2.132, 2.015, 1.943, 1.895, 1.860, 1.833, 1.812,
+        1.796, 1.782, 1.771, 1.761, 1.753, 1.746, 1.740, 1.734, 1.729, 1.725,
+        1.721, 1.717, 1.714, 1.711, 1.708, 1.706, 1.703, 1.701, 1.699, 1.697,
+        1.684, 1.671, 1.658,
+    ],
+    0.95: [
+        12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+        2.021, 2.000, 1.980,
+    ],
+    0.99: [
+        63.657, 9.925, 5.841, 4.604, 4.032, 3.707, 3.499, 3.355, 3.250, 3.169,
+        3.106, 3.055, 3.012, 2.977, 2.947, 2.921, 2.898, 2.878, 2.861, 2.845,
+        2.831, 2.819, 2.807, 2.797, 2.787, 2.779, 2.771, 2.763, 2.756, 2.750,
+        2.704, 2.660, 2.617,
+    ],
+}
+_Z = {0.90: 1.645, 0.95: 1.960, 0.99: 2.576}
+
+
+def t_critical(df: int, confidence: float = 0.95) -> float:
+    """
+    Student-t critical value for a two-sided interval.
+
+    Between tabulated degrees of freedom the next lower entry is used
+    (slightly conservative); beyond 120 the normal quantile.
+    """
+    if confidence not in _T_TABLE:
+        raise ValueError(f"Unsupported confidence level: {confidence} (use 0.90, 0.95 or 0.99)")
+    if df < 1:
+        return math.inf
+    if df > _T_DF[-1]:
+        return _Z[confidence]
+
+    table = _T_TABLE[confidence]
+    value = table[0]
+    for d, t in zip(_T_DF, table):
+        if d > df:
+            break
+        value = t
+    return value
+
+
+def batch_means(series: Sequence[float], batch: int) -> List[float]:
+    """Means of consecutive non-overlapping batches (a trailing partial batch is dropped)."""
+    k = len(series) // batch
+    return [sum(series[j * batch:(j + 1) * batch]) / batch for j in range(k)]
+
+
+def mser(series: Sequence[float], batch: int = 5) -> int:
+    """
+    MSER-m warm-up truncation point (White, 1997), in samples.
+
+    Batch means b_0..b_{k-1} are formed; the truncation d minimises
+    sum_{j>=d} (b_j - mean(b_d..))^2 / (k - d)^2 over d <= k/2.
+    """
+    b = batch_means(series, batch)
+    k = len(b)
+    if k < 2:
+        return 0
+
+    best_d, best = 0, math.inf
+    for d in range(k // 2 + 1):
+        tail = b[d:]
+        mean = sum(tail) / len(tail)
+        z = sum((x - mean) ** 2 for x in tail) / len(tail) ** 2
+        if z < best:
+            best_d, best = d, z
+    return best_d * batch
@@ -0,0 +1,240 @@
+"""
+steady_state.py
+
+Warm-up truncation and steady-state stopping for run_simulation().
+
+Per-epoch scalar series (drop ratio, latency, ...) are tracked. The
+warm-up is cut with MSER-5, and the run stops once the batch-means
+confidence interval of every tracked series over the steady-state
+window is within a relative tolerance of its mean. Metrics are then
+reported over that window only.
+
+Because the truncation point is only known at the end, the metrics are
+kept per segment: a new metric set takes over at every batch boundary
+that MSER could still choose (the first half of the run), the last one
+runs to the end. Each epoch feeds only the current set. The results are
+the set starting at the chosen truncation point with every later one
+merged into it (Metric.merge); sums are therefore added per segment
+rather than epoch by epoch.
+"""
+
+import copy
+import math
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+from Simulation.epoch_result import EpochResult, FlowChunk
+from Simulation.metrics.metric import Metric
+from Simulation.stats import batch_means, mser, t_critical
+
+
+def _drop_ratio(r: EpochResult, ctx) -> float:
+    return r.total_dropped / r.total_sent if r.total_sent else 0.0
+
+
+def _throughput(r: EpochResult, ctx) -> float:
+    return r.total_sent - r.total_dropped
+
+
+def _mean_latency(r: EpochResult, ctx) -> float:
+    n = r.num_flows()
+    return r.latency_sum() / n if n else 0.0
+
+
+def _mean_edge_util(r: EpochResult, ctx) -> float:
+    load = r.edge_load_array
+    if load is None:
+        load = np.fromiter((r.edge_load.get(e, 0.0) for e in ctx.edge_list), dtype=np.float64)
+    cap = ctx.capacity
+    util = np.divide(load, cap, out=np.zeros_like(cap), where=cap > 0)
+    return float(util.mean()) if len(util) else 0.0
+
+
+SERIES: Dict[str, Callable[[EpochResult, object], float]] = {
+    "drop_ratio": _drop_ratio,
+    "throughput": _throughput,
+    "mean_latency": _mean_latency,
+    "mean_edge_util": _mean_edge_util,
+}
+
+
+class SteadyStateDetector:
+    """
+    Detect the end of warm-up and convergence of per-epoch series.
+
+    Parameters
+    ----------
+    max_epochs : int
+        Run length without early stopping (run_simulation's `epochs`).
+    series : sequence of str
+        Keys of SERIES to track.
+    tolerance : float
+        Stop when every series' CI half-width <= tolerance * |mean|.
+    batch : int
+        Batch size for MSER and batch means (MSER-5 by default).
+    min_batches : int
+        Minimum number of batches in the steady-state window.
+    min_epochs : int
+        Never stop before this many epochs.
+    confidence : float
+        CI level for the stopping rule.
+    atol : float
+        Absolute slack so series that are identically zero converge.
+    """
+
+    def __init__(
+        self,
+        max_epochs: int,
+        series: Sequence[str] = ("drop_ratio", "mean_latency"),
+        tolerance: float = 0.02,
+        batch: int = 5,
+        min_batches: int = 4,
+        min_epochs: int = 20,
+        confidence: float = 0.95,
+        atol: float = 1e-9,
+    ) -> None:
+        if not series:
+            raise ValueError("SteadyStateDetector needs at least one series")
+        unknown = [s for s in series if s not in SERIES]
+        if unknown:
+            raise ValueError(f"Unknown steady-state series: {unknown} (choose from {list(SERIES)})")
+
+        self.max_epochs = max_epochs
+        self.series = list(series)
+        self.tolerance = tolerance
+        self.batch = batch
+        self.min_batches = min_batches
+        self.min_epochs = min_epochs
+        self.confidence = confidence
+        self.atol = atol
+
+        self._template: List[Metric] = []
+        self.reset([])
+
+    def reset(self, metrics: List[Metric], ctx=None) -> None:
+        """
+        Start a new run; `metrics` must already be reset (and attached to
+        `ctx`, whose history the metric sets then share).
+        """
+        missing = [type(m).__name__ for m in metrics if not hasattr(m, "merge")]
+        if missing:
+            raise ValueError(f"Steady-state detection needs metrics with merge(): {missing}")
+
+        self._shared = {id(ctx.history): ctx.history} if ctx is not None else {}
+        self._template = self._copy(metrics)
+        self._values: Dict[str, List[float]] = {s: [] for s in self.series}
+        # first epoch -> metric set of that segment; only the last one is live
+        self._segments: Dict[int, List[Metric]] = {}
+        self._live: List[Metric] = []
+        self._truncation = 0
+        self._half_widths: Dict[str, float] = {}
+        self.converged = False
+
+    def _copy(self, metrics):
+        # copies share the context's edge history instead of duplicating it
+        return copy.deepcopy(metrics, dict(self._shared))
+
+    @property
+    def epochs(self) -> int:
+        return len(self._values[self.series[0]])
+
+    def _open_segment(self) -> None:
+        # a new segment at every truncation point MSER can pick
+        n = self.epochs
+        if n % self.batch or n > (self.max_epochs // self.batch // 2) * self.batch or n in self._segments:
+            return
+        if not self._live:
+            self._live = self._copy(self._template)
+        else:
+            self._live = [
+                m.successor() if hasattr(m, "successor") else self._copy(fresh)
+                for m, fresh in zip(self._live, self._template)
+            ]
+        self._segments[n] = self._live
+
+    def process_flows(self, chunk: FlowChunk) -> None:
+        """Per-flow values of the epoch in progress (streaming epochs)."""
+        self._open_segment()
+        for m in self._live:
+            process_flows = getattr(m, "process_flows", None)
+            if process_flows:
+                process_flows(chunk)
+
+    def process(self, epoch_result: EpochResult, ctx) -> None:
+        """Feed one epoch; sets self.converged when the run may stop."""
+        n = self.epochs
+        self._open_segment()
+
+        for m in self._live:
+            m.process(epoch_result)
+
+        for s in self.series:
+            self._values[s].append(SERIES[s](epoch_result, ctx))
+
+        n += 1
+        if n % self.batch == 0 and n >= self.min_epochs:
+            self.converged = self._check()
+
+    def _truncation_point(self) -> int:
+        d = max((mser(self._values[s], self.batch) for s in self.series), default=0)
+        # only segment starts are usable
+        return max((c for c in self._segments if c <= d), default=0)
+
+    def _check(self) -> bool:
+        self._truncation = self._truncation_point()
+        converged = True
+
+        for s in self.series:
+            means = batch_means(self._values[s][self._truncation:], self.batch)
+            k = len(means)
+            if k < self.min_batches:
+                self._half_widths[s] = math.inf
+                converged = False
+                continue
+
+            mean = sum(means) / k
+            var = sum((x - mean) ** 2 for x in means) / (k - 1)
+            half = t_critical(k - 1, self.confidence) * math.sqrt(var / k)
+            self._half_widths[s] = half
+            if half > self.tolerance * abs(mean) + self.atol:
+                converged = False
+
+        return converged
+
+    def results(self) -> Dict[str, float]:
+        """Metric results over the steady-state window."""
+        if not self.converged:
+            self._check()
+        merged = None
+        for start in sorted(self._segments):
+            if start < self._truncation:
+                continue
+            if merged is None:
+                merged = self._copy(self._segments[start])
+            else:
+                for m, later in zip(merged, self._segments[start]):
+                    m.merge(later)
+
+        results: Dict[str, float] = {}
+        for m in merged or []:
+            results.update(m.result())
+        return results
+
+    def report(self) -> Dict:
+        epochs = self.epochs
+        return {
+            "converged": self.converged,
+            "epochs_run": epochs,
+            "epochs_max": self.max_epochs,
+            "epochs_saved": self.max_epochs - epochs,
+            "warmup_epochs": self._truncation,
+            "steady_epochs": epochs - self._truncation,
+            "series": {
+                s: {
+                    "mean": float(np.mean(self._values[s][self._truncation:])) if epochs else 0.0,
+                    "half_width": self._half_widths.get(s, math.inf),
+                }
+                for s in self.series
+            },
+        }
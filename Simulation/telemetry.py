@@ -0,0 +1,272 @@
+"""
+telemetry.py
+
+Live progress of a running simulation in Prometheus text format.
+
+Opt-in: run_simulation(telemetry=Telemetry("127.0.0.1:9464")) serves
+GET /metrics on a localhost port ("unix:/path" for a Unix socket, port
+0 for any free port). The server runs on its own daemon thread and only
+reads counters the simulation already keeps, so a scrape never waits on
+an epoch. Metric values (AllMetrics keys) are the exception: result()
+is not safe to call while another thread feeds the metrics, so a
+snapshot is taken by whichever thread processes epochs, at most once
+every `interval` seconds, and scrapes return the latest snapshot.
+
+    curl -s localhost:9464/metrics
+    curl -s --unix-socket /tmp/netsim.sock http://x/metrics
+"""
+
+import contextlib
+import os
+import socketserver
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence
+
+from Components.routing.cache import route_cache_stats
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(labels: Dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class _Exposition:
+    """Accumulates one scrape in text format, HELP/TYPE once per family."""
+
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        self._seen = set()
+
+    def add(self, name: str, kind: str, help_: str, value, **labels) -> None:
+        if value is None:
+            return
+        if name not in self._seen:
+            self._seen.add(name)
+            self.lines.append(f"# HELP {name} {help_}")
+            self.lines.append(f"# TYPE {name} {kind}")
+        self.lines.append(f"{name}{_labels(labels)} {float(value)!r}")
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class Telemetry:
+    """
+    Prometheus endpoint for one process.
+
+    Parameters
+    ----------
+    address : str
+        "host:port", "port" (bound to 127.0.0.1) or "unix:/path".
+    interval : float
+        Minimum seconds between metric-value snapshots.
+    window : int
+        Epochs over which epochs/sec and Dijkstra calls/sec are measured.
+    """
+
+    def __init__(self, address: str = "127.0.0.1:9464", interval: float = 5.0, window: int = 10) -> None:
+        self.address = address
+        self.interval = interval
+
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window + 1)   # (time, epochs done, dijkstra calls)
+        self._server = None
+        self._thread = None
+        self._reset_run(None, [], [], 0)
+
+        self._serve()
+
+    # ---------------------------------------
+    # HTTP server
+    # ---------------------------------------
+
+    def _serve(self) -> None:
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = telemetry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        if self.address.startswith("unix:"):
+            path = self.address[len("unix:"):]
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+            self._server = _UnixHTTPServer(path, Handler)
+            self.url = f"unix:{path}"
+        else:
+            host, _, port = self.address.rpartition(":")
+            self._server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), Handler)
+            self._server.daemon_threads = True
+            bound_host, bound_port = self._server.server_address[:2]
+            self.url = f"http://{bound_host}:{bound_port}/metrics"
+
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        if self.address.startswith("unix:"):
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.address[len("unix:"):])
+        self._server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------------------------------------
+    # Simulation side (run_simulation)
+    # ---------------------------------------
+
+    def _reset_run(self, ctx, policy_names: Sequence[str], routing_schedule: List, epochs: int) -> None:
+        with self._lock:
+            self.ctx = ctx
+            self.policy_names = list(policy_names)
+            self.routing_schedule = list(routing_schedule)
+            self.epochs = epochs
+            self.epoch = 0
+            self.started = time.time()
+            self.phase_seconds: Dict[str, float] = {}
+            self.metric_values: Dict[str, float] = {}
+            self._last_snapshot = 0.0
+            self._samples.clear()
+            self._samples.append((time.perf_counter(), 0, self._dijkstra_calls()))
+
+    def start(self, ctx, policy_names: Sequence[str], routing_schedule: List, epochs: int) -> None:
+        """Begin a run (one Telemetry can serve several runs in sequence)."""
+        self._reset_run(ctx, policy_names, routing_schedule, epochs)
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            with self._lock:
+                self.phase_seconds[name] = self.phase_seconds.get(name, 0.0) + dt
+
+    def epoch_done(self, epoch: int) -> None:
+        with self._lock:
+            self.epoch = epoch + 1
+            self._samples.append((time.perf_counter(), self.epoch, self._dijkstra_calls()))
+
+    def observe_metrics(self, metrics: List, force: bool = False) -> None:
+        """Snapshot metric values; call from the thread that feeds `metrics`."""
+        now = time.perf_counter()
+        if not force and now - self._last_snapshot < self.interval:
+            return
+        values: Dict[str, float] = {}
+        for m in metrics:
+            values.update(m.result())
+        with self._lock:
+            self.metric_values = values
+            self._last_snapshot = now
+
+    # ---------------------------------------
+    # Rendering (HTTP thread)
+    # ---------------------------------------
+
+    def _engines(self):
+        seen = set()
+        for name, policy in zip(self.policy_names, self.routing_schedule):
+            engine = getattr(policy, "engine", None)
+            if engine is not None and id(engine) not in seen:
+                seen.add(id(engine))
+                yield name, engine
+
+    def _dijkstra_calls(self) -> int:
+        return sum(engine.dag_calls for _, engine in self._engines())
+
+    def render(self) -> str:
+        with self._lock:
+            epoch = self.epoch
+            epochs = self.epochs
+            started = self.started
+            phases = dict(self.phase_seconds)
+            values = dict(self.metric_values)
+            samples = list(self._samples)
+
+        out = _Exposition()
+        out.add("netsim_epoch", "gauge", "Epochs completed in the current run.", epoch)
+        out.add("netsim_epochs_max", "gauge", "Epochs requested for the current run.", epochs)
+        out.add("netsim_run_seconds", "gauge", "Wall time since the current run started.", time.time() - started)
+
+        (t0, e0, c0), (t1, e1, c1) = samples[0], samples[-1]
+        if t1 > t0:
+            out.add("netsim_epochs_per_second", "gauge", "Epoch rate over the recent window.", (e1 - e0) / (t1 - t0))
+            out.add("netsim_dijkstra_calls_per_second", "gauge",
+                    "Dijkstra runs per second over the recent window.", (c1 - c0) / (t1 - t0))
+
+        for name, seconds in phases.items():
+            out.add("netsim_phase_seconds_total", "counter", "Wall time spent per epoch phase.", seconds, phase=name)
+
+        for name, engine in self._engines():
+            out.add("netsim_dijkstra_calls_total", "counter", "Dijkstra runs per policy engine.",
+                    engine.dag_calls, policy=name)
+            out.add("netsim_dijkstra_seconds_total", "counter", "Time in Dijkstra per policy engine.",
+                    engine.dag_seconds, policy=name)
+
+        for stats in route_cache_stats(self.routing_schedule):
+            name = stats["name"]
+            out.add("netsim_route_cache_entries", "gauge", "Route cache entries.", stats["entries"], cache=name)
+            out.add("netsim_route_cache_bytes", "gauge", "Estimated route cache size.", stats["bytes"], cache=name)
+            out.add("netsim_route_cache_hits_total", "counter", "Route cache hits.", stats["hits"], cache=name)
+            out.add("netsim_route_cache_misses_total", "counter", "Route cache misses.", stats["misses"], cache=name)
+            out.add("netsim_route_cache_hit_ratio", "gauge", "Route cache hit rate.", stats["hit_rate"], cache=name)
+            out.add("netsim_route_cache_evictions_total", "counter", "Route cache evictions.",
+                    stats["evictions"], cache=name)
+
+        out.add("netsim_rss_bytes", "gauge", "Resident memory of the simulation process.", rss_bytes())
+
+        for key, value in values.items():
+            out.add("netsim_metric", "gauge", "Running value of each AllMetrics key.", value, key=key)
+
+        return out.text()
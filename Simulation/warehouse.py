@@ -0,0 +1,343 @@
+"""
+warehouse.py
+
+Incremental SQLite store for simulation results.
+
+Runs launched through main.py --warehouse write their metrics and full
+configuration here directly. Legacy `.out` logs are ingested once each
+(tracked by path, size and mtime), so recompiling a growing results
+directory only touches new files.
+
+Schema:
+    runs(id, run_key, topology, workload, policy, rate, hosts, flows,
+         epochs, alpha, seed, code_version, source, created_at, config)
+    metrics(run_id, key, value)
+    ingested(path, size, mtime, run_id)
+"""
+
+import csv
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id           INTEGER PRIMARY KEY,
+    run_key      TEXT UNIQUE NOT NULL,
+    topology     TEXT,
+    workload     TEXT,
+    policy       TEXT,
+    rate         REAL,
+    hosts        INTEGER,
+    flows        INTEGER,
+    epochs       INTEGER,
+    alpha        REAL,
+    seed         INTEGER,
+    code_version TEXT,
+    source       TEXT,
+    created_at   TEXT,
+    config       TEXT
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    key    TEXT NOT NULL,
+    value  REAL,
+    PRIMARY KEY (run_id, key)
+);
+CREATE TABLE IF NOT EXISTS ingested (
+    path   TEXT PRIMARY KEY,
+    size   INTEGER,
+    mtime  REAL,
+    run_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_runs_config ON runs(topology, workload, policy, rate);
+CREATE INDEX IF NOT EXISTS idx_runs_policy ON runs(policy);
+CREATE INDEX IF NOT EXISTS idx_runs_workload ON runs(workload);
+CREATE INDEX IF NOT EXISTS idx_runs_rate ON runs(rate);
+CREATE INDEX IF NOT EXISTS idx_metrics_key ON metrics(key);
+"""
+
+RUN_COLUMNS = (
+    "topology", "workload", "policy", "rate", "hosts", "flows",
+    "epochs", "alpha", "seed",
+)
+
+# The results block is at the end of a log; no need to read tqdm noise.
+_TAIL_BYTES = 16384
+
+_FILENAME_PATTERN = re.compile(
+    r"""
+    ^\d+_                                  # job index
+    (?P<topology>.+?)_                     # topology
+    (?P<workload>incast|random_workload|local_group_workload)_  # workload
+    (?P<policy>.+?_configuration)_         # policy
+    r(?P<rate>\d+)                         # rate
+    \.out$
+    """,
+    re.VERBOSE,
+)
+_HOSTS_PATTERN = re.compile(r"^Generated (\d+) hosts", re.MULTILINE)
+_EPOCHS_PATTERN = re.compile(r"\| *\d+/(\d+) \[")
+
+
+def code_version() -> str:
+    """Current git revision of the simulator, or 'unknown'."""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+# ---------------------------------------
+# Legacy .out parsing
+# ---------------------------------------
+
+def parse_filename(filename: str) -> Dict:
+    """
+    Example:
+    104_leaf_spine_random_workload_ospf_ecmp_configuration_r20.out
+    """
+    match = _FILENAME_PATTERN.match(filename)
+    if not match:
+        raise ValueError(f"Filename format not recognized: {filename}")
+
+    return {
+        "topology": match.group("topology"),
+        "workload": match.group("workload"),
+        "policy": match.group("policy"),
+        "rate": int(match.group("rate")),
+    }
+
+
+def parse_metrics(text: str) -> Dict[str, float]:
+    """Numeric key : value lines after '=== Simulation Results ==='."""
+    metrics = {}
+    _, sep, block = text.partition("=== Simulation Results ===")
+    if not sep:
+        return metrics
+
+    for line in block.splitlines():
+        if line.startswith("==="):
+            break
+        key, colon, value = line.partition(":")
+        if not colon:
+            continue
+        try:
+            metrics[key.strip()] = float(value)
+        except ValueError:
+            pass
+
+    return metrics
+
+
+def _read_head_tail(path: str) -> Tuple[str, str]:
+    with open(path, "rb") as f:
+        head = f.read(512).decode(errors="ignore")
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - _TAIL_BYTES))
+        tail = f.read().decode(errors="ignore")
+    return head, tail
+
+# ---------------------------------------
+# Warehouse
+# ---------------------------------------
+
+class ResultsWarehouse:
+    """SQLite-backed results store. Safe to reopen; schema is created lazily."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------
+    # writing
+    # ------------------------
+
+    def has_run(self, run_key: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM runs WHERE run_key = ?", (run_key,)).fetchone() is not None
+
+    def add_run(
+        self,
+        config: Dict,
+        metrics: Dict[str, float],
+        *,
+        source: str = "direct",
+        run_key: Optional[str] = None,
+        version: Optional[str] = None,
+    ) -> int:
+        """Insert one run and its metrics; returns the run id."""
+        row = {c: config.get(c) for c in RUN_COLUMNS}
+
+        with self.conn:
+            cur = self.conn.execute(
+                f"""
+                INSERT INTO runs (run_key, {", ".join(RUN_COLUMNS)},
+                                  code_version, source, created_at, config)
+                VALUES (?, {", ".join("?" * len(RUN_COLUMNS))}, ?, ?, ?, ?)
+                """,
+                (
+                    run_key or uuid.uuid4().hex,
+                    *row.values(),
+                    version or code_version(),
+                    source,
+                    time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    json.dumps(config, default=str, sort_keys=True),
+                ),
+            )
+            run_id = cur.lastrowid
+            self.conn.executemany(
+                "INSERT INTO metrics (run_id, key, value) VALUES (?, ?, ?)",
+                [(run_id, k, float(v)) for k, v in metrics.items()],
+            )
+        return run_id
+
+    def ingest_directory(self, directory: str, verbose: bool = True) -> int:
+        """Ingest every new or modified .out file; returns the number added."""
+        known = {
+            path: (size, mtime)
+            for path, size, mtime in self.conn.execute("SELECT path, size, mtime FROM ingested")
+        }
+
+        added = 0
+        for fname in sorted(os.listdir(directory)):
+            if not fname.endswith(".out"):
+                continue
+
+            full_path = os.path.abspath(os.path.join(directory, fname))
+            st = os.stat(full_path)
+            if known.get(full_path) == (st.st_size, st.st_mtime):
+                continue
+
+            if self.ingest_file(full_path, st):
+                added += 1
+            elif verbose:
+                print(f"Skipping (no results block): {fname}")
+
+        return added
+
+    def ingest_file(self, path: str, st: Optional[os.stat_result] = None) -> bool:
+        st = st or os.stat(path)
+        head, tail = _read_head_tail(path)
+        metrics = parse_metrics(tail)
+
+        run_id = None
+        if metrics:
+            config = parse_filename(os.path.basename(path))
+            hosts = _HOSTS_PATTERN.search(head)
+            epochs = _EPOCHS_PATTERN.findall(tail)
+            config["hosts"] = int(hosts.group(1)) if hosts else None
+            config["epochs"] = int(epochs[-1]) if epochs else None
+
+            run_key = f"file:{os.path.basename(path)}"
+            with self.conn:
+                # re-ingesting a modified log replaces its previous run
+                self.conn.execute("DELETE FROM runs WHERE run_key = ?", (run_key,))
+            run_id = self.add_run(config, metrics, source=path, run_key=run_key, version="legacy")
+
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ingested (path, size, mtime, run_id) VALUES (?, ?, ?, ?)",
+                (path, st.st_size, st.st_mtime, run_id),
+            )
+        return run_id is not None
+
+    # ------------------------
+    # querying
+    # ------------------------
+
+    def _where(self, where: Optional[Dict]) -> Tuple[str, List]:
+        if not where:
+            return "", []
+        clauses, params = [], []
+        for column, value in where.items():
+            if column not in RUN_COLUMNS + ("code_version", "source"):
+                raise ValueError(f"Unknown run column: {column}")
+            if isinstance(value, (list, tuple, set)):
+                clauses.append(f"r.{column} IN ({', '.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                clauses.append(f"r.{column} = ?")
+                params.append(value)
+        return " AND " + " AND ".join(clauses), params
+
+    def pivot(
+        self,
+        metric: str,
+        rows: str = "policy",
+        cols: str = "rate",
+        where: Optional[Dict] = None,
+        agg: str = "AVG",
+    ) -> Dict:
+        """
+        Pivot one metric into {row_value: {col_value: aggregate}}.
+
+        Example:
+            wh.pivot("drop_ratio", rows="policy", cols="rate",
+                     where={"topology": "fat_tree", "workload": "incast"})
+        """
+        for column in (rows, cols):
+            if column not in RUN_COLUMNS:
+                raise ValueError(f"Unknown run column: {column}")
+        if agg.upper() not in ("AVG", "MIN", "MAX", "SUM", "COUNT"):
+            raise ValueError(f"Unsupported aggregate: {agg}")
+
+        clause, params = self._where(where)
+        query = f"""
+            SELECT r.{rows}, r.{cols}, {agg}(m.value)
+            FROM runs r JOIN metrics m ON m.run_id = r.id
+            WHERE m.key = ?{clause}
+            GROUP BY r.{rows}, r.{cols}
+            ORDER BY r.{rows}, r.{cols}
+        """
+        table: Dict = {}
+        for row, col, value in self.conn.execute(query, [metric, *params]):
+            table.setdefault(row, {})[col] = value
+        return table
+
+    def rows(self, where: Optional[Dict] = None) -> Iterable[Dict]:
+        """Yield one flat dict (config columns + metrics) per run."""
+        clause, params = self._where(where)
+        runs = self.conn.execute(
+            f"SELECT r.id, {', '.join('r.' + c for c in RUN_COLUMNS)} FROM runs r WHERE 1=1{clause} ORDER BY r.id",
+            params,
+        ).fetchall()
+
+        for run_id, *values in runs:
+            row = {c: v for c, v in zip(RUN_COLUMNS, values) if v is not None}
+            row.update(self.conn.execute(
+                "SELECT key, value FROM metrics WHERE run_id = ?", (run_id,)
+            ).fetchall())
+            yield row
+
+    def export_csv(self, path: str, where: Optional[Dict] = None) -> int:
+        rows = list(self.rows(where))
+        if not rows:
+            return 0
+
+        fieldnames = sorted(set().union(*(row.keys() for row in rows)))
+        with open(path, "w", newline="") as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+        return len(rows)
@@ -1,5 +1,23 @@
 import random
 
+import numpy as np
+
+# Named random streams shared by the whole simulator.
+#
+# "sequential" (default): one random.Random per component, each drawn in
+# program order, so epoch t depends on every draw before it.
+# "keyed": counter-based streams. stream(component, *counters) is a
+# Philox generator keyed by (seed, component, *counters) and can be
+# recreated anywhere, in any order. Workloads draw from
+# stream("workload", epoch); set_epoch() rebinds the per-epoch
+# multipath and congestion streams.
+
+COMPONENTS = ("workload", "topology", "weights", "policy", "multipath", "congestion", "failures")
+MODES = ("sequential", "keyed")
+PER_EPOCH = ("multipath", "congestion")
+
+mode = "sequential"
+
 seed = 42
 master = random.Random(seed)
 workload = random.Random(master.randrange(2**32))
@@ -8,13 +26,102 @@ weights = random.Random(master.randrange(2**32))
 policy = random.Random(master.randrange(2**32))
 multipath = random.Random(master.randrange(2**32))
 congestion = random.Random(master.randrange(2**32))
+failures = random.Random(master.randrange(2**32))
+
+
+class KeyedRandom(random.Random):
+    """
+    random.Random API over a NumPy Philox counter-based generator.
+
+    Only random() and getrandbits() are overridden; choice, sample,
+    shuffle, randrange, choices, uniform, ... all derive from them.
+    """
+
+    _BLOCK = 1024
+
+    def __init__(self, seed_seq=None) -> None:
+        self._bits = np.random.Philox(seed_seq)
+        self._buf = []
+        self._pos = 0
+        super().__init__()
+
+    def seed(self, *args, **kwargs) -> None:
+        # keyed by construction; random.Random.__init__ calls this
+        pass
+
+    def _next64(self) -> int:
+        if self._pos == len(self._buf):
+            self._buf = self._bits.random_raw(self._BLOCK).tolist()
+            self._pos = 0
+        x = self._buf[self._pos]
+        self._pos += 1
+        return x
+
+    def random(self) -> float:
+        return (self._next64() >> 11) * (1.0 / 9007199254740992.0)
+
+    def getrandbits(self, k: int) -> int:
+        if k <= 64:
+            return self._next64() >> (64 - k)
+        x = 0
+        for _ in range((k + 63) // 64):
+            x = (x << 64) | self._next64()
+        return x >> (-k % 64)
+
+    def getstate(self):
+        return self._bits.state, list(self._buf), self._pos
+
+    def setstate(self, state) -> None:
+        self._bits.state, self._buf, self._pos = state[0], list(state[1]), state[2]
+
+
+def stream(component, *counters):
+    """
+    The stream of `component` for a key such as (epoch,).
+
+    Keyed mode: a fresh generator determined by (seed, component,
+    *counters) alone. Sequential mode: the shared stream of the
+    component, whatever the key.
+    """
+    if mode == "keyed":
+        key = (COMPONENTS.index(component), *(int(c) for c in counters))
+        return KeyedRandom(np.random.SeedSequence(seed, spawn_key=key))
+    return globals()[component]
+
+
+def set_mode(new_mode):
+    """Select "sequential" or "keyed" streams; takes effect at reset_randoms()."""
+    global mode
+    if new_mode not in MODES:
+        raise ValueError(f"Unknown random stream mode: {new_mode} (choose from {MODES})")
+    mode = new_mode
+
+
+def set_epoch(epoch):
+    """Point the per-epoch streams (multipath, congestion) at `epoch` (keyed mode only)."""
+    if mode != "keyed":
+        return
+    g = globals()
+    for component in PER_EPOCH:
+        g[component] = stream(component, epoch)
+
 
-def reset_randoms():
-    global master, workload, topology, weights, policy, multipath, congestion
+def reset_randoms(new_seed=None):
+    """Recreate every stream from `seed` (replaced by new_seed if given)."""
+    global seed, master, workload, topology, weights, policy, multipath, congestion, failures
+    if new_seed is not None:
+        seed = new_seed
+    if mode == "keyed":
+        master = random.Random(seed)
+        workload, topology, weights, policy, multipath, congestion, failures = (
+            stream(c) for c in COMPONENTS
+        )
+        return
     master = random.Random(seed)
     workload = random.Random(master.randrange(2 ** 32))
     topology = random.Random(master.randrange(2 ** 32))
     weights = random.Random(master.randrange(2 ** 32))
     policy = random.Random(master.randrange(2 ** 32))
     multipath = random.Random(master.randrange(2 ** 32))
-    congestion = random.Random(master.randrange(2 ** 32))
\ No newline at end of file
+    congestion = random.Random(master.randrange(2 ** 32))
+    failures = random.Random(master.randrange(2 ** 32))
@@ -1,69 +1,151 @@
-import random
-
+from Components.routing import kernels, search
 from Components.routing.configurations import policy_configuration
 from Components.topology.configuration import topology_configuration
 from Components.host import generate_hosts
-from Components.workloads.configuration import workload_configuration
-from Components.workloads.congestion import carry_over
+from Components.workloads.configuration import congestion_configuration, workload_configuration
+from Components.workloads.trace import record_trace
+from Simulation.experiment import build_workload, configure, run_experiment, start_telemetry
+from Simulation.jobqueue import job_key, run_worker
 from Simulation.metrics.metric import AllMetrics
-from Simulation.run_simulation import run_simulation
+from Simulation.replication import run_replications
+from Simulation.steady_state import SERIES
+from Simulation.warehouse import ResultsWarehouse
+from global_randoms import MODES, reset_randoms, set_mode
 import argparse
 
-def parse_args():
+def build_parser():
     p = argparse.ArgumentParser()
 
-    p.add_argument("--topology", choices=topology_configuration.keys(), required=True)
-    p.add_argument("--workload", choices=workload_configuration.keys(), required=True)
-    p.add_argument("--policy", choices=policy_configuration.keys(), required=True)
+    # required unless --worker
+    p.add_argument("--topology", choices=topology_configuration.keys())
+    p.add_argument("--workload", choices=workload_configuration.keys())
+    p.add_argument("--policy", choices=policy_configuration.keys())
 
+    p.add_argument("--congestion", choices=congestion_configuration.keys(), default="carry_over",
+                   help="congestion model; uniform and ar1 are open-loop")
     p.add_argument("--hosts", type=int, default=128)
     p.add_argument("--flows", type=int, default=3000)
     p.add_argument("--rate", type=float, default=15)
     p.add_argument("--alpha", type=float, default=0.9)
     p.add_argument("--epochs", type=int, default=100)
     p.add_argument("--threads", type=int, default=1)
-    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--seed", type=int, default=42,
+                   help="seed of every random stream (first seed with --replications)")
+    p.add_argument("--rng", choices=MODES, default="sequential",
+                   help="keyed: counter-based streams keyed by (seed, component, epoch)")
+    p.add_argument("--route-cache-entries", type=int, default=None,
+                   help="max cached entries per policy (default: unbounded)")
+    p.add_argument("--route-cache-mb", type=float, default=None,
+                   help="max estimated route cache size per policy in MiB (default: unbounded)")
+    p.add_argument("--dag-store", type=str, default=None,
+                   help="directory to keep static-weight (rip / conga) DAGs in across runs")
+    p.add_argument("--search", choices=search.MODES, default="full",
+                   help="targeted: stop shortest-path searches at this epoch's destinations; "
+                        "alt: targeted A* with landmark bounds")
+    p.add_argument("--landmarks", type=int, default=8,
+                   help="landmarks per weight version for --search alt")
+    p.add_argument("--bfs-batch", type=int, default=64,
+                   help="sources per batched BFS for hop-count policies (0: per-source Dijkstra)")
+    p.add_argument("--record", type=str, default=None,
+                   help="directory to stream per-epoch scalars and edge vectors to")
+    p.add_argument("--warehouse", type=str, default=None,
+                   help="SQLite results warehouse to append this run to")
+    p.add_argument("--trace", type=str, default=None,
+                   help="trace base path replayed by --workload trace_replay")
+    p.add_argument("--dump-trace", type=str, default=None,
+                   help="record --epochs epochs of --workload to this trace base path and exit")
+    p.add_argument("--failures", type=str, default=None,
+                   help="JSON failure schedule (see Simulation/failures.py)")
+    p.add_argument("--fail-mtbf", type=float, default=None,
+                   help="random failures: mean epochs between failures per element")
+    p.add_argument("--fail-mttr", type=float, default=3.0,
+                   help="random failures: mean epochs to repair")
+    p.add_argument("--fail-kind", choices=["link", "switch"], default="link")
+    p.add_argument("--kernels", choices=kernels.BACKENDS, default="python",
+                   help="numba: compiled Dijkstra / load kernels (falls back if numba is missing)")
+    p.add_argument("--epoch-processes", type=int, default=None,
+                   help="run epochs in parallel on N processes (open-loop --congestion, --rng keyed); "
+                        "DRILL / CONGA schedules split only where routing weights change, which "
+                        "the default uniform / ar1 congestion never causes")
+    p.add_argument("--flow-chunk", type=int, default=None,
+                   help="stream each epoch in chunks of N flows (two passes; bounds per-flow memory)")
+    p.add_argument("--windowed-util", action="store_true",
+                   help="also report sustained hotspots (peak_window_edge_util, peak_ewma_edge_util)")
+    p.add_argument("--steady-state", action="store_true",
+                   help="cut the warm-up (MSER-5) and stop once tracked series converge; --epochs is the maximum")
+    p.add_argument("--ss-series", choices=SERIES.keys(), action="append", default=None,
+                   help="per-epoch series tracked for convergence (default: drop_ratio, mean_latency)")
+    p.add_argument("--ss-tolerance", type=float, default=0.02,
+                   help="relative CI half-width at which a series counts as converged")
+    p.add_argument("--ss-min-epochs", type=int, default=20)
+    p.add_argument("--replications", type=int, default=None,
+                   help="run up to N seeds (--seed, --seed+1, ...) and report mean and CI")
+    p.add_argument("--min-replications", type=int, default=3)
+    p.add_argument("--ci-metric", action="append", default=None,
+                   help="metric whose CI half-width decides when to stop (repeatable)")
+    p.add_argument("--ci-target", type=float, default=None,
+                   help="stop once every --ci-metric half-width is below this")
+    p.add_argument("--ci-relative", action="store_true",
+                   help="--ci-target is relative to the metric mean")
+    p.add_argument("--confidence", type=float, choices=[0.90, 0.95, 0.99], default=0.95)
+    p.add_argument("--processes", type=int, default=None,
+                   help="parallel replications (default: CPU count)")
+    p.add_argument("--worker", action="store_true",
+                   help="run jobs from --queue until it is drained (see results/netsim_sweep.py)")
+    p.add_argument("--queue", type=str, default=None,
+                   help="sweep job queue database on a shared filesystem")
+    p.add_argument("--lease", type=float, default=120.0,
+                   help="seconds without heartbeat before a running job is requeued")
+    p.add_argument("--max-jobs", type=int, default=None)
+    p.add_argument("--telemetry", type=str, default=None, metavar="ADDR",
+                   help="serve Prometheus metrics on [host:]port (0: any free port) or unix:/path")
+    p.add_argument("--telemetry-interval", type=float, default=5.0,
+                   help="seconds between snapshots of running metric values")
+
+    return p
+
 
-    return p.parse_args()
+def parse_args():
+    p = build_parser()
+    args = p.parse_args()
+
+    if args.worker:
+        if not args.queue:
+            p.error("--worker needs --queue")
+    else:
+        missing = [f"--{name}" for name in ("topology", "workload", "policy") if getattr(args, name) is None]
+        if missing:
+            p.error(f"the following arguments are required: {', '.join(missing)}")
+        if args.trace and args.workload != "trace_replay":
+            p.error("--trace is only read by --workload trace_replay")
+        if args.workload == "trace_replay" and not args.trace:
+            p.error("--workload trace_replay needs --trace")
+
+    return args
 
 def main():
     args = parse_args()
-    random.seed(args.seed)
-
-    # ----- setup -----
-    hosts = generate_hosts(args.hosts)
-    print(f"Generated {len(hosts)} hosts")
 
-    metrics = [AllMetrics()]
-    congestion = carry_over()
+    if args.worker:
+        work(args)
+        return
 
-    # workload from registry
-    workload_cls = workload_configuration[args.workload]
-    workload = workload_cls(
-        hosts,
-        flows_per_epoch=args.flows,
-        rate=args.rate,
-        alpha=args.alpha,
-    )
+    print(f"Kernels: {configure(args)}")
 
-    # topology from registry
-    topology = topology_configuration[args.topology](hosts)
-    for _, _, data in topology.edges(data=True):
-        data.setdefault("congestion", 0.0)
-        data.setdefault("stale_congestion", 0.0)
-    print(f"Graph: {topology.number_of_nodes()} nodes, {topology.number_of_edges()} edges")
+    if args.dump_trace:
+        set_mode(args.rng)
+        reset_randoms(args.seed)
+        workload = build_workload(args, generate_hosts(args.hosts))
+        record_trace(workload, args.epochs, args.dump_trace, metadata=vars(args))
+        print(f"Recorded {args.epochs} epochs of {args.workload} to {args.dump_trace}")
+        return
 
-    policy_names = policy_configuration[args.policy]
+    if args.replications:
+        replicate(args)
+        return
 
     # ----- run -----
-    results = run_simulation(
-        topology=topology,
-        metrics=metrics,
-        congestion=congestion,
-        policy_names=policy_names,
-        workload=workload,
-        epochs=args.epochs
-    )
+    results, report = run_experiment(args)
 
     # ----- print -----
     print("\n=== Simulation Results ===")
@@ -75,6 +157,126 @@ def main():
     for k, v in results.items():
         print(f"{k:20s} : {v:.4f}")
 
+    if args.warehouse:
+        with ResultsWarehouse(args.warehouse) as warehouse:
+            warehouse.add_run(vars(args), results)
+
+    if "failures" in report:
+        print("\n=== Failures ===")
+        for f in report["failures"]:
+            print(
+                f"epoch {f['epoch']:4d} {', '.join(f['events'])}: "
+                f"repaired={f['repaired_sources']} invalidated={f['invalidated_sources']}/{f['cached_sources']} "
+                f"recovery~{f['recovery_seconds_est']:.4f}s (patch {f['repair_seconds']:.4f}s "
+                f"+ recompute~{f['recompute_seconds_est']:.4f}s) full~{f['full_recompute_seconds_est']:.4f}s "
+                f"epoch dijkstra={f['epoch_dijkstra_calls']}/{f['epoch_dijkstra_seconds']:.4f}s "
+                f"drop_ratio {f['drop_ratio_before']:.4f} -> {f['drop_ratio']:.4f}"
+            )
+
+    if "steady_state" in report:
+        ss = report["steady_state"]
+        state = "converged" if ss["converged"] else "did NOT converge"
+        print("\n=== Steady State ===")
+        print(
+            f"{state}: ran {ss['epochs_run']}/{ss['epochs_max']} epochs "
+            f"(saved {ss['epochs_saved']}), warm-up {ss['warmup_epochs']}, "
+            f"steady window {ss['steady_epochs']}"
+        )
+        for name, series in ss["series"].items():
+            print(f"{name:20s} : {series['mean']:.4f} ± {series['half_width']:.4f}")
+
+    if "epoch_parallel" in report:
+        ep = report["epoch_parallel"]
+        print("\n=== Epoch Parallel ===")
+        print(f"{ep['epochs']} epochs in {ep['segments']} segments on {ep['processes']} processes")
+
+    print("\n=== Route Caches ===")
+    for s in report["route_caches"]:
+        print(
+            f"{s['name']:32s} entries={s['entries']} "
+            f"bytes={s['bytes'] / 2**20:.1f}MiB hit_rate={s['hit_rate']:.3f} "
+            f"evictions={s['evictions']}"
+        )
+
+    if report.get("dag_stores"):
+        print("\n=== DAG Store ===")
+        for s in report["dag_stores"]:
+            print(f"{s['name']:32s} sources={s['sources']} hits={s['hits']} misses={s['misses']}")
+
+
+def work(args):
+    warehouse = ResultsWarehouse(args.warehouse) if args.warehouse else None
+    # one endpoint for the worker's lifetime, reused by every job
+    telemetry = start_telemetry(args)
+
+    def run_job(job_args):
+        configure(job_args)
+        results, _ = run_experiment(job_args, telemetry)
+        return results
+
+    def on_done(job, results):
+        run_key = f"queue:{job_key(job.config)}"
+        if warehouse is not None and not warehouse.has_run(run_key):
+            warehouse.add_run(job.config, results, source="queue", run_key=run_key)
+
+    try:
+        n = run_worker(args.queue, run_job, lease=args.lease, heartbeat_every=args.lease / 6,
+                       max_jobs=args.max_jobs, on_done=on_done)
+    finally:
+        if warehouse is not None:
+            warehouse.close()
+        if telemetry is not None:
+            telemetry.close()
+
+    print(f"Worker finished: {n} jobs completed")
+
+
+def replicate(args):
+    # every run reports the AllMetrics keys; catch typos before the first replication
+    known = AllMetrics(windowed=args.windowed_util).result()
+    unknown = [k for k in args.ci_metric or () if k not in known]
+    if unknown:
+        build_parser().error(
+            f"unknown --ci-metric {', '.join(unknown)} (choose from {', '.join(sorted(known))})"
+        )
+
+    warehouse = ResultsWarehouse(args.warehouse) if args.warehouse else None
+
+    def on_replication(seed, results):
+        line = ", ".join(f"{k}={results[k]:.4f}" for k in args.ci_metric or ())
+        print(f"seed {seed}: done {line}")
+        if warehouse is not None:
+            warehouse.add_run({**vars(args), "seed": seed}, results, source="replication")
+
+    try:
+        out = run_replications(
+            args,
+            max_replications=args.replications,
+            min_replications=args.min_replications,
+            key_metrics=args.ci_metric or (),
+            target=args.ci_target,
+            relative=args.ci_relative,
+            confidence=args.confidence,
+            processes=args.processes,
+            on_replication=on_replication,
+        )
+    finally:
+        if warehouse is not None:
+            warehouse.close()
+
+    n = len(out["replications"])
+    print(f"\n=== Replication Results ({n} seeds, {args.confidence:.0%} CI) ===")
+    print(f"topology : {args.topology}")
+    print(f"workload : {args.workload}")
+    print(f"policy   : {args.policy}")
+    if args.ci_target is not None and args.ci_metric:
+        state = "reached" if out["converged"] else "NOT reached"
+        print(f"target   : {state} after {n}/{args.replications} replications")
+    print()
+
+    for k, stats in out["summary"].items():
+        print(f"{k:20s} : {stats['mean']:.4f} ± {stats['half_width']:.4f}")
+
 
 if __name__ == "__main__":
     main()
@@ -1,111 +1,44 @@
-import os
-import re
-import csv
-
-INPUT_DIR = f"C:/Users/hatoa/Aspire/results"
-OUTPUT_CSV = "aggregated_results.csv"
-
-# ---------------------------------------
-# Helper: parse metrics block
-# ---------------------------------------
-
-def parse_metrics(text):
-    metrics = {}
-    in_block = False
-
-    for line in text.splitlines():
-        line = line.strip()
-
-        if line.startswith("=== Simulation Results ==="):
-            in_block = True
-            continue
-
-        if in_block and ":" in line:
-            key, value = line.split(":", 1)
-            key = key.strip()
-            value = value.strip()
-
-            # Try convert to float if possible
-            try:
-                value = float(value)
-            except ValueError:
-                pass
+"""
+Compile sweep logs into the results warehouse and export a CSV.
 
-            metrics[key] = value
+Only `.out` files that are new (or changed) since the last compile are
+parsed. Run from the repository root:
 
-    return metrics
+    python -m results.netsim_compile [INPUT_DIR] [--db results.sqlite] [--csv aggregated_results.csv]
+"""
 
+import argparse
+import os
 
-# ---------------------------------------
-# Helper: parse filename metadata
-# ---------------------------------------
-
-def parse_filename(filename):
-    """
-    Example:
-    104_leaf_spine_random_workload_ospf_ecmp_configuration_r20.out
-    """
-
-    pattern = r"""
-        ^\d+_                                  # job index
-        (?P<topology>.+?)_                     # topology
-        (?P<workload>incast|random_workload|local_group_workload)_  # workload
-        (?P<policy>.+?_configuration)_         # policy
-        r(?P<rate>\d+)                         # rate
-        \.out$
-    """
-
-    match = re.match(pattern, filename, re.VERBOSE)
-
-    if not match:
-        raise ValueError(f"Filename format not recognized: {filename}")
-
-    return {
-        "topology": match.group("topology"),
-        "workload": match.group("workload"),
-        "policy": match.group("policy"),
-        "rate": int(match.group("rate")),
-    }
-# ---------------------------------------
-# Main aggregation
-# ---------------------------------------
-
-rows = []
+from Simulation.warehouse import ResultsWarehouse
 
-for fname in os.listdir(INPUT_DIR):
-    if not fname.endswith(".out"):
-        continue
+HERE = os.path.dirname(os.path.abspath(__file__))
 
-    full_path = os.path.join(INPUT_DIR, fname)
 
-    with open(full_path, "r", errors="ignore") as f:
-        content = f.read()
+def parse_args():
+    p = argparse.ArgumentParser()
 
-    metrics = parse_metrics(content)
+    p.add_argument("input_dir", nargs="?", default=HERE)
+    p.add_argument("--db", default=os.path.join(HERE, "results.sqlite"))
+    p.add_argument("--csv", default=os.path.join(HERE, "aggregated_results.csv"))
 
-    if not metrics:
-        print(f"Skipping (no results block): {fname}")
-        continue
+    return p.parse_args()
 
-    meta = parse_filename(fname)
 
-    row = {**meta, **metrics}
-    rows.append(row)
+def main():
+    args = parse_args()
 
-# ---------------------------------------
-# Write CSV
-# ---------------------------------------
+    with ResultsWarehouse(args.db) as warehouse:
+        added = warehouse.ingest_directory(args.input_dir)
+        print(f"Ingested {added} new runs into {args.db}")
 
-if not rows:
-    print("No valid results found.")
-    exit()
+        n = warehouse.export_csv(args.csv)
+        if not n:
+            print("No valid results found.")
+            return
 
-# Collect all keys dynamically
-fieldnames = sorted(set().union(*(row.keys() for row in rows)))
+    print(f"Saved {n} rows to {args.csv}")
 
-with open(OUTPUT_CSV, "w", newline="") as csvfile:
-    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-    writer.writeheader()
-    writer.writerows(rows)
 
-print(f"Saved {len(rows)} rows to {OUTPUT_CSV}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Distributed sweeps over a shared-filesystem job queue.
+
+The coordinator writes the sweep grid into a queue database; workers on
+any machine that mounts the same directory drain it with main.py. Run
+from the repository root:
+
+    python -m results.netsim_sweep submit sweep.sqlite \\
+        --topology fat_tree jellyfish --workload random_workload \\
+        --policy ospf_ecmp_configuration conga_configuration \\
+        --rate 0.5 1.0 -- --hosts 1024 --epochs 50
+
+    python main.py --worker --queue sweep.sqlite      # on every machine
+    python -m results.netsim_sweep status sweep.sqlite
+    python -m results.netsim_sweep export sweep.sqlite [--db results.sqlite] [--csv sweep.csv]
+
+Arguments after `--` are passed to every job as main.py arguments.
+"""
+
+import argparse
+import itertools
+import os
+import sys
+
+from Simulation.jobqueue import JobQueue, job_key
+from Simulation.warehouse import ResultsWarehouse
+from main import build_parser
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    sub = p.add_subparsers(dest="command", required=True)
+
+    s = sub.add_parser("submit", help="add the grid to the queue (existing jobs are skipped)")
+    s.add_argument("queue")
+    s.add_argument("--topology", nargs="+", required=True)
+    s.add_argument("--workload", nargs="+", required=True)
+    s.add_argument("--policy", nargs="+", required=True)
+    s.add_argument("--rate", nargs="+", default=[None], help="default: main.py's")
+    s.add_argument("--seed", nargs="+", default=[None], help="default: main.py's")
+
+    s = sub.add_parser("status")
+    s.add_argument("queue")
+    s.add_argument("--lease", type=float, default=120.0)
+
+    s = sub.add_parser("retry", help="requeue failed jobs")
+    s.add_argument("queue")
+
+    s = sub.add_parser("export", help="copy finished jobs into the results warehouse")
+    s.add_argument("queue")
+    s.add_argument("--db", default=os.path.join(HERE, "results.sqlite"))
+    s.add_argument("--csv", default=None)
+
+    # everything after `--` belongs to main.py, not to this parser
+    argv = sys.argv[1:]
+    split = argv.index("--") if "--" in argv else len(argv)
+    args = p.parse_args(argv[:split])
+    args.extra = argv[split + 1:]
+    return args
+
+
+def grid(args):
+    """One main.py configuration per point of the grid, validated by main's parser."""
+    parser = build_parser()
+
+    for topology, workload, policy, rate, seed in itertools.product(
+        args.topology, args.workload, args.policy, args.rate, args.seed
+    ):
+        argv = ["--topology", topology, "--workload", workload, "--policy", policy]
+        if rate is not None:
+            argv += ["--rate", rate]
+        if seed is not None:
+            argv += ["--seed", seed]
+        yield vars(parser.parse_args(argv + args.extra))
+
+
+def submit(args):
+    configs = list(grid(args))
+    with JobQueue(args.queue) as queue:
+        added = queue.submit(configs)
+        print(f"Submitted {added} new jobs ({len(configs) - added} already queued) to {args.queue}")
+        print(queue.counts())
+
+
+def status(args):
+    with JobQueue(args.queue, lease=args.lease) as queue:
+        counts = queue.counts()
+        print(" ".join(f"{k}={v}" for k, v in counts.items()))
+
+        for w in queue.workers():
+            stale = " (stale)" if w["since_heartbeat"] > args.lease else ""
+            print(f"  {w['worker']}: job {w['job']}, heartbeat {w['since_heartbeat']:.0f}s ago{stale}")
+
+        finished = queue.finished()
+        if finished:
+            seconds = [f["seconds"] for f in finished]
+            per_worker = {}
+            for f in finished:
+                per_worker[f["worker"]] = per_worker.get(f["worker"], 0) + 1
+            print(f"  done: mean {sum(seconds) / len(seconds):.1f}s per job, "
+                  f"{len(per_worker)} workers contributed")
+
+
+def retry(args):
+    with JobQueue(args.queue) as queue:
+        print(f"Requeued {queue.retry_failed()} failed jobs")
+
+
+def export(args):
+    added = 0
+    with JobQueue(args.queue) as queue, ResultsWarehouse(args.db) as warehouse:
+        for f in queue.finished():
+            run_key = f"queue:{job_key(f['config'])}"
+            if warehouse.has_run(run_key):
+                continue
+            warehouse.add_run(f["config"], f["results"], source="queue", run_key=run_key)
+            added += 1
+        print(f"Added {added} runs to {args.db}")
+
+        if args.csv:
+            n = warehouse.export_csv(args.csv)
+            print(f"Saved {n} rows to {args.csv}")
+
+
+COMMANDS = {"submit": submit, "status": status, "retry": retry, "export": export}
+
+
+def main():
+    args = parse_args()
+    COMMANDS[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+conftest.py
+
+Shared fixtures. pytest.ini puts the repository root on sys.path, as
+running from the root does:
+
+    python -m pytest -q
+"""
+
+import contextlib
+import io
+from argparse import Namespace
+
+import pytest
+
+from Components.host import generate_hosts
+from Components.routing import bfs, dag_store, kernels, search
+from Simulation.experiment import build_topology, configure, run_experiment
+from Simulation.run_epoch import build_epoch_context
+from global_randoms import reset_randoms, set_mode
+from main import build_parser
+
+
+def quiet():
+    """Swallow the progress prints of topology builders and run_epoch."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def build(topology: str, hosts: int, seed: int = 42):
+    """(host_list, topology, ctx) seeded like run_experiment."""
+    set_mode("sequential")
+    reset_randoms(seed)
+    host_list = generate_hosts(hosts)
+    with quiet():
+        graph = build_topology(Namespace(topology=topology), host_list)
+    return host_list, graph, build_epoch_context(graph)
+
+
+@pytest.fixture(autouse=True)
+def default_settings():
+    """Every test starts and ends on the process-wide defaults."""
+    yield
+    kernels.set_backend("python")
+    dag_store.configure(None)
+    search.configure("full")
+    bfs.configure()
+    set_mode("sequential")
+
+
+def experiment(*argv: str, interpreted: bool = False):
+    """
+    run_experiment on a main.py command line; returns (results, report).
+
+    interpreted selects the numba kernel backend run as plain Python, so
+    the compiled code paths are exercised without Numba installed.
+    """
+    args = build_parser().parse_args(list(argv))
+    configure(args)
+    if interpreted:
+        kernels.set_backend("numba", allow_interpreted=True)
+    with quiet():
+        return run_experiment(args)
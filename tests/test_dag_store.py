@@ -0,0 +1,79 @@
+"""
+test_dag_store.py
+
+Writers flushing to one DagStore directory (epoch-parallel workers,
+queue workers sharing --dag-store) must all keep their DAGs, and only
+the current generation may remain on disk.
+"""
+
+import multiprocessing as mp
+import os
+
+from Components.routing.dag_store import DagStore
+
+NODES = list(range(32))
+INDEX = {n: n for n in NODES}
+
+
+def _store(path):
+    return DagStore(str(path), NODES, INDEX)
+
+
+def _put(store, sources):
+    for s in sources:
+        other = (s + 1) % len(NODES)
+        store.put(s, {s: [], other: [s]}, {s: 0.0, other: 1.0}, [s, other])
+
+
+def _generations(path):
+    return sorted(e for e in os.listdir(path) if e.startswith("g_"))
+
+
+def _flush_worker(path, sources):
+    store = _store(path)
+    store.get(sources[0])  # loads the generation current at start
+    _put(store, sources)
+    store.flush()
+
+
+def test_interleaved_writers_keep_each_others_dags(tmp_path):
+    first, second = _store(tmp_path), _store(tmp_path)
+    first.get(0)
+    second.get(0)  # both loaded the same (empty) generation
+
+    _put(first, [0, 1, 2])
+    _put(second, [3, 4])
+    first.flush()
+    second.flush()
+
+    reader = _store(tmp_path)
+    assert [reader.get(s) is not None for s in range(6)] == [True] * 5 + [False]
+    assert reader.get(4).distances[5] == 1.0
+    assert len(_generations(tmp_path)) == 1
+
+
+def test_concurrent_flushes(tmp_path, writers=4):
+    ctx = mp.get_context("fork")
+    procs = [
+        ctx.Process(target=_flush_worker, args=(tmp_path, list(range(w * 4, w * 4 + 4))))
+        for w in range(writers)
+    ]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    assert all(p.exitcode == 0 for p in procs)
+
+    reader = _store(tmp_path)
+    assert len(reader) == writers * 4
+    assert len(_generations(tmp_path)) == 1
+
+
+def test_orphaned_generations_are_removed(tmp_path):
+    os.makedirs(tmp_path / "g_1_1")  # a writer that died before swapping CURRENT
+    store = _store(tmp_path)
+    _put(store, [0])
+    store.flush()
+
+    assert len(_generations(tmp_path)) == 1
+    assert "g_1_1" not in _generations(tmp_path)
@@ -0,0 +1,62 @@
+"""
+test_epoch_parallel.py
+
+Epoch-parallel runs (Simulation/epoch_parallel.py) must give the serial
+loop's results. The noisy congestion models are large relative to link
+capacity, so weights cross rel_threshold on some epochs and not others;
+the default uniform model never moves a weight that far, so segments
+start between cache clears.
+"""
+
+import pytest
+
+from Components.routing.configurations import policy_configuration
+from Components.workloads.congestion import congestion_ar1, congestion_uniform
+from Components.workloads.workload import AR1Workload
+from Simulation.metrics.metric import AllMetrics
+from Simulation.run_simulation import run_simulation
+from global_randoms import reset_randoms, set_mode
+from conftest import build, quiet
+
+EPOCHS = 30
+
+CONGESTION = {
+    "default": congestion_uniform,
+    "ar1": lambda: congestion_ar1(noise_scale=35),
+    "uniform": lambda: congestion_uniform(high=7),
+}
+
+
+def _run(congestion, policy, processes=None):
+    host_list, graph, _ = build("fat_tree", 16)
+    set_mode("keyed")
+    reset_randoms(42)
+    workload = AR1Workload(host_list, flows_per_epoch=80, rate=15, alpha=0.9)
+    report = {}
+    with quiet():
+        results = run_simulation(
+            topology=graph, metrics=[AllMetrics()], congestion=CONGESTION[congestion](),
+            policy_names=policy_configuration[policy], workload=workload,
+            epochs=EPOCHS, report=report, epoch_processes=processes,
+        )
+    return results, report
+
+
+@pytest.mark.parametrize("congestion", ["ar1", "uniform"])
+@pytest.mark.parametrize("policy", ["ospf_configuration", "ospf_ecmp_configuration", "ospf_drill_configuration"])
+def test_parallel_matches_serial(congestion, policy):
+    serial, _ = _run(congestion, policy)
+    parallel, report = _run(congestion, policy, processes=3)
+
+    assert report["epoch_parallel"]["segments"] > 1
+    assert report["epoch_parallel"]["epochs"] == EPOCHS
+    assert parallel == serial
+
+
+@pytest.mark.parametrize("policy", ["rip_ecmp_configuration", "eigrp_configuration", "ospf_ecmp_configuration"])
+def test_default_congestion_splits(policy):
+    serial, _ = _run("default", policy)
+    parallel, report = _run("default", policy, processes=3)
+
+    assert report["epoch_parallel"]["segments"] == 3
+    assert parallel == serial
@@ -0,0 +1,71 @@
+"""
+test_failures.py
+
+Failure injection (Simulation/failures.py): DAGs patched by
+policy.on_links_changed must equal a fresh search on the masked graph.
+"""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from Components.routing import weights
+from Components.routing.configurations import POLICY_BUILDERS
+from Components.routing.multipath import ShortestPathEngine
+from Simulation.failures import FailureEvent, FailureInjector, FailureSchedule
+from conftest import build
+
+
+def _fabric_links(graph):
+    def is_host(n):
+        return graph.nodes[n].get("type") == "host"
+    return [(u, v) for u, v in graph.edges() if not (is_host(u) or is_host(v))]
+
+
+def _schedule(graph):
+    # epoch 1 fails two links, epoch 2 restores one and fails another
+    a, b, c = random.Random(5).sample(_fabric_links(graph), 3)
+    return FailureSchedule([
+        FailureEvent(1, "link", a),
+        FailureEvent(1, "link", b),
+        FailureEvent(2, "link", a, up=True),
+        FailureEvent(2, "link", c),
+    ])
+
+
+def _normalise(preds, count):
+    # repairs may reorder predecessors; detached nodes may keep empty lists
+    return (
+        {node: sorted(ps) for node, ps in preds.items() if ps},
+        {node: c for node, c in count.items()},
+    )
+
+
+@pytest.mark.parametrize("name,builder", [
+    ("eigrp_ecmp", "eigrp_weight_builder"),
+    ("rip_ecmp", "hop_weight_builder"),
+])
+def test_repaired_dags_match_fresh_search(name, builder):
+    host_list, graph, ctx = build("fat_tree", 16)
+    policy = POLICY_BUILDERS[name](ctx)
+    injector = FailureInjector(_schedule(graph))
+    hosts = [h.id for h in host_list]
+
+    for epoch in range(3):
+        injector.apply(epoch, ctx, [policy])
+        if epoch:
+            # equal-cost branches lost or regained are patched, the rest dropped
+            record = injector._pending
+            assert record["repaired_sources"] and record["invalidated_sources"]
+            assert record["recovery_seconds_est"] >= record["repair_seconds"]
+
+            fresh = ShortestPathEngine(ctx, getattr(weights, builder))
+            for src, (preds, count) in policy.cache.items():
+                assert _normalise(preds, count) == _normalise(*fresh.compute_counts(src)), src
+            injector.observe(epoch, SimpleNamespace(total_sent=1.0, total_dropped=0.0))
+
+        policy.epoch_tick()
+        for src in hosts:
+            for dst in hosts:
+                policy(src, dst)
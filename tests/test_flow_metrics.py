@@ -0,0 +1,80 @@
+"""
+test_flow_metrics.py
+
+FlowRatePercentiles is exact on whole epochs and keeps a log-bucketed
+histogram on the streaming paths: those percentiles must stay within its
+relative accuracy of the exact nearest-rank values, and merged streamed
+segments must equal one histogram.
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from Simulation.metrics.flow_metrics import FlowRatePercentiles
+
+
+def _epochs(seed=0, count=20, flows=500):
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        rates = rng.lognormal(2.0, 1.5, flows)
+        rates[rng.random(flows) < 0.1] = 0.0  # dropped flows
+        yield SimpleNamespace(flow_rates=rates.tolist())
+
+
+def _exact(rates):
+    xs = sorted(rates)
+    return {key: xs[int(p * (len(xs) - 1))] for p, key in [(0.50, "p50_flow_rate"), (0.95, "p95_flow_rate")]}
+
+
+def _chunks(epoch, size=64):
+    rates = np.asarray(epoch.flow_rates)
+    for start in range(0, len(rates), size):
+        yield SimpleNamespace(rates=rates[start:start + size])
+
+
+def test_whole_epochs_are_exact():
+    metric = FlowRatePercentiles()
+    rates = []
+    for epoch in _epochs():
+        metric.process(epoch)
+        rates.extend(epoch.flow_rates)
+
+    assert metric.result() == _exact(rates)
+
+
+@pytest.mark.parametrize("accuracy", [1e-3, 1e-2])
+def test_streamed_percentiles_within_accuracy(accuracy):
+    metric = FlowRatePercentiles(accuracy)
+    rates = []
+    for epoch in _epochs():
+        for chunk in _chunks(epoch):
+            metric.process_flows(chunk)
+        rates.extend(epoch.flow_rates)
+
+    assert metric.rates is None
+    result = metric.result()
+    for key, exact in _exact(rates).items():
+        assert result[key] == pytest.approx(exact, rel=accuracy)
+    # buckets follow the dynamic range, not the flow count
+    assert len(metric.counts) < 20 * 1150 * accuracy / 1e-3
+
+
+def test_merged_segments_match_one_histogram():
+    epochs = list(_epochs(seed=1))
+    whole = FlowRatePercentiles()
+    for epoch in epochs:
+        for chunk in _chunks(epoch):
+            whole.process_flows(chunk)
+
+    merged = FlowRatePercentiles()
+    for start in range(0, len(epochs), 7):
+        segment = FlowRatePercentiles()
+        for epoch in epochs[start:start + 7]:
+            for chunk in _chunks(epoch):
+                segment.process_flows(chunk)
+        merged.merge(segment)
+
+    assert merged.zeros == whole.zeros
+    assert merged.result() == whole.result()
@@ -0,0 +1,43 @@
+"""
+test_host.py
+
+Host tags (Components/host.py) are stored in the shared HostTable;
+host.tags is a live set view onto it.
+"""
+
+import pytest
+
+from Components.host import Host, generate_hosts
+
+
+def test_tag_view_writes_through():
+    hosts = generate_hosts(4)
+    host = hosts[1]
+
+    host.tags.add("gpu")
+    host.tags.add("rack:2")
+    assert "gpu" in host.tags and host.has_tag("rack:2")
+    assert host.table.column("rack")[host.row] == 2
+    assert set(host.tags) == {"gpu", "rack:2"}
+    assert not hosts[0].tags
+
+    # iteration walks a snapshot: a loop may remove what it visits
+    for tag in host.tags:
+        host.tags.discard(tag)
+    assert len(host.tags) == 0
+
+    host.tags = ["storage", "job:7"]
+    assert host.tags == {"storage", "job:7"}
+    assert Host(1, ["job:7", "storage"]) == host
+
+
+def test_one_value_per_column():
+    host = Host(0, ["job:3"])
+    host.add_tag("job:3")
+    with pytest.raises(ValueError):
+        host.tags.add("job:4")
+    assert host.tags == {"job:3"}
+
+    host.remove_tag("job:3")
+    host.add_tag("job:4")
+    assert host.tags == {"job:4"}
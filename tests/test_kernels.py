@@ -0,0 +1,102 @@
+"""
+test_kernels.py
+
+The compiled kernel backend (Components/routing/kernels.py,
+Simulation/kernels.py) against the pure-Python paths. Without Numba the
+kernels run interpreted, which checks the same code step for step.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from Components.routing import kernels, weights
+from Components.routing.dag_arrays import ArrayDag
+from Components.routing.multipath import ShortestPathEngine
+from conftest import build, experiment
+
+TOPOLOGIES = [("fat_tree", 16), ("jellyfish", 32)]
+BUILDERS = ["hop_weight_builder", "eigrp_weight_builder"]
+
+
+def _sources(host_list, n=6):
+    return random.Random(7).sample([h.id for h in host_list], n)
+
+
+def _congest(topology, ctx, seed=3):
+    # non-uniform eigrp weights, with ties left on unloaded links
+    rng = random.Random(seed)
+    for eid, (u, v) in enumerate(ctx.edge_list):
+        level = rng.choice([0.0, 0.0, 0.25, 0.5])
+        topology[u][v]["congestion"] = level
+        ctx.congestion[eid] = level * ctx.capacity[eid]
+
+
+def _engines(ctx, builder):
+    kernels.set_backend("python")
+    python = ShortestPathEngine(ctx, getattr(weights, builder))
+    kernels.set_backend("numba", allow_interpreted=True)
+    compiled = ShortestPathEngine(ctx, getattr(weights, builder))
+    return python, compiled
+
+
+@pytest.mark.parametrize("topology,hosts", TOPOLOGIES)
+@pytest.mark.parametrize("builder", BUILDERS)
+@pytest.mark.parametrize("links_down", [0, 5])
+def test_dag_parity(topology, hosts, builder, links_down):
+    host_list, graph, ctx = build(topology, hosts)
+    _congest(graph, ctx)
+    for eid in random.Random(links_down).sample(range(len(ctx.edge_list)), links_down):
+        ctx.edge_up[eid] = False
+
+    python, compiled = _engines(ctx, builder)
+    for src in _sources(host_list):
+        kernels.set_backend("python")
+        preds, dist, order = python.compute_dag(src)
+        ref_preds, ref_count = python.compute_counts(src)
+
+        kernels.set_backend("numba", allow_interpreted=True)
+        c_preds, c_dist, c_order = compiled.compute_dag(src)
+        a_preds, a_count = compiled.compute_counts(src)
+
+        assert isinstance(a_preds.get(src), list)
+        assert c_preds == preds and c_dist == dist and list(c_order) == list(order)
+        assert a_preds == ref_preds and a_count == ref_count
+        # count keys in nondecreasing distance, as the repair code expects
+        assert list(a_count) == list(ref_count)
+
+
+def test_array_dag_rows_round_trip():
+    host_list, graph, ctx = build("jellyfish", 32)
+    _congest(graph, ctx)
+    kernels.set_backend("numba", allow_interpreted=True)
+    engine = ShortestPathEngine(ctx, weights.eigrp_weight_builder)
+
+    for src in _sources(host_list):
+        dag = engine._compute_dag_compiled(src, 1e-12)
+        back = ArrayDag.from_rows(ctx.node_list, ctx.node_index, src, *dag.rows())
+        assert back.preds == dag.preds and back.counts == dag.counts
+        assert back.distances == dag.distances and list(back.nodes) == list(dag.nodes)
+
+
+def test_ecmp_counts_match_recount():
+    host_list, graph, ctx = build("fat_tree", 16)
+    w = np.ones(len(ctx.edge_list))
+    for src in _sources(host_list):
+        s = ctx.node_index[src]
+        dist, order, pred_ptr, pred_idx = kernels.dijkstra_dag(
+            ctx.indptr, ctx.indices, ctx.adj_eids, w, ctx.edge_up, s, 1e-12,
+        )
+        count = kernels.ecmp_counts(pred_ptr, pred_idx, order, s)
+        for v in order[1:]:
+            assert count[v] == count[pred_idx[pred_ptr[v]:pred_ptr[v + 1]]].sum()
+
+
+@pytest.mark.parametrize("policy", ["ospf_ecmp_configuration", "eigrp_drill_configuration", "conga_configuration"])
+def test_run_parity(policy):
+    argv = ("--topology", "fat_tree", "--workload", "random_workload", "--policy", policy,
+            "--hosts", "16", "--flows", "60", "--epochs", "3")
+    python, _ = experiment(*argv)
+    compiled, _ = experiment(*argv, interpreted=True)
+    assert compiled == python
@@ -0,0 +1,43 @@
+"""
+test_policy.py
+
+Routing policies (Components/routing/policy.py) driven directly on an
+epoch context.
+"""
+
+from Components.routing.policy import conga
+from conftest import build
+
+
+def _fabric(path):
+    # the leaf-to-leaf part of a host-to-host path
+    return path[1:-1]
+
+
+def test_conga_leaf_pair_leaves_congested_path():
+    host_list, graph, ctx = build("fat_tree", 16)
+    policy = conga(ctx)
+
+    def leaf(host):
+        return ctx.adj[host][0][0]
+
+    src = host_list[0].id
+    dst = next(h.id for h in host_list if leaf(h.id) != leaf(src))
+    # another host pair under the same two leaves
+    src2 = next(h.id for h in host_list if h.id != src and leaf(h.id) == leaf(src))
+    dst2 = next(h.id for h in host_list if h.id != dst and leaf(h.id) == leaf(dst))
+
+    policy.epoch_tick()
+    before = _fabric(policy(src, dst))
+    assert _fabric(policy(src2, dst2)) == before
+
+    # saturate the links of the chosen fabric path
+    for u, v in zip(before, before[1:]):
+        eid = ctx.edge_id[(u, v)]
+        ctx.congestion[eid] = ctx.capacity[eid]
+
+    policy.epoch_tick()
+    after = _fabric(policy(src, dst))
+    assert after != before
+    assert not {(u, v) for u, v in zip(after, after[1:])} & {(u, v) for u, v in zip(before, before[1:])}
+    assert _fabric(policy(src2, dst2)) == after
@@ -0,0 +1,39 @@
+"""
+test_replication.py
+
+main.py --replications checks its --ci-metric names before any
+replication runs.
+"""
+
+import pytest
+
+import main
+from main import build_parser
+
+ARGV = ["--topology", "fat_tree", "--workload", "random_workload", "--policy", "rip_configuration",
+        "--hosts", "16", "--flows", "20", "--epochs", "2", "--replications", "2", "--processes", "1"]
+
+
+def test_unknown_ci_metric_fails_before_running(monkeypatch, capsys):
+    def run_replications(*args, **kwargs):
+        raise AssertionError("a replication ran")
+
+    monkeypatch.setattr(main, "run_replications", run_replications)
+    args = build_parser().parse_args(ARGV + ["--ci-metric", "drop_ratio", "--ci-metric", "drop_rate"])
+
+    with pytest.raises(SystemExit) as exc:
+        main.replicate(args)
+    assert exc.value.code == 2
+    assert "unknown --ci-metric drop_rate" in capsys.readouterr().err
+
+
+def test_known_ci_metrics_run(monkeypatch):
+    seen = {}
+
+    def run_replications(args, **kwargs):
+        seen.update(kwargs)
+        return {"replications": [], "summary": {}, "converged": False}
+
+    monkeypatch.setattr(main, "run_replications", run_replications)
+    main.replicate(build_parser().parse_args(ARGV + ["--ci-metric", "drop_ratio", "--ci-metric", "p95_flow_rate"]))
+    assert list(seen["key_metrics"]) == ["drop_ratio", "p95_flow_rate"]
@@ -0,0 +1,121 @@
+"""
+test_steady_state.py
+
+SteadyStateDetector keeps one metric set per batch and merges them from
+the truncation point; the result must match a metric set that saw only
+the epochs from that point on.
+"""
+
+import copy
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from Components.routing.configurations import policy_configuration
+from Components.workloads.congestion import carry_over
+from Components.workloads.workload import AR1Workload
+from Simulation.metrics.edge_metrics import WindowedEdgeUtilization
+from Simulation.metrics.metric import AllMetrics
+from Simulation.run_simulation import run_simulation
+from Simulation.steady_state import SteadyStateDetector
+from conftest import build, quiet
+
+EPOCHS = 40
+
+
+class _Recording(SteadyStateDetector):
+    """Detector that also keeps a copy of every epoch it is fed."""
+
+    def __init__(self) -> None:
+        # min_epochs past the end: never stops early
+        super().__init__(EPOCHS, min_epochs=EPOCHS + 1)
+        self.seen = []
+
+    def process(self, epoch_result, ctx) -> None:
+        super().process(epoch_result, ctx)
+        self.seen.append(copy.deepcopy(epoch_result))
+
+
+@pytest.fixture(scope="module")
+def run():
+    host_list, graph, _ = build("fat_tree", 16)
+    detector = _Recording()
+    workload = AR1Workload(host_list, flows_per_epoch=80, rate=15, alpha=0.9)
+    with quiet():
+        run_simulation(
+            topology=graph, metrics=[AllMetrics(windowed=True)], congestion=carry_over(),
+            policy_names=policy_configuration["ospf_ecmp_configuration"],
+            workload=workload, epochs=EPOCHS, steady_state=detector,
+        )
+    return detector, detector.seen
+
+
+def _reference(epochs):
+    metrics = AllMetrics(windowed=True)
+    for epoch in epochs:
+        metrics.process(epoch)
+    return metrics.result()
+
+
+def test_one_live_metric_set(run):
+    detector, epochs = run
+    assert len(epochs) == EPOCHS
+    # segments at every batch boundary of the first half, none deep-copied per epoch
+    assert sorted(detector._segments) == list(range(0, EPOCHS // 2 + 1, detector.batch))
+    assert detector._live is detector._segments[max(detector._segments)]
+
+
+@pytest.mark.parametrize("truncation", range(0, EPOCHS // 2 + 1, 5))
+def test_merged_segments_match_truncated_run(run, truncation):
+    detector, epochs = run
+    detector._truncation = truncation
+    detector.converged = True
+    merged = detector.results()
+    reference = _reference(epochs[truncation:])
+
+    assert merged.keys() == reference.keys()
+    for key, value in reference.items():
+        # windows, maxima and sorted values merge exactly; sums are re-associated
+        assert merged[key] == pytest.approx(value, rel=1e-12, abs=1e-15), key
+    assert merged["peak_window_edge_util"] == reference["peak_window_edge_util"]
+    assert merged["peak_ewma_edge_util"] == reference["peak_ewma_edge_util"]
+    assert merged["p95_switch_util"] == reference["p95_switch_util"]
+
+
+@pytest.mark.parametrize("segment", [1, 2, 5, 12])
+def test_windowed_segments_cross_boundaries(segment):
+    # decaying load: the peak window of a truncated run is its first one,
+    # which must not reach back before the truncation point
+    rng = np.random.default_rng(segment)
+    cap = np.full(6, 10.0)
+    epochs = [
+        SimpleNamespace(edge_load_array=rng.random(6) * 10.0 * 0.9 ** t, edge_capacity_array=cap)
+        for t in range(40)
+    ]
+
+    segments = [WindowedEdgeUtilization(window=8)]
+    for t, epoch in enumerate(epochs):
+        if t and t % segment == 0:
+            segments.append(segments[-1].successor())
+        segments[-1].process(epoch)
+
+    for k in range(len(segments)):
+        merged = copy.deepcopy(segments[k])
+        for later in segments[k + 1:]:
+            merged.merge(later)
+
+        reference = WindowedEdgeUtilization(window=8)
+        for epoch in epochs[k * segment:]:
+            reference.process(epoch)
+        assert merged.result() == reference.result()
+
+
+def test_metrics_without_merge_are_rejected():
+    class NoMerge:
+        def process(self, epoch): ...
+        def result(self): return {}
+        def reset(self): ...
+
+    with pytest.raises(ValueError, match="merge"):
+        SteadyStateDetector(10).reset([NoMerge()])
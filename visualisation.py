@@ -1,141 +1,326 @@
-import matplotlib.pyplot as plt
-import networkx as nx
+"""
+visualisation.py
 
-from Components.host import generate_hosts
-from Components.topology.configuration import topology_configuration
+Topology and link-utilisation plots that stay usable at data-centre scale.
 
+Layouts are computed once per topology (keyed by topology_hash) and
+cached in memory, and on disk if a cache directory is given:
 
-def draw_topology(topology):
-    """
-    Draw graph using node 'layer' metadata.
+    - layered (fat-tree, leaf-spine): rows from the node `layer`
+      attribute (or host / leaf / spine type), each row ordered by the
+      mean position of its neighbours in the row below
+    - fabric (jellyfish, ...): spring layout of the switch graph only,
+      hosts placed on a small circle around their switch
 
-    Requirements:
-        each node has:
-            layer : int
-            type  : "host" | "switch"
-    """
+Edges are drawn as one LineCollection in EpochContext.edge_list order,
+optionally coloured by per-edge utilisation from an EpochResult or a
+recorded run, so a k=32 fat-tree (~24k edges) renders in seconds.
+
+    python visualisation.py --topology fat_tree --hosts 8192 --out fabric.png
+    python visualisation.py --record runs/a --epoch 10
+"""
 
-    # --------------------------------------------------------
-    # build layered positions
-    # --------------------------------------------------------
+import argparse
+from argparse import Namespace
+import os
+from typing import Dict, Hashable, List, Optional, Tuple
 
-    pos = {}
+import matplotlib.pyplot as plt
+import networkx as nx
+import numpy as np
+from matplotlib.collections import LineCollection
 
-    layers = {}
+from Components.host import generate_hosts
+from Components.topology.configuration import topology_configuration
+from Components.topology.utils import topology_hash
+from Simulation.epoch_result import EpochResult
+from Simulation.experiment import build_topology, build_workload
+from Simulation.recorder import Recording
+from global_randoms import MODES, reset_randoms, set_mode
 
-    for node, data in topology.nodes(data=True):
-        layer = data.get("layer", 0)
-        layers.setdefault(layer, []).append(node)
+# layer of nodes without a `layer` attribute, by node type
+TYPE_LAYERS = {"host": 0, "leaf": 1, "spine": 2}
 
-    # place nodes row by row
-    for layer, nodes in layers.items():
-        count = len(nodes)
+# switch count above which the fabric layout falls back to a circle
+SPRING_MAX_SWITCHES = 1000
 
-        for i, node in enumerate(nodes):
-            # spread horizontally and center
-            x = i - count / 2
-            y = layer
-            pos[node] = (x, y)
+_layouts: Dict[str, Dict[Hashable, Tuple[float, float]]] = {}
 
-    # --------------------------------------------------------
-    # draw
-    # --------------------------------------------------------
 
-    hosts = [n for n, d in topology.nodes(data=True) if d["type"] == "host"]
-    switches = [n for n, d in topology.nodes(data=True) if d["type"] == "switch"]
+# ---------------------------------------
+# Layouts
+# ---------------------------------------
 
-    nx.draw_networkx_edges(topology, pos, alpha=0.25)
+def _layer(data: Dict) -> Optional[int]:
+    layer = data.get("layer")
+    return layer if layer is not None else TYPE_LAYERS.get(data.get("type"))
 
-    nx.draw_networkx_nodes(
-        topology, pos,
-        nodelist=switches,
-        node_color="tab:orange",
-        node_size=80,
-    )
 
-    nx.draw_networkx_nodes(
-        topology, pos,
-        nodelist=hosts,
-        node_color="tab:blue",
-        node_size=30,
-    )
+def layered_layout(topology: nx.Graph) -> Dict[Hashable, Tuple[float, float]]:
+    """Rows by layer, each row spread over [0, 1] and ordered by neighbour barycentre."""
+    layers: Dict[int, List[Hashable]] = {}
+    for node, data in topology.nodes(data=True):
+        layers.setdefault(_layer(data), []).append(node)
 
-    plt.axis("off")
-    plt.tight_layout()
-    plt.savefig("topology.svg", bbox_inches="tight")
-    plt.show()
+    pos: Dict[Hashable, Tuple[float, float]] = {}
 
+    for layer in sorted(layers):
+        nodes = layers[layer]
 
-def draw_jellyfish(topology):
+        def barycentre(node):
+            xs = [pos[n][0] for n in topology.neighbors(node) if n in pos]
+            return sum(xs) / len(xs) if xs else 0.5
 
-    import networkx as nx
-    import matplotlib.pyplot as plt
-    import numpy as np
+        if pos:
+            nodes = sorted(nodes, key=barycentre)
 
-    switches = [n for n,d in topology.nodes(data=True) if d["type"]=="switch"]
-    hosts = [n for n,d in topology.nodes(data=True) if d["type"]=="host"]
+        count = len(nodes)
+        for i, node in enumerate(nodes):
+            pos[node] = ((i + 0.5) / count, float(layer))
 
-    # ----------------------------------------
-    # Layout ONLY the switch fabric
-    # ----------------------------------------
+    return pos
 
-    switch_graph = topology.subgraph(switches)
 
-    pos = nx.spring_layout(
-        switch_graph,
-        k=0.15,
-        iterations=40,
-        seed=42
-    )
+def fabric_layout(topology: nx.Graph, seed: int = 42) -> Dict[Hashable, Tuple[float, float]]:
+    """Spring (or circular, for large fabrics) switch layout with hosts around their switch."""
+    switches = [n for n, d in topology.nodes(data=True) if d.get("type") != "host"]
+    fabric = topology.subgraph(switches)
 
-    # ----------------------------------------
-    # Radially place hosts around switch
-    # ----------------------------------------
+    if len(switches) <= SPRING_MAX_SWITCHES:
+        pos = nx.spring_layout(fabric, k=1.5 / np.sqrt(max(len(switches), 1)), iterations=40, seed=seed)
+    else:
+        pos = nx.circular_layout(fabric)
 
+    spacing = 1.0 / np.sqrt(max(len(switches), 1))
     for sw in switches:
+        hosts = [n for n in topology.neighbors(sw) if topology.nodes[n].get("type") == "host"]
+        if not hosts:
+            continue
+        cx, cy = pos[sw]
+        theta = 2 * np.pi * np.arange(len(hosts)) / len(hosts)
+        r = 0.3 * spacing
+        for h, x, y in zip(hosts, cx + r * np.cos(theta), cy + r * np.sin(theta)):
+            pos[h] = (float(x), float(y))
+
+    # hosts with no switch neighbour (direct host links, isolated hosts) on an outer ring
+    rest = [n for n in topology.nodes() if n not in pos]
+    if rest:
+        xy = np.array(list(pos.values()), dtype=np.float64).reshape(-1, 2)
+        centre = xy.mean(axis=0) if len(xy) else np.zeros(2)
+        radius = float(np.abs(xy - centre).max()) + spacing if len(xy) else 1.0
+        theta = 2 * np.pi * np.arange(len(rest)) / len(rest)
+        for n, x, y in zip(rest, centre[0] + radius * np.cos(theta), centre[1] + radius * np.sin(theta)):
+            pos[n] = (float(x), float(y))
+
+    return {n: (float(x), float(y)) for n, (x, y) in pos.items()}
+
+
+def _is_layered(topology: nx.Graph) -> bool:
+    return all(_layer(d) is not None for _, d in topology.nodes(data=True))
+
+
+def _cache_file(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, f"layout_{key}.npz")
+
+
+def layout(topology: nx.Graph, cache_dir: Optional[str] = None) -> Dict[Hashable, Tuple[float, float]]:
+    """Node positions, computed once per topology hash (in memory, and in cache_dir if given)."""
+    key = topology_hash(topology)
+    pos = _layouts.get(key)
+    if pos is not None:
+        return pos
+
+    if cache_dir is not None and os.path.exists(_cache_file(cache_dir, key)):
+        saved = np.load(_cache_file(cache_dir, key))
+        by_repr = dict(zip(saved["nodes"].tolist(), map(tuple, saved["xy"].tolist())))
+        pos = {n: by_repr[repr(n)] for n in topology.nodes()}
+    else:
+        pos = layered_layout(topology) if _is_layered(topology) else fabric_layout(topology)
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            nodes = list(pos)
+            np.savez(
+                _cache_file(cache_dir, key),
+                nodes=np.array([repr(n) for n in nodes]),
+                xy=np.array([pos[n] for n in nodes], dtype=np.float64),
+            )
 
-        nbrs = [n for n in topology.neighbors(sw)
-                if topology.nodes[n]["type"]=="host"]
+    _layouts[key] = pos
+    return pos
 
-        if not nbrs:
-            continue
 
-        cx, cy = pos[sw]
+def edge_segments(topology: nx.Graph, pos: Dict[Hashable, Tuple[float, float]]) -> np.ndarray:
+    """(E, 2, 2) segment endpoints in topology.edges() (= EpochContext.edge_list) order."""
+    index = {n: i for i, n in enumerate(pos)}
+    xy = np.array(list(pos.values()), dtype=np.float64)
+    ends = np.array([(index[u], index[v]) for u, v in topology.edges()], dtype=np.int64).reshape(-1, 2)
+    return xy[ends]
 
-        r = 0.15
-        for i, h in enumerate(nbrs):
 
-            theta = 2*np.pi*i/len(nbrs)
+# ---------------------------------------
+# Edge utilisation sources
+# ---------------------------------------
 
-            pos[h] = (
-                cx + r*np.cos(theta),
-                cy + r*np.sin(theta)
-            )
+def epoch_utilization(topology: nx.Graph, epoch_result: EpochResult) -> np.ndarray:
+    """Per-edge load / capacity of one epoch, in edge_list order."""
+    cap = np.array([d["capacity"] for _, _, d in topology.edges(data=True)], dtype=np.float64)
+    load = epoch_result.edge_load_array
+    if load is None:
+        load = np.array([epoch_result.edge_load.get((u, v), 0.0) for u, v in topology.edges()])
+    return np.divide(load, cap, out=np.ones_like(cap), where=cap > 0)
 
-    # ----------------------------------------
-    # Draw
-    # ----------------------------------------
-
-    nx.draw_networkx_edges(topology, pos, alpha=0.1)
-
-    nx.draw_networkx_nodes(
-        topology, pos,
-        nodelist=switches,
-        node_color="tab:orange",
-        node_size=60
-    )
-
-    nx.draw_networkx_nodes(
-        topology, pos,
-        nodelist=hosts,
-        node_color="tab:blue",
-        node_size=20
-    )
-
-    plt.axis("off")
-    plt.tight_layout()
-    plt.savefig("jellyfish.svg")
-    plt.show()
-
-hosts = generate_hosts(16)
-draw_jellyfish(topology_configuration["jellyfish"](hosts,switch_degree=4, n_switches=20))
\ No newline at end of file
+
+def recorded_utilization(topology: nx.Graph, path: str, epoch: Optional[int] = None) -> np.ndarray:
+    """
+    Per-edge utilisation of one recorded epoch (row), or its mean over
+    the run if epoch is None, aligned to topology.edges() order.
+    """
+    recording = Recording(path)
+    if epoch is not None:
+        util = recording.vector("edge_util", epoch)
+    else:
+        util = np.zeros(len(recording.capacity))
+        for _, chunk in recording.iter_vector("edge_util"):
+            util += chunk.sum(axis=0)
+        util /= max(recording.epochs, 1)
+
+    # the recording stores endpoints as strings, in its own edge order
+    row = {}
+    for i, (u, v) in enumerate(recording.edges.tolist()):
+        row[(u, v)] = row[(v, u)] = i
+    try:
+        order = [row[(str(u), str(v))] for u, v in topology.edges()]
+    except KeyError:
+        raise ValueError(f"Recording {path} was made on a different topology") from None
+    return np.asarray(util, dtype=np.float64)[order]
+
+
+# ---------------------------------------
+# Drawing
+# ---------------------------------------
+
+def _draw(topology, pos, ax, edge_colors, edge_kwargs):
+    segments = edge_segments(topology, pos)
+    lines = LineCollection(segments, **edge_kwargs)
+    if edge_colors is not None:
+        lines.set_array(edge_colors)
+    ax.add_collection(lines)
+
+    nodes = list(pos)
+    xy = np.array(list(pos.values()))
+    is_host = np.array([topology.nodes[n].get("type") == "host" for n in nodes], dtype=bool)
+
+    # marker size shrinks with node count so large fabrics stay readable
+    size = max(1.0, 4000.0 / max(len(nodes), 1))
+    ax.scatter(xy[~is_host, 0], xy[~is_host, 1], s=2 * size, c="tab:orange", zorder=3, linewidths=0)
+    ax.scatter(xy[is_host, 0], xy[is_host, 1], s=size, c="tab:blue", zorder=3, linewidths=0)
+
+    ax.autoscale_view()
+    ax.set_axis_off()
+    return lines
+
+
+def _finish(fig, path):
+    fig.tight_layout()
+    if path is not None:
+        fig.savefig(path, bbox_inches="tight", dpi=150)
+    return fig
+
+
+def draw_topology(
+    topology: nx.Graph,
+    ax=None,
+    path: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+):
+    """Draw the fabric; saves to `path` if given. Returns the figure."""
+    if ax is None:
+        _, ax = plt.subplots(figsize=(12, 8))
+    pos = layout(topology, cache_dir)
+    _draw(topology, pos, ax, None, {"colors": "grey", "linewidths": 0.3, "alpha": 0.4})
+    return _finish(ax.figure, path)
+
+
+def draw_utilization(
+    topology: nx.Graph,
+    util: np.ndarray,
+    ax=None,
+    path: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+    cmap: str = "inferno",
+    vmax: Optional[float] = None,
+    title: Optional[str] = None,
+):
+    """
+    Heatmap of per-edge utilisation (edge_list order, e.g. from
+    epoch_utilization or recorded_utilization). Returns the figure.
+    """
+    if ax is None:
+        _, ax = plt.subplots(figsize=(12, 8))
+    util = np.asarray(util, dtype=np.float64)
+    vmax = vmax if vmax is not None else max(float(util.max()) if len(util) else 1.0, 1e-12)
+
+    pos = layout(topology, cache_dir)
+    lines = _draw(topology, pos, ax, util, {"cmap": cmap, "linewidths": 0.6})
+    lines.set_clim(0.0, vmax)
+    ax.figure.colorbar(lines, ax=ax, label="edge utilisation", shrink=0.6)
+    if title:
+        ax.set_title(title)
+    return _finish(ax.figure, path)
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+
+    p.add_argument("--topology", choices=topology_configuration.keys(), default=None,
+                   help="default: the recorded run's")
+    p.add_argument("--hosts", type=int, default=None)
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--rng", choices=MODES, default=None, help="default: the recorded run's")
+    p.add_argument("--record", type=str, default=None,
+                   help="recorded run (EpochRecorder directory) to colour edges by")
+    p.add_argument("--epoch", type=int, default=None,
+                   help="recorded epoch row to show (default: mean over the run)")
+    p.add_argument("--layout-cache", type=str, default=None)
+    p.add_argument("--out", type=str, default="topology.png")
+
+    args = p.parse_args()
+
+    # rebuild the recorded topology unless told otherwise
+    recorded = Recording(args.record).meta["metadata"] if args.record else {}
+    args.topology = args.topology or recorded.get("topology")
+    args.hosts = args.hosts or recorded.get("hosts", 128)
+    args.seed = args.seed if args.seed is not None else recorded.get("seed", 42)
+    args.rng = args.rng or recorded.get("rng", "sequential")
+    args.recorded = recorded
+    if args.topology is None:
+        p.error("--topology is required without a recording")
+
+    return args
+
+
+def main():
+    args = parse_args()
+
+    # same order as run_experiment: the workload draws (and tags hosts for
+    # informed topologies) before the topology is built
+    set_mode(args.rng)
+    reset_randoms(args.seed)
+    hosts = generate_hosts(args.hosts)
+    if args.recorded.get("workload"):
+        build_workload(Namespace(**{**args.recorded, "hosts": args.hosts}), hosts)
+    topology = build_topology(Namespace(topology=args.topology), hosts)
+
+    if args.record:
+        util = recorded_utilization(topology, args.record, args.epoch)
+        label = f"epoch {args.epoch}" if args.epoch is not None else "mean over run"
+        draw_utilization(topology, util, path=args.out, cache_dir=args.layout_cache,
+                         title=f"{args.topology}: {label}")
+    else:
+        draw_topology(topology, path=args.out, cache_dir=args.layout_cache)
+
+    print(f"Saved {args.out}")
+
+
+if __name__ == "__main__":
+    main()